@@ -0,0 +1,94 @@
+import pytest
+
+sr = pytest.importorskip('speech_recognition')
+np = pytest.importorskip('numpy')
+
+from travelspeak import AudioPreprocessor
+
+
+def tone(seconds, rate, frequency=440, amplitude=8000):
+    t = np.arange(int(seconds * rate)) / rate
+    return amplitude * np.sin(2 * np.pi * frequency * t)
+
+
+def silence(seconds, rate):
+    return np.zeros(int(seconds * rate))
+
+
+def audio(parts, rate):
+    samples = np.concatenate(parts).astype('<i2')
+    return sr.AudioData(samples.tobytes(), rate, 2)
+
+
+def seconds(segment):
+    return len(segment.frame_data) / (segment.sample_rate * segment.sample_width)
+
+
+def test_speech_is_trimmed_split_on_pauses_and_downsampled():
+    rate = 44100
+    phrase = audio([silence(0.5, rate), tone(0.6, rate), silence(1.0, rate), tone(0.3, rate), silence(0.5, rate)], rate)
+    preprocessor = AudioPreprocessor()
+    segments = preprocessor.process(phrase)
+    assert [segment.sample_rate for segment in segments] == [16000, 16000]
+    # Each segment is the tone plus up to 150 ms of padding on either side
+    assert 0.6 <= seconds(segments[0]) <= 0.95
+    assert 0.3 <= seconds(segments[1]) <= 0.65
+    stats = preprocessor.stats()
+    assert (stats['phrases'], stats['segments'], stats['silent_phrases']) == (1, 2, 0)
+    assert stats['audio_ms_in'] == 2900
+    assert stats['bytes_saved'] > 0.7 * stats['bytes_in']
+
+
+def test_short_pauses_do_not_split_and_blips_are_dropped():
+    rate = 16000
+    phrase = audio([tone(0.4, rate), silence(0.3, rate), tone(0.4, rate), silence(1.0, rate),
+                    tone(0.03, rate), silence(1.0, rate)], rate)
+    preprocessor = AudioPreprocessor(padding_ms=0)
+    segments = preprocessor.process(phrase)
+    assert len(segments) == 1
+    assert seconds(segments[0]) == pytest.approx(1.1, abs=0.06)
+
+
+def test_threshold_follows_the_recognizer():
+    class Recognizer:
+        energy_threshold = 10000
+
+    rate = 16000
+    phrase = audio([tone(0.5, rate, amplitude=3000)], rate)
+    assert AudioPreprocessor(Recognizer()).process(phrase) == []
+    assert len(AudioPreprocessor().process(phrase)) == 1
+
+
+def test_downsampling_keeps_speech_band_and_removes_aliases():
+    preprocessor = AudioPreprocessor()
+    rate = 48000
+    kept, new_rate = preprocessor.resample(tone(1, rate, frequency=1000), rate)
+    removed, _ = preprocessor.resample(tone(1, rate, frequency=12000), rate)
+    assert new_rate == 16000
+    assert len(kept) == 16000
+
+    def rms(samples):
+        middle = samples[1000:-1000]
+        return np.sqrt(np.mean(middle * middle))
+
+    assert rms(kept) == pytest.approx(8000 / np.sqrt(2), rel=0.05)
+    assert rms(removed) < 0.05 * rms(kept)
+    low = tone(1, 8000)
+    assert preprocessor.resample(low, 8000) == (low, 8000)
+
+
+def test_silent_phrases_never_reach_the_recognizer():
+    calls = []
+
+    def recognize(segment):
+        calls.append(segment)
+        return "hello" if len(calls) == 1 else ""
+
+    rate = 16000
+    recognize_speech = AudioPreprocessor().wrap(recognize)
+    with pytest.raises(sr.UnknownValueError):
+        recognize_speech(audio([silence(1.0, rate)], rate))
+    assert calls == []
+    phrase = audio([tone(0.4, rate), silence(1.0, rate), tone(0.4, rate)], rate)
+    assert recognize_speech(phrase) == "hello"
+    assert len(calls) == 2
@@ -0,0 +1,35 @@
+import pytest
+
+sr = pytest.importorskip('speech_recognition')
+pytest.importorskip('numpy')
+
+import travelspeak
+from travelspeak import StubTranslationServer, benchmark_recognition, write_wav_fixture
+
+
+@pytest.fixture
+def stub():
+    server = StubTranslationServer(seed=1).start()
+    yield server
+    server.stop()
+
+
+def test_recognition_benchmark_covers_the_whole_fixture(tmp_path, stub):
+    path = write_wav_fixture(str(tmp_path / 'fixture.wav'), seconds=6)
+    summary = benchmark_recognition(stub, [path], workers=2, chunk_seconds=1, preprocess=True)
+    assert summary['errors'] == 0
+    assert summary['preprocess']['audio_ms_in'] == 6000
+    assert summary['preprocess']['silent_phrases'] == 3
+
+
+def test_recognition_benchmark_fails_on_lost_audio(tmp_path, stub, monkeypatch):
+    path = write_wav_fixture(str(tmp_path / 'fixture.wav'), seconds=4)
+    read = travelspeak.AudioFileSource.read
+
+    def lossy_read(self):
+        audio = read(self)
+        return sr.AudioData(audio.frame_data[:len(audio.frame_data) // 2], audio.sample_rate, audio.sample_width)
+
+    monkeypatch.setattr(travelspeak.AudioFileSource, 'read', lossy_read)
+    with pytest.raises(RuntimeError, match='captured'):
+        benchmark_recognition(stub, [path], workers=2, chunk_seconds=1)
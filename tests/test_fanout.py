@@ -0,0 +1,75 @@
+import csv
+import json
+import threading
+
+from travelspeak import TranslationError, TranslationResult, export_translations, translate_many
+
+
+# Holds every call until all targets are in flight, so the test fails if they run one by one
+class BarrierTranslator:
+    def __init__(self, parties):
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def max_chars(self):
+        return 4500
+
+    def translate(self, text, src, dest):
+        return TranslationResult(self.translate_batch([text], src, dest)[0][0], backend='fake')
+
+    def translate_batch(self, texts, src, dest, with_backend=False):
+        self.barrier.wait()
+        if dest == 'xx':
+            raise TranslationError("unsupported target")
+        return [f"[{dest}] {text}" for text in texts], 'fake'
+
+
+def test_targets_are_translated_concurrently_in_request_order():
+    results = translate_many(BarrierTranslator(3), "Hello.", 'en', ['fr', 'de', 'fr', 'es'])
+    assert list(results) == ['fr', 'de', 'es']
+    assert {dest: result.text for dest, result in results.items()} == \
+        {'fr': "[fr] Hello.", 'de': "[de] Hello.", 'es': "[es] Hello."}
+
+
+def test_a_failed_target_does_not_sink_the_others():
+    progress = []
+    results = translate_many(BarrierTranslator(2), "Hello.", 'en', ['de', 'xx'],
+                             on_result=lambda dest, outcome, done, total: progress.append((done, total)))
+    assert isinstance(results['xx'], TranslationError)
+    assert results['de'].text == "[de] Hello."
+    assert progress == [(1, 2), (2, 2)]
+
+
+def test_on_result_can_abandon_the_rest():
+    assert translate_many(BarrierTranslator(2), "Hello.", 'en', ['de', 'fr'],
+                          on_result=lambda *args: False) is None
+
+
+def test_long_documents_stay_on_the_fanout_threads():
+    threads = set()
+
+    class ThreadRecordingTranslator(BarrierTranslator):
+        def translate_batch(self, texts, src, dest, with_backend=False):
+            threads.add(threading.current_thread().name)
+            return [f"[{dest}] {text}" for text in texts], 'fake'
+
+    text = " ".join(["A sentence that fills a good part of a chunk."] * 60)
+    results = translate_many(ThreadRecordingTranslator(1), text, 'en', ['de', 'fr'])
+    assert all(result.text.startswith("[de]") or result.text.startswith("[fr]") for result in results.values())
+    assert threads and all(name.startswith('travelspeak-fanout') for name in threads)
+
+
+def test_export_translations_to_csv_and_json(tmp_path):
+    results = translate_many(BarrierTranslator(2), "Hello.", 'en', ['de', 'xx'])
+    csv_path = tmp_path / 'out.csv'
+    assert export_translations(str(csv_path), "Hello.", 'en', results) == 2
+    with open(csv_path, encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [(row['code'], row['language'], row['text'], row['error']) for row in rows] == [
+        ('en', 'English', "Hello.", ''),
+        ('de', 'German', "[de] Hello.", ''),
+        ('xx', 'xx', '', "unsupported target"),
+    ]
+
+    json_path = tmp_path / 'out.json'
+    export_translations(str(json_path), "Hello.", 'en', results)
+    assert json.loads(json_path.read_text(encoding='utf-8'))[1]['backend'] == 'fake'
@@ -0,0 +1,126 @@
+import pytest
+
+from travelspeak import HistoryStore
+
+
+@pytest.fixture
+def store():
+    store = HistoryStore(path=None, window=5)
+    for i in range(30):
+        lang = 'fr' if i % 3 else 'de'
+        store.add(f"hello world {i}", f"translation {i}", 'en', lang, timestamp=1000 + i)
+    store.add("good morning", "bonjour", 'en', 'fr', timestamp=2000)
+    return store
+
+
+def test_page_spans_the_database_and_the_recent_window(store):
+    assert store.count() == 31
+    records = store.page(20, 20)
+    assert [r.original for r in records][:2] == ["hello world 20", "hello world 21"]
+    assert records[-1].original == "good morning"
+    assert len(records) == 11
+
+
+def test_search_counts_and_pages_in_order(store):
+    results = store.search("hello")
+    assert results.count() == 30
+    first = results.page(0, 10)
+    second = results.page(10, 10)
+    assert [r.original for r in first] == [f"hello world {i}" for i in range(10)]
+    assert [r.original for r in second] == [f"hello world {i}" for i in range(10, 20)]
+    assert results.page(25, 10) == results.page(25, 5)
+    assert results.page(40, 10) == []
+
+
+def test_search_does_not_load_every_match():
+    class CountingStore(HistoryStore):
+        fetched = 0
+
+        def fetch_where(self, where, params, offset, limit):
+            records = super().fetch_where(where, params, offset, limit)
+            self.fetched += len(records)
+            return records
+
+    store = CountingStore(path=None)
+    for i in range(500):
+        store.add(f"hello {i}", f"hola {i}", 'en', 'es')
+    results = store.search("hello")
+    assert results.count() == 500
+    assert len(results.page(100, 10)) == 10
+    assert store.fetched == 10
+
+
+def test_search_filters_by_language(store):
+    results = store.search("hello", target_lang='de')
+    assert results.count() == 10
+    assert all(r.target_lang == 'de' for r in results.page(0, 50))
+    assert store.search("", source_lang='fr').count() == 0
+    assert store.search("", target_lang='fr').count() == 21
+
+
+def test_search_matches_the_last_word_as_a_prefix(store):
+    assert [r.translation for r in store.search("good mor").page(0, 10)] == ["bonjour"]
+    assert store.search("bonj").count() == 1
+    assert store.search("morning hello").count() == 0
+
+
+def test_search_quotes_fts_syntax(store):
+    store.add('say "hi" AND bye', "x", 'en', 'fr')
+    assert store.search('"hi" AND').count() == 1
+
+
+def test_search_without_fts_uses_like(store):
+    store.fts = False
+    assert store.search("world 2").count() == 12
+    assert store.search("MORNING").count() == 1
+
+
+def test_records_persist_across_restarts(tmp_path):
+    path = str(tmp_path / 'history.db')
+    store = HistoryStore(path)
+    store.add("hello", "hola", 'English', 'Spanish', timestamp=1000)
+    store.add("bye", "adiós", 'English', 'Spanish', timestamp=1001)
+    store.close()
+
+    reopened = HistoryStore(path)
+    try:
+        assert reopened.count() == 2
+        assert [(r.original, r.translation, r.timestamp) for r in reopened.page(0, 10)] == \
+            [("hello", "hola", 1000), ("bye", "adiós", 1001)]
+        assert reopened.search("adi").count() == 1
+    finally:
+        reopened.close()
+
+
+def test_recent_window_stays_bounded_and_current(store):
+    first = store.page(28, 10)
+    assert len(store.recent) == 5
+    record = store.add("late", "tarde", 'en', 'es')
+    assert len(store.recent) == 5
+    assert store.page(store.count() - 2, 10) == [first[-1], record]
+    assert [r.original for r in store.iter_records(batch_size=7)][-2:] == ["good morning", "late"]
+
+
+def test_add_many_skips_records_already_stored(store):
+    existing = store.page(0, 1)[0]
+    again = existing._replace(id=None)
+    new = existing._replace(id=None, original="brand new")
+    assert store.add_many([again, new]) == 1
+    assert store.count() == 32
+    assert store.search("brand").count() == 1
+
+
+def test_add_many_keeps_genuine_repeats(store):
+    existing = store.page(0, 1)[0]
+    moments_later = existing._replace(id=None, timestamp=existing.timestamp + 0.5)
+    repeat = existing._replace(id=None, original="twice", timestamp=existing.timestamp + 2)
+    assert store.add_many([moments_later, repeat, repeat]) == 3
+    assert store.search("twice").count() == 2
+
+
+def test_clear_removes_everything(store):
+    store.page(0, 10)
+    store.clear()
+    assert store.count() == 0
+    assert store.page(0, 10) == []
+    assert store.search("hello").count() == 0
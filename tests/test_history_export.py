@@ -0,0 +1,112 @@
+import gzip
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from travelspeak import HistoryStore, TranslationCache, export_history, import_history
+
+RECORDS = [
+    ("Hello, world", "Hola, mundo", 'English', 'Spanish', 1700000000.0),
+    ('Fish & chips <2 "large">', 'Fish & chips <2 "grandes">', 'English', 'Spanish', 1700000060.0),
+    ("Line one\nline two", "Ligne un\nligne deux", 'English', 'French', 1700000120.0),
+    ("ありがとう", "Thank you", 'Japanese', 'English', 1700000180.0),
+]
+
+
+@pytest.fixture
+def store():
+    store = HistoryStore(path=None)
+    for original, translation, source, target, timestamp in RECORDS:
+        store.add(original, translation, source, target, timestamp=timestamp)
+    return store
+
+
+def records(store):
+    return [(r.original, r.translation, r.source_lang, r.target_lang, r.timestamp) for r in store.iter_records()]
+
+
+@pytest.mark.parametrize('name', ['history.jsonl', 'history.csv', 'history.tmx', 'history.jsonl.gz', 'history.tmx.gz'])
+def test_export_import_round_trip(store, tmp_path, name):
+    path = str(tmp_path / name)
+    assert export_history(store, path) == len(RECORDS)
+    assert not (tmp_path / (name + '.tmp')).exists()
+
+    restored = HistoryStore(path=None)
+    counts = import_history(restored, path)
+    assert counts == {'added': len(RECORDS), 'duplicates': 0, 'invalid': 0}
+    assert records(restored) == records(store)
+
+
+def test_tmx_export_is_well_formed_for_any_text(tmp_path):
+    store = HistoryStore(path=None)
+    store.add("Bell\x07 and\r\nbreak", "Glocke", 'Say "hi"', 'German', timestamp=1700000000.25)
+    path = str(tmp_path / 'history.tmx')
+    export_history(store, path)
+    unit = ET.parse(path).getroot().find('body/tu')
+    assert unit.get('srclang') == 'Say "hi"'
+    assert unit.find('tuv/seg').text == "Bell\ufffd and\r\nbreak"
+
+
+def test_tmx_reimport_matches_the_exact_timestamp(tmp_path):
+    store = HistoryStore(path=None)
+    store.add("Thanks", "Danke", 'English', 'German', timestamp=1700000000.25)
+    store.add("Thanks", "Danke", 'English', 'German', timestamp=1700000000.75)
+    path = str(tmp_path / 'history.tmx')
+    export_history(store, path)
+    assert import_history(store, path) == {'added': 0, 'duplicates': 2, 'invalid': 0}
+
+
+def test_compressed_export_is_really_compressed(store, tmp_path):
+    path = tmp_path / 'history.jsonl.gz'
+    export_history(store, str(path))
+    assert b'"original": "Hello, world"' in gzip.decompress(path.read_bytes())
+
+
+def test_reimport_skips_duplicates(store, tmp_path):
+    path = str(tmp_path / 'history.csv')
+    export_history(store, path)
+    assert import_history(store, path, batch_size=2) == {'added': 0, 'duplicates': len(RECORDS), 'invalid': 0}
+    assert store.count() == len(RECORDS)
+
+
+def test_import_fills_the_translation_cache(store, tmp_path):
+    path = str(tmp_path / 'history.jsonl')
+    export_history(store, path)
+    cache = TranslationCache(str(tmp_path / 'cache.db'))
+    import_history(HistoryStore(path=None), path, cache=cache)
+    assert cache.get("Hello, world", 'en', 'es') == "Hola, mundo"
+    assert cache.get("ありがとう", 'ja', 'en') == "Thank you"
+
+
+def test_import_counts_invalid_rows(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    path.write_text(
+        '{"timestamp": "2024-01-01T12:00:00+00:00", "source_lang": "en", "target_lang": "de",'
+        ' "original": "Thanks", "translation": "Danke"}\n'
+        'not json\n'
+        '[1, 2]\n'
+        '{"source_lang": "xx", "target_lang": "de", "original": "a", "translation": "b"}\n'
+        '{"timestamp": "yesterday", "source_lang": "en", "target_lang": "de", "original": "a", "translation": "b"}\n'
+        '\n',
+        encoding='utf-8'
+    )
+    store = HistoryStore(path=None)
+    assert import_history(store, str(path)) == {'added': 1, 'duplicates': 0, 'invalid': 4}
+    record = store.page(0, 1)[0]
+    assert (record.source_lang, record.target_lang) == ('English', 'German')
+    assert record.timestamp == 1704110400.0
+
+
+def test_progress_is_reported(store, tmp_path):
+    path = str(tmp_path / 'history.jsonl')
+    exported = []
+    export_history(store, path, on_progress=lambda done, total: exported.append((done, total)))
+    assert exported[-1] == (len(RECORDS), len(RECORDS))
+    imported = []
+    import_history(HistoryStore(path=None), path, on_progress=lambda done, total: imported.append((done, total)))
+    assert imported[-1][0] == imported[-1][1]
+
+
+def test_rejects_unknown_formats(store, tmp_path):
+    with pytest.raises(ValueError):
+        export_history(store, str(tmp_path / 'history.xlsx'))
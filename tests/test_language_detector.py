@@ -0,0 +1,48 @@
+import pytest
+
+from travelspeak import LanguageDetector
+
+
+@pytest.fixture(scope='module')
+def detector():
+    return LanguageDetector()
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("Where is the train station? I would like to buy a ticket.", 'en'),
+    ("¿Dónde está la estación de tren? Quiero comprar un billete.", 'es'),
+    ("Où est la gare ? Je voudrais acheter un billet.", 'fr'),
+    ("Wo ist der Bahnhof? Ich möchte eine Fahrkarte kaufen.", 'de'),
+])
+def test_detects_latin_languages_from_trigrams(detector, text, expected):
+    language, confidence = detector.detect(text)
+    assert language == expected
+    assert 0 < confidence <= 1
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("Γεια σας", 'el'),
+    ("שלום", 'he'),
+    ("안녕하세요", 'ko'),
+    ("こんにちは、駅はどこですか", 'ja'),
+    ("สวัสดี", 'th'),
+])
+def test_single_language_scripts_are_certain(detector, text, expected):
+    assert detector.detect(text) == (expected, 1.0)
+
+
+def test_tells_simplified_from_traditional_chinese(detector):
+    assert detector.detect("这个东西多少钱")[0] == 'zh'
+    assert detector.detect("這個東西多少錢")[0] == 'zh-tw'
+
+
+def test_no_letters_means_no_guess(detector):
+    assert detector.detect("") == (None, 0.0)
+    assert detector.detect("12345 !!!") == (None, 0.0)
+
+
+def test_restricts_candidates_to_the_given_languages():
+    detector = LanguageDetector(languages=['ru', 'fr'])
+    assert detector.detect("Здравствуйте") == ('ru', 1.0)
+    assert detector.detect("Bonjour, merci beaucoup")[0] == 'fr'
+    assert detector.detect("Γεια σας") == (None, 0.0)
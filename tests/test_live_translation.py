@@ -0,0 +1,98 @@
+import pytest
+
+pytest.importorskip('tkinter')
+
+from travelspeak import LanguageTranslator, TranslationResult
+
+
+class FakeVar:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class FakeText:
+    def __init__(self):
+        self.text = ""
+
+    def config(self, **options):
+        pass
+
+    def compare(self, first, op, second):
+        return (self.text != "") == (op == '!=')
+
+    def insert(self, index, text):
+        self.text += text
+
+    def see(self, index):
+        pass
+
+
+# Collects submitted translations so the test decides when each one finishes
+class FakeTasks:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, channel, fn, text, src, dest, on_success=None, on_error=None):
+        assert channel is None
+        self.submitted.append((text, on_success, on_error))
+
+
+@pytest.fixture
+def app():
+    app = LanguageTranslator.__new__(LanguageTranslator)
+    app.languages = {'English': 'en', 'Spanish': 'es'}
+    app.source_lang_var = FakeVar('English')
+    app.target_lang_var = FakeVar('Spanish')
+    app.status_var = FakeVar('')
+    app.output_text = FakeText()
+    app.tasks = FakeTasks()
+    app.live_memo = {}
+    app.live_seq = 0
+    app.live_next = 0
+    app.live_ready = {}
+    return app
+
+
+def finish(app, index, text):
+    app.tasks.submitted[index][1](TranslationResult(text))
+
+
+def test_segments_appear_in_arrival_order(app):
+    app.translate_segment("good morning")
+    app.translate_segment("where is the station")
+    finish(app, 1, "dónde está la estación")
+    assert app.output_text.text == ""
+    finish(app, 0, "buenos días")
+    assert app.output_text.text == "buenos días dónde está la estación"
+
+
+def test_repeated_segments_are_memoized(app):
+    app.translate_segment("thank you")
+    finish(app, 0, "gracias")
+    app.translate_segment("thank you")
+    assert len(app.tasks.submitted) == 1
+    assert app.output_text.text == "gracias gracias"
+
+
+def test_failed_segment_is_skipped_without_blocking_later_ones(app):
+    app.translate_segment("one")
+    app.translate_segment("two")
+    finish(app, 1, "dos")
+    app.tasks.submitted[0][2](RuntimeError("offline"))
+    assert app.output_text.text == "dos"
+    assert "offline" in app.status_var.get()
+
+
+def test_reset_discards_results_in_flight(app):
+    app.translate_segment("old")
+    app.reset_live_translation()
+    app.translate_segment("new")
+    finish(app, 0, "viejo")
+    finish(app, 1, "nuevo")
+    assert app.output_text.text == "nuevo"
@@ -0,0 +1,107 @@
+import json
+import pstats
+import threading
+
+from travelspeak import Metrics, MetricsDumper, ProfileCapture
+
+
+def test_counters_are_kept_per_label_set():
+    metrics = Metrics()
+    metrics.inc('requests', backend='google')
+    metrics.inc('requests', 2, backend='google')
+    metrics.inc('requests', backend='mymemory')
+    counters = {counter['labels']['backend']: counter['value'] for counter in metrics.snapshot()['counters']}
+    assert counters == {'google': 3, 'mymemory': 1}
+
+
+def test_histogram_buckets_and_quantiles():
+    metrics = Metrics(buckets=(0.01, 0.1, 1.0))
+    for seconds in (0.005, 0.05, 0.05, 0.5, 5.0):
+        metrics.observe('latency', seconds)
+    histogram = metrics.snapshot()['histograms'][0]
+    assert histogram['count'] == 5
+    assert histogram['sum'] == 5.605
+    assert histogram['buckets'] == {'0.01': 1, '0.1': 3, '1.0': 4, '+Inf': 5}
+    assert histogram['p50'] == 0.1
+    assert histogram['p95'] == float('inf')
+
+
+def test_concurrent_updates_are_not_lost():
+    metrics = Metrics()
+
+    def work():
+        for _ in range(1000):
+            metrics.inc('hits')
+            metrics.observe('latency', 0.001)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'][0]['value'] == 8000
+    assert snapshot['histograms'][0]['count'] == 8000
+
+
+def test_timer_and_summary():
+    metrics = Metrics()
+    with metrics.timer('speak', engine='tts'):
+        pass
+    metrics.inc('cache', outcome='hit')
+    lines = metrics.summary()
+    assert lines[0].startswith("speak{engine=tts}: n=1 mean=")
+    assert lines[1] == "cache{outcome=hit}: 1"
+
+
+def test_prometheus_exposition():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.inc('travelspeak_requests_total', backend='google')
+    metrics.observe('travelspeak_seconds', 0.5, backend='google')
+    assert metrics.to_prometheus().splitlines() == [
+        '# TYPE travelspeak_requests_total counter',
+        'travelspeak_requests_total{backend="google"} 1',
+        '# TYPE travelspeak_seconds histogram',
+        'travelspeak_seconds_bucket{backend="google",le="0.1"} 0',
+        'travelspeak_seconds_bucket{backend="google",le="1.0"} 1',
+        'travelspeak_seconds_bucket{backend="google",le="+Inf"} 1',
+        'travelspeak_seconds_sum{backend="google"} 0.5',
+        'travelspeak_seconds_count{backend="google"} 1',
+    ]
+
+
+def test_dump_picks_the_format_from_the_extension(tmp_path):
+    metrics = Metrics()
+    metrics.inc('hits')
+    metrics.dump(str(tmp_path / 'metrics.json'))
+    metrics.dump(str(tmp_path / 'metrics.prom'))
+    assert json.loads((tmp_path / 'metrics.json').read_text())['counters'][0]['name'] == 'hits'
+    assert (tmp_path / 'metrics.prom').read_text() == "# TYPE hits counter\nhits 1\n"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['metrics.json', 'metrics.prom']
+
+
+def test_dumper_writes_a_final_dump_on_stop(tmp_path):
+    metrics = Metrics()
+    path = tmp_path / 'metrics.json'
+    dumper = MetricsDumper(str(path), interval=60, metrics=metrics).start()
+    metrics.inc('hits')
+    dumper.stop()
+    assert json.loads(path.read_text())['counters'][0]['value'] == 1
+
+
+def test_profile_capture_includes_worker_threads(tmp_path):
+    def worker_function():
+        return sum(range(1000))
+
+    capture = ProfileCapture()
+    assert capture.wrap(worker_function) is worker_function
+    capture.start()
+    wrapped = capture.wrap(worker_function)
+    thread = threading.Thread(target=wrapped)
+    thread.start()
+    thread.join()
+    stats_path, memory_path = capture.stop(prefix=str(tmp_path / 'profile'))
+    functions = {name for _, _, name in pstats.Stats(stats_path).stats}
+    assert 'worker_function' in functions
+    with open(memory_path, encoding='utf-8') as f:
+        assert f.readline().startswith("Traced memory:")
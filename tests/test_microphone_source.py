@@ -0,0 +1,57 @@
+import pytest
+
+sr = pytest.importorskip('speech_recognition')
+
+from travelspeak import MicrophoneAudioSource
+
+
+class FakeMicrophone:
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+
+    def __enter__(self):
+        self.opened += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed += 1
+
+
+class FakeRecognizer:
+    def __init__(self, phrases):
+        self.phrases = list(phrases)
+        self.dynamic_energy_threshold = False
+        self.calibrated = []
+
+    def adjust_for_ambient_noise(self, source, duration=1):
+        self.calibrated.append((source, duration))
+
+    def listen(self, source, timeout=None, phrase_time_limit=None):
+        phrase = self.phrases.pop(0)
+        if phrase is None:
+            raise sr.WaitTimeoutError("listening timed out")
+        return phrase
+
+
+def test_device_is_opened_once_per_session():
+    microphone = FakeMicrophone()
+    recognizer = FakeRecognizer(["one", None, "two"])
+    source = MicrophoneAudioSource(recognizer, microphone)
+    assert recognizer.dynamic_energy_threshold
+    source.calibrate(duration=0.5)
+    assert [source.read() for _ in range(3)] == ["one", None, "two"]
+    assert microphone.opened == 1
+    assert recognizer.calibrated == [(microphone, 0.5)]
+    source.close()
+    source.close()
+    assert microphone.closed == 1
+
+
+def test_reopens_after_close():
+    microphone = FakeMicrophone()
+    source = MicrophoneAudioSource(FakeRecognizer(["a", "b"]), microphone)
+    source.read()
+    source.close()
+    source.read()
+    assert (microphone.opened, microphone.closed) == (2, 1)
@@ -0,0 +1,87 @@
+import unicodedata
+
+import pytest
+
+from travelspeak import FallbackTranslator, Phrasebook, compile_phrasebook, phrase_key
+
+ROWS = [
+    {'en': "Good morning", 'es': "Buenos días", 'fr': "Bonjour"},
+    {'en': "Good", 'es': "Bueno"},
+    {'en': "Where is the station?", 'es': "¿Dónde está la estación?", 'fr': ""},
+    {'en': "thank you", 'es': "gracias", 'ja': "ありがとう"},
+]
+
+
+@pytest.fixture
+def book():
+    return Phrasebook(data=Phrasebook.compile(ROWS))
+
+
+def test_phrase_key_normalizes_case_punctuation_and_apostrophes():
+    assert phrase_key("  Where IS the station?! ") == "where is the station"
+    assert phrase_key("Don’t") == phrase_key("don't")
+    assert phrase_key("ありがとう") == "あ り が と う"
+
+
+def test_compile_indexes_every_language(book):
+    assert sorted(book.languages) == ['en', 'es', 'fr', 'ja']
+    assert book.concept_count == len(ROWS)
+    assert book.max_tokens == 5
+
+
+def test_longest_match_prefers_the_longer_phrase(book):
+    tokens = phrase_key("good morning friends").split()
+    length, concept = book.longest_match(tokens, 0, 'en')
+    assert length == 2
+    assert book.phrase(concept, 'es') == "Buenos días"
+    length, concept = book.longest_match(tokens, 1, 'en')
+    assert (length, concept) == (0, None)
+    length, concept = book.longest_match(["good", "night"], 0, 'en')
+    assert length == 1 and book.phrase(concept, 'es') == "Bueno"
+
+
+def test_missing_phrases_and_languages(book):
+    tokens = phrase_key("where is the station").split()
+    length, concept = book.longest_match(tokens, 0, 'en')
+    assert length == 4
+    assert book.phrase(concept, 'fr') is None
+    assert book.phrase(concept, 'de') is None
+    assert book.longest_match(tokens, 0, 'de') == (0, None)
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        Phrasebook(data=b'XXXX' + bytes(Phrasebook.HEADER.size))
+
+
+def test_compiled_file_is_memory_mapped(tmp_path):
+    source = tmp_path / 'phrases.csv'
+    source.write_text("en,de\nthank you,danke\nhow much,wie viel\n", encoding='utf-8')
+    output = tmp_path / 'phrases.tspk'
+    assert compile_phrasebook(str(source), str(output)) == 2
+    book = Phrasebook(str(output))
+    try:
+        length, concept = book.longest_match(["how", "much"], 0, 'en')
+        assert length == 2 and book.phrase(concept, 'de') == "wie viel"
+    finally:
+        book.close()
+
+
+def test_fallback_translates_known_phrases_inside_a_sentence(tmp_path):
+    translator = FallbackTranslator(phrasebook_path=str(tmp_path / 'missing.tspk'))
+    assert translator.translate("Hello, water please", 'en', 'es') == "Hola, agua por favor"
+    assert translator.translate("Thank you!", 'auto', 'fr') == "Merci!"
+    assert translator.translate("spaceship", 'en', 'es') == "[Translation not available] spaceship"
+    assert translator.translate_batch(["yes", " "], 'en', 'de') == ["ja", " "]
+
+
+def test_fallback_keeps_decomposed_input_intact(tmp_path):
+    source = tmp_path / 'phrases.csv'
+    source.write_text("fr,en\noù est la gare,where is the station\n", encoding='utf-8')
+    compile_phrasebook(str(source), str(tmp_path / 'phrases.tspk'))
+    translator = FallbackTranslator(phrasebook_path=str(tmp_path / 'phrases.tspk'))
+    try:
+        text = unicodedata.normalize('NFD', "Café où est la gare?")
+        assert translator.translate(text, 'fr', 'en') == "Café where is the station?"
+    finally:
+        translator.phrasebooks[0].close()
@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+
+from travelspeak import RequestScheduler, TokenBucket, is_retryable_error
+
+
+class TooManyRequests(Exception):
+    pass
+
+
+def test_identical_concurrent_requests_share_one_call():
+    scheduler = RequestScheduler(rate=100, burst=100)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "hola"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(scheduler.call('key', slow)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(scheduler.call('key', slow)))
+                 for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    while scheduler.stats()['coalesced'] < 4:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert results == ["hola"] * 5
+    assert len(calls) == 1
+    assert scheduler.stats()['requests'] == 5
+
+
+def test_followers_receive_the_leaders_error():
+    scheduler = RequestScheduler(rate=100, burst=100, max_retries=0)
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("bad language")
+
+    errors = []
+
+    def call():
+        try:
+            scheduler.call('key', failing)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    while scheduler.stats()['coalesced'] < 1:
+        threading.Event().wait(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert len(errors) == 2 and errors[0] is errors[1]
+    # The finished flight is forgotten, so the next call runs again
+    assert scheduler.call('key', lambda: "ok") == "ok"
+
+
+def test_retries_retryable_errors_then_succeeds():
+    scheduler = RequestScheduler(rate=100, burst=100, max_retries=3, base_delay=0)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TooManyRequests()
+        return "done"
+
+    assert scheduler.call('key', flaky) == "done"
+    assert len(attempts) == 3
+    assert scheduler.stats()['retries'] == 2
+    assert scheduler.stats()['failures'] == 0
+
+
+def test_gives_up_after_max_retries():
+    scheduler = RequestScheduler(rate=100, burst=100, max_retries=2, base_delay=0)
+    attempts = []
+
+    def down():
+        attempts.append(1)
+        raise ConnectionError("refused")
+
+    with pytest.raises(ConnectionError):
+        scheduler.call('key', down)
+    assert len(attempts) == 3
+    assert scheduler.stats()['failures'] == 1
+
+
+def test_does_not_retry_other_errors():
+    scheduler = RequestScheduler(rate=100, burst=100, base_delay=0)
+    attempts = []
+
+    def invalid():
+        attempts.append(1)
+        raise ValueError("unsupported language")
+
+    with pytest.raises(ValueError):
+        scheduler.call('key', invalid)
+    assert len(attempts) == 1
+    assert not is_retryable_error(ValueError())
+    assert is_retryable_error(TimeoutError()) and is_retryable_error(TooManyRequests())
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.02)
@@ -0,0 +1,85 @@
+import wave
+from collections import OrderedDict
+
+import pytest
+
+sr = pytest.importorskip('speech_recognition')
+
+from travelspeak import (RECOGNITION_SAMPLE_RATE, AudioFileSource, SpeechEngines, speech_model_language,
+                         stream_recognition, write_wav_fixture)
+
+
+# Streaming session that keeps every byte it is fed and ends an utterance every four blocks
+class RecordingSession:
+    def __init__(self):
+        self.data = bytearray()
+        self.blocks = 0
+
+    def feed(self, data):
+        self.data.extend(data)
+        self.blocks += 1
+        if self.blocks % 4 == 0:
+            return None, f"utterance {self.blocks // 4}"
+        return f"partial {self.blocks}", None
+
+    def finish(self):
+        return "tail" if self.blocks % 4 else None
+
+
+class FakeEngine:
+    def __init__(self, name, offline, languages=None):
+        self.name = name
+        self.offline = offline
+        self.paths = dict.fromkeys(languages or ())
+
+    def supports(self, language):
+        return not self.offline or language in self.paths
+
+
+def test_stream_recognition_receives_all_pcm(tmp_path):
+    path = write_wav_fixture(str(tmp_path / 'fixture.wav'), seconds=20)
+    with wave.open(path) as wav:
+        expected = wav.readframes(wav.getnframes())
+
+    session = RecordingSession()
+    partials, finals = [], []
+    source = AudioFileSource(path, sr.Recognizer(), chunk_seconds=0.5)
+    try:
+        count = stream_recognition(session, source.read_raw, lambda: True, partials.append, finals.append)
+    finally:
+        source.close()
+
+    assert source.sample_rate == RECOGNITION_SAMPLE_RATE
+    assert bytes(session.data) == expected
+    assert count == len(finals) == 10
+    assert partials[:3] == ["partial 1", "partial 2", "partial 3"]
+
+
+def test_stream_recognition_stops_when_asked():
+    session = RecordingSession()
+    remaining = iter([True, True, False])
+    stream_recognition(session, lambda: b'\0\0' * 160, lambda: next(remaining), lambda text: None,
+                       lambda text: None)
+    assert session.blocks == 2
+
+
+def test_auto_prefers_an_offline_model_for_the_language():
+    engines = SpeechEngines()
+    engines.engines = OrderedDict([('vosk', FakeEngine('vosk', True, ['es'])),
+                                   ('google', FakeEngine('google', False))])
+    assert engines.select('es').name == 'vosk'
+    assert engines.select('fr').name == 'google'
+    assert engines.select('fr', 'offline') is None
+    assert engines.select('es', 'google').name == 'google'
+    assert engines.offline_languages() == {'es'}
+
+
+@pytest.mark.parametrize('name, code', [
+    ('vosk-model-small-en-us-0.15', 'en'),
+    ('vosk-model-small-cn-0.22', 'zh'),
+    ('vosk-model-ar-mgb2-0.4', 'ar'),
+    ('fr-FR', 'fr'),
+    ('zh-TW', 'zh-tw'),
+])
+def test_model_directory_language(name, code):
+    assert speech_model_language(name) == code
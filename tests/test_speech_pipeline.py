@@ -0,0 +1,69 @@
+import hashlib
+import math
+import time
+import wave
+from array import array
+
+import pytest
+
+sr = pytest.importorskip('speech_recognition')
+
+from travelspeak import AudioFileSource, SpeechPipeline
+
+
+def write_wav_fixture(path, seconds, rate=16000):
+    # A rising tone, so no two chunks of the file are alike
+    samples = array('h', (int(8000 * math.sin(2 * math.pi * (200 + n / 400) * n / rate))
+                          for n in range(seconds * rate)))
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return path
+
+
+def wav_seconds(path):
+    with wave.open(path) as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+@pytest.mark.parametrize('chunk_seconds', [5, 1, 0.5, 0.3])
+def test_file_source_delivers_the_whole_file(tmp_path, chunk_seconds):
+    path = write_wav_fixture(str(tmp_path / 'fixture.wav'), seconds=20)
+    source = AudioFileSource(path, sr.Recognizer(), chunk_seconds=chunk_seconds)
+    delivered = 0.0
+    try:
+        while True:
+            try:
+                audio = source.read()
+            except EOFError:
+                break
+            delivered += len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+    finally:
+        source.close()
+    assert delivered == pytest.approx(wav_seconds(path))
+
+
+def test_pipeline_delivers_results_in_capture_order(tmp_path):
+    path = write_wav_fixture(str(tmp_path / 'fixture.wav'), seconds=6)
+    source = AudioFileSource(path, sr.Recognizer(), chunk_seconds=0.7)
+    expected = []
+    try:
+        while True:
+            expected.append(hashlib.sha1(source.read().frame_data).hexdigest())
+    except EOFError:
+        source.close()
+
+    def recognize(audio):
+        # Early chunks finish last, so the pipeline has to reorder them
+        digest = hashlib.sha1(audio.frame_data).hexdigest()
+        time.sleep(0.05 * (len(expected) - expected.index(digest)) / len(expected))
+        return digest
+
+    results = []
+    pipeline = SpeechPipeline(AudioFileSource(path, sr.Recognizer(), chunk_seconds=0.7), recognize,
+                              on_result=results.append, workers=4)
+    pipeline.run(lambda: True)
+    assert pipeline.error is None
+    assert results == expected
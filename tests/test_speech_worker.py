@@ -0,0 +1,150 @@
+import os
+import threading
+
+import pytest
+
+import travelspeak
+from travelspeak import SpeechWorker
+
+
+# pyttsx3-like engine that records what it was asked to do
+class FakeEngine:
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.spoken = []
+        self.saved = []
+        self.pending = None
+        self.properties = {'voice': 'test', 'rate': 150}
+
+    def connect(self, name, callback):
+        pass
+
+    def getProperty(self, name):
+        return self.properties[name]
+
+    def say(self, text):
+        if text == "fail":
+            raise RuntimeError("no audio device")
+        self.pending = ('say', text)
+
+    def save_to_file(self, text, path):
+        self.pending = ('save', text, path)
+
+    def runAndWait(self):
+        if self.gate is not None:
+            self.gate.wait(5)
+        kind, text, *path = self.pending
+        if kind == 'say':
+            self.spoken.append(text)
+        else:
+            self.saved.append(text)
+            with open(path[0], 'wb') as f:
+                f.write(b'RIFF')
+
+    def stop(self):
+        pass
+
+
+def run_until_idle(worker, idle):
+    assert idle.wait(5)
+    worker.stop()
+    worker.thread.join(5)
+
+
+def test_utterances_follow_priority_then_order():
+    gate = threading.Event()
+    engine = FakeEngine(gate)
+    idle = threading.Event()
+    worker = SpeechWorker(engine, on_idle=idle.set)
+    worker.say("first")
+    while engine.pending is None:
+        threading.Event().wait(0.01)
+    worker.say("low", priority=SpeechWorker.PRIORITY_LOW)
+    worker.say("normal")
+    worker.say("urgent", priority=SpeechWorker.PRIORITY_HIGH)
+    gate.set()
+    run_until_idle(worker, idle)
+    assert engine.spoken == ["first", "urgent", "normal", "low"]
+
+
+def test_interrupt_drops_queued_utterances():
+    gate = threading.Event()
+    engine = FakeEngine(gate)
+    idle = threading.Event()
+    worker = SpeechWorker(engine, on_idle=idle.set)
+    worker.say("long reading")
+    while engine.pending is None:
+        threading.Event().wait(0.01)
+    worker.say("stale")
+    worker.say("answer", interrupt=True)
+    gate.set()
+    run_until_idle(worker, idle)
+    assert engine.spoken == ["long reading", "answer"]
+
+
+def test_errors_are_reported_and_the_worker_keeps_going():
+    errors = []
+    idle = threading.Event()
+    engine = FakeEngine()
+    worker = SpeechWorker(engine, on_idle=idle.set, on_error=errors.append)
+    worker.say("fail")
+    worker.say("hello")
+    run_until_idle(worker, idle)
+    assert [str(e) for e in errors] == ["no audio device"]
+    assert engine.spoken == ["hello"]
+
+
+def test_spoken_text_is_cached_and_replayed(tmp_path, monkeypatch):
+    monkeypatch.setattr(travelspeak, 'find_audio_player', lambda: ['true'])
+    engine = FakeEngine()
+    worker = SpeechWorker(engine, cache_dir=str(tmp_path))
+    try:
+        worker.say("hello")
+        worker.presynthesize("goodbye")
+        worker.presynthesize("x" * 500)
+        while len(engine.saved) < 2:
+            threading.Event().wait(0.01)
+        idle = threading.Event()
+        worker.on_idle = idle.set
+        worker.say("goodbye")
+        assert idle.wait(5)
+    finally:
+        worker.stop()
+        worker.thread.join(5)
+    assert engine.spoken == ["hello"]
+    assert sorted(engine.saved) == ["goodbye", "hello"]
+    assert worker.cache_hits == 1
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(worker.cache_path(text))
+                                                  for text in ("hello", "goodbye"))
+
+
+def test_cache_keeps_the_newest_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(travelspeak, 'find_audio_player', lambda: ['true'])
+    worker = SpeechWorker(FakeEngine(), cache_dir=str(tmp_path), max_cache_files=2)
+    worker.stop()
+    worker.thread.join(5)
+    for age, name in enumerate(['newest', 'middle', 'oldest']):
+        path = tmp_path / (name + worker.extension)
+        path.write_bytes(b'RIFF')
+        os.utime(path, (1000 - age, 1000 - age))
+    (tmp_path / ('partial.tmp' + worker.extension)).write_bytes(b'')
+    worker._evict()
+    assert sorted(os.listdir(tmp_path)) == sorted(['middle' + worker.extension, 'newest' + worker.extension,
+                                                   'partial.tmp' + worker.extension])
+
+
+def test_replaying_a_cached_file_keeps_it_from_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr(travelspeak, 'find_audio_player', lambda: ['true'])
+    worker = SpeechWorker(FakeEngine(), cache_dir=str(tmp_path), max_cache_files=1)
+    worker.stop()
+    worker.thread.join(5)
+    replayed = worker.cache_path("hello")
+    with open(replayed, 'wb') as f:
+        f.write(b'RIFF')
+    os.utime(replayed, (1000, 1000))
+    other = tmp_path / ('other' + worker.extension)
+    other.write_bytes(b'RIFF')
+    os.utime(other, (2000, 2000))
+    worker._speak("hello")
+    worker._evict()
+    assert os.listdir(tmp_path) == [os.path.basename(replayed)]
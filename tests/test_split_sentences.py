@@ -0,0 +1,104 @@
+import threading
+
+from travelspeak import TranslationResult, split_sentences, translate_document
+
+
+def sentences(text, **kwargs):
+    return [segment.text for segment in split_sentences(text, **kwargs) if segment.translate]
+
+
+def test_segments_join_back_into_the_text():
+    texts = [
+        "Hello there. How are you?  Fine!\n\nNew paragraph… ok",
+        "  leading and trailing  \n",
+        "\"Quoted.\" (Bracketed!) Done",
+        "",
+        "\n\n",
+    ]
+    for text in texts:
+        assert "".join(segment.text for segment in split_sentences(text)) == text
+
+
+def test_splits_at_terminal_punctuation():
+    assert sentences("Hello there. How are you?  Fine!") == ["Hello there.", "How are you?", "Fine!"]
+    assert sentences('He said "stop." Then left.') == ['He said "stop."', "Then left."]
+    assert sentences("Version 2.5 is out") == ["Version 2.5 is out"]
+
+
+def test_splits_at_line_breaks_and_cjk_stops():
+    assert sentences("first line\nsecond line") == ["first line", "second line"]
+    assert sentences("你好。谢谢！再见") == ["你好。", "谢谢！", "再见"]
+
+
+def test_whitespace_is_not_translated():
+    segments = split_sentences("One.  Two.\n")
+    assert [segment.translate for segment in segments] == [True, False, True, False]
+    assert segments[1].text == "  "
+
+
+def test_long_sentences_are_cut_at_word_boundaries():
+    text = "word " * 30 + "end."
+    pieces = sentences(text, max_chars=40)
+    assert all(len(piece) <= 40 for piece in pieces)
+    assert " ".join(pieces) == text
+    assert "".join(segment.text for segment in split_sentences(text, max_chars=40)) == text
+
+
+def test_unbroken_text_is_cut_at_max_chars():
+    assert sentences("x" * 25, max_chars=10) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+class UpperTranslator:
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def max_chars(self):
+        return 4500
+
+    def translate(self, text, src, dest):
+        return TranslationResult(self.translate_batch([text], src, dest)[0][0], backend='fake')
+
+    def translate_batch(self, texts, src, dest, with_backend=False):
+        with self.lock:
+            self.sent.extend(texts)
+        return [text.upper() for text in texts], 'fake'
+
+
+def test_translate_document_keeps_layout_and_sends_repeats_once():
+    translator = UpperTranslator()
+    text = "Hi. Bye.\n\nHi. See you!"
+    result = translate_document(translator, text, 'en', 'fr', chunk_chars=5)
+    assert result.text == "HI. BYE.\n\nHI. SEE YOU!"
+    assert sorted(translator.sent) == ["Bye.", "Hi.", "See you!"]
+    assert result.backend == 'fake'
+
+
+def test_translate_document_skips_memoized_sentences():
+    translator = UpperTranslator()
+    result = translate_document(translator, "Hi. Bye.", 'en', 'fr', memo={"Hi.": "Salut."})
+    assert result.text == "Salut. BYE."
+    assert translator.sent == ["Bye."]
+
+
+class ThreadRecordingTranslator(UpperTranslator):
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def translate_batch(self, texts, src, dest, with_backend=False):
+        self.threads.add(threading.current_thread().name)
+        return super().translate_batch(texts, src, dest, with_backend)
+
+
+def test_translate_document_runs_chunks_on_the_shared_pool():
+    translator = ThreadRecordingTranslator()
+    translate_document(translator, "Hi. Bye. See you!", 'en', 'fr', chunk_chars=5)
+    assert translator.threads
+    assert all(name.startswith('travelspeak-document') for name in translator.threads)
+
+
+def test_translate_document_runs_a_lone_chunk_on_the_calling_thread():
+    translator = ThreadRecordingTranslator()
+    assert translate_document(translator, "Hi. Bye.", 'en', 'fr').text == "HI. BYE."
+    assert translator.threads == {threading.current_thread().name}
@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import travelspeak
+from travelspeak import LazyModule, StartupTimer, module_available
+
+HEAVY_MODULES = ['speech_recognition', 'pyttsx3', 'deep_translator', 'vosk', 'pocketsphinx', 'numpy', 'zstandard']
+
+
+def test_importing_travelspeak_leaves_backends_unloaded():
+    code = ("import sys, json, travelspeak; "
+            f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(travelspeak.__file__))).stdout
+    assert json.loads(output.splitlines()[-1]) == []
+
+
+def test_lazy_module_imports_on_first_attribute():
+    proxy = LazyModule('colorsys')
+    assert proxy._module is None
+    assert proxy.rgb_to_hsv(1, 0, 0) == (0.0, 1.0, 1)
+    assert proxy._module is not None
+
+
+def test_module_available_does_not_import():
+    assert module_available('json')
+    assert not module_available('travelspeak_missing_module')
+    assert not module_available('travelspeak_missing_package.sub')
+
+
+def test_startup_timer_measures_and_reports(tmp_path, capsys):
+    timer = StartupTimer()
+    with timer.measure('gui'):
+        time.sleep(0.01)
+    timer.mark('window')
+    assert timer.timings['gui'] >= 0.01
+    assert timer.timings['window'] >= timer.timings['gui']
+
+    path = tmp_path / 'startup.jsonl'
+    timer.report(str(path))
+    timer.report(str(path))
+    assert "Startup (ms): gui=" in capsys.readouterr().err
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 2
+    assert list(json.loads(lines[0])['timings_ms']) == ['gui', 'window']
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+
+import pytest
+
+import travelspeak
+from travelspeak import detect_file_format, iter_chunks, main, translate_file
+
+
+class TaggingTranslator:
+    def __init__(self):
+        self.batches = []
+
+    def translate_batch(self, texts, src='auto', dest='en'):
+        self.batches.append(list(texts))
+        return [f"[{dest}] {text}" if text.strip() else text for text in texts]
+
+
+def test_detect_file_format():
+    assert detect_file_format('in.JSONL') == 'jsonl'
+    assert detect_file_format('in.ndjson') == 'jsonl'
+    assert detect_file_format('in.csv') == 'csv'
+    assert detect_file_format('in.txt') == 'text'
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(iter_chunks([], 3)) == []
+
+
+def test_text_lines_are_translated_in_order_and_batches():
+    translator = TaggingTranslator()
+    output = io.StringIO()
+    progress = []
+    count = translate_file(translator, io.StringIO("one\ntwo\n\nthree\r\n"), output, 'en', 'fr',
+                           batch_size=2, progress=progress.append)
+    assert count == 4
+    assert output.getvalue() == "[fr] one\n[fr] two\n\n[fr] three\n"
+    assert translator.batches == [["one", "two"], ["", "three"]]
+    assert progress == [2, 4]
+
+
+def test_jsonl_keeps_other_fields():
+    source = '{"id": 1, "text": "hello"}\n\n{"id": 2, "body": "ignored"}\n'
+    output = io.StringIO()
+    count = translate_file(TaggingTranslator(), io.StringIO(source), output, 'en', 'de', file_format='jsonl')
+    assert count == 2
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert records == [{'id': 1, 'text': "hello", 'translation': "[de] hello"},
+                       {'id': 2, 'body': "ignored", 'translation': ""}]
+
+
+@pytest.mark.parametrize('line, message', [
+    ('{"text": "broken"', "line 2: invalid JSON"),
+    ('["not", "an", "object"]', "line 2: expected a JSON object, got list"),
+])
+def test_jsonl_names_the_bad_line(line, message):
+    source = '{"text": "fine"}\n' + line + '\n'
+    with pytest.raises(ValueError, match=message):
+        translate_file(TaggingTranslator(), io.StringIO(source), io.StringIO(), 'en', 'de', file_format='jsonl')
+
+
+def test_csv_adds_a_translation_column():
+    source = 'id,text\n1,"Hello, world"\n2,"multi\nline"\n'
+    output = io.StringIO()
+    translate_file(TaggingTranslator(), io.StringIO(source, newline=''), output, 'en', 'es', file_format='csv')
+    rows = list(csv.DictReader(io.StringIO(output.getvalue(), newline='')))
+    assert [row['translation'] for row in rows] == ["[es] Hello, world", "[es] multi\nline"]
+    assert rows[0]['id'] == '1'
+
+
+def test_csv_without_the_field_is_rejected():
+    with pytest.raises(ValueError, match="no 'text' column"):
+        translate_file(TaggingTranslator(), io.StringIO("id,body\n1,x\n"), io.StringIO(), 'en', 'es',
+                       file_format='csv')
+
+
+def test_translate_file_command_against_the_stub(tmp_path, capsys):
+    pytest.importorskip('deep_translator')
+    source = tmp_path / 'in.txt'
+    source.write_text("Good morning\nSee you later\n", encoding='utf-8')
+    target = tmp_path / 'out.txt'
+    assert main(['translate-file', str(source), '-o', str(target), '--src', 'en', '--dest', 'fr', '--stub']) == 0
+    assert target.read_text(encoding='utf-8') == "[fr] Good morning\n[fr] See you later\n"
+    assert "Translated 2 lines" in capsys.readouterr().err
+
+
+def test_translate_file_command_reports_bad_jsonl(tmp_path, capsys, monkeypatch):
+    pytest.importorskip('deep_translator')
+    closed = []
+    close = travelspeak.TranslatorRouter.close
+    monkeypatch.setattr(travelspeak.TranslatorRouter, 'close', lambda self: (closed.append(self), close(self)))
+    source = tmp_path / 'in.jsonl'
+    source.write_text('{"text": "hello"}\n\n42\n', encoding='utf-8')
+    assert main(['translate-file', str(source), '-o', str(tmp_path / 'out.jsonl'),
+                 '--src', 'en', '--dest', 'fr', '--stub']) == 1
+    assert "line 3: expected a JSON object, got int" in capsys.readouterr().err
+    assert closed
@@ -0,0 +1,76 @@
+import sqlite3
+
+from travelspeak import TranslationCache
+
+
+def test_memory_tier_round_trip():
+    cache = TranslationCache(path=None)
+    cache.put("Hello  World", 'en', 'es', "Hola mundo")
+    assert cache.get("Hello World", 'en', 'es') == "Hola mundo"
+    assert cache.get("Hello World", 'en', 'fr') is None
+    assert cache.stats()['hits'] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = TranslationCache(path)
+    cache.put("Good morning", 'en', 'de', "Guten Morgen")
+    cache.close()
+
+    reopened = TranslationCache(path)
+    assert reopened.get("Good morning", 'en', 'de') == "Guten Morgen"
+    assert reopened.stats()['disk_hits'] == 1
+    reopened.close()
+
+
+def test_disk_hits_batch_access_times_until_the_next_write(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = TranslationCache(path)
+    cache.put_many([("old", 'en', 'fr', "vieux"), ("new", 'en', 'fr', "neuf")])
+    reader = sqlite3.connect(path)
+    accessed = lambda text: reader.execute("SELECT accessed FROM translations WHERE text = ?", (text,)).fetchone()[0]
+    written = accessed("old")
+
+    assert cache.get("old", 'en', 'fr') == "vieux"
+    assert accessed("old") == written
+    cache.put("other", 'en', 'fr', "autre")
+    assert accessed("old") > written
+
+    cache.get("new", 'en', 'fr')
+    cache.close()
+    assert accessed("new") > written
+    reader.close()
+
+
+def test_prune_keeps_the_most_recently_read_entries(tmp_path):
+    cache = TranslationCache(str(tmp_path / 'cache.db'), memory_size=0, max_entries=1)
+    cache.put_many([("read", 'en', 'fr', "lu"), ("unread", 'en', 'fr', "pas lu")])
+    cache.get("read", 'en', 'fr')
+    cache.prune()
+    assert cache.get("read", 'en', 'fr') == "lu"
+    assert cache.get("unread", 'en', 'fr') is None
+    cache.close()
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = TranslationCache(str(tmp_path / 'cache.db'), ttl=-1)
+    cache.put("Thanks", 'en', 'it', "Grazie")
+    assert cache.get("Thanks", 'en', 'it') is None
+    cache.close()
+
+
+def test_put_many_writes_disk_tier(tmp_path):
+    cache = TranslationCache(str(tmp_path / 'cache.db'))
+    assert cache.put_many([("one", 'en', 'fr', "un"), ("two", 'en', 'fr', "deux")]) == 2
+    assert cache.get("two", 'en', 'fr') == "deux"
+    cache.close()
+
+
+def test_errors_are_reported_on_stderr_not_stdout(tmp_path, capsys):
+    # A directory can't be opened as a database
+    cache = TranslationCache(str(tmp_path))
+    cache.put("Hello", 'en', 'es', "Hola")
+    assert cache.get("Hello", 'en', 'es') == "Hola"
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "Translation cache unavailable" in captured.err
@@ -0,0 +1,45 @@
+from travelspeak import TranslationMemory
+
+DIRECTIONS = ("Please turn left at the second traffic light after the big church on the main street",
+              "Bitte biegen Sie an der zweiten Ampel nach der großen Kirche an der Hauptstraße links ab")
+
+
+def memory_with(text, translation, threshold=0.9):
+    memory = TranslationMemory(threshold=threshold)
+    memory.add(text, translation, 'en', 'de')
+    return memory
+
+
+def test_changed_direction_is_not_reused():
+    memory = memory_with(*DIRECTIONS, threshold=0.8)
+    assert memory.lookup(DIRECTIONS[0].replace("left", "right"), 'en', 'de') is None
+
+
+def test_added_negation_is_not_reused():
+    memory = memory_with(*DIRECTIONS, threshold=0.8)
+    assert memory.lookup(DIRECTIONS[0].replace("Please turn", "Please do not turn"), 'en', 'de') is None
+
+
+def test_case_and_punctuation_differences_reuse_translation():
+    memory = memory_with(*DIRECTIONS)
+    match = memory.lookup("please turn left at the second traffic light after the big church on the main street!",
+                          'en', 'de')
+    assert match is not None
+    assert match.translation == DIRECTIONS[1]
+
+
+def test_numbers_are_substituted():
+    memory = memory_with("Your flight leaves from gate 12 at 14:30", "Ihr Flug geht um 14:30 von Gate 12", 0.8)
+    match = memory.lookup("Your flight leaves from gate 15 at 14:30", 'en', 'de')
+    assert match is not None
+    assert match.translation == "Ihr Flug geht um 14:30 von Gate 15"
+
+
+def test_placeholder_replaced_by_ordinary_word_is_not_reused():
+    memory = memory_with("Your flight leaves from gate 12 today", "Ihr Flug geht heute von Gate 12", 0.5)
+    assert memory.lookup("Your flight leaves from gate twelve today", 'en', 'de') is None
+
+
+def test_other_language_pair_is_not_matched():
+    memory = memory_with(*DIRECTIONS)
+    assert memory.lookup(DIRECTIONS[0], 'en', 'fr') is None
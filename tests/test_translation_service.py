@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+import pytest
+
+from travelspeak import TranslationResult, TranslationService, TranslatorRouter
+
+
+class EchoBackend:
+    def translate(self, text, src='auto', dest='en'):
+        if text == "explode":
+            raise ConnectionError("backend down")
+        return TranslationResult(f"[{dest}] {text}")
+
+    def translate_batch(self, texts, src='auto', dest='en'):
+        return [self.translate(text, src, dest).text for text in texts]
+
+
+async def request(reader, writer, method, path, payload=None, raw=None, headers=""):
+    body = raw if raw is not None else (json.dumps(payload).encode('utf-8') if payload is not None else b'')
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n{headers}\r\n"
+                 .encode('latin-1') + body)
+    return await read_response(reader, writer)
+
+
+async def read_response(reader, writer):
+    await writer.drain()
+    status_line = await reader.readline()
+    response_headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        response_headers[name.strip().lower()] = value.strip()
+    data = await reader.readexactly(int(response_headers['content-length']))
+    return int(status_line.split()[1]), response_headers, json.loads(data)
+
+
+def serve(test):
+    """Run test(service, reader, writer) against a service on a free port"""
+    async def main():
+        router = TranslatorRouter(hedge=False)
+        router.register('echo', EchoBackend())
+        service = await TranslationService(router, port=0, max_body=4096, max_batch=3).start()
+        reader, writer = await asyncio.open_connection('127.0.0.1', service.port)
+        try:
+            await test(service, reader, writer)
+        finally:
+            writer.close()
+            await service.shutdown(grace=1)
+            router.close()
+    asyncio.run(main())
+
+
+def test_translate_endpoints_share_a_keep_alive_connection():
+    async def test(service, reader, writer):
+        status, headers, body = await request(reader, writer, 'POST', '/translate',
+                                              {'text': "Hi. Bye.", 'src': 'en', 'dest': 'fr'})
+        assert status == 200
+        assert headers['connection'] == 'keep-alive'
+        assert body == {'translation': "[fr] Hi. [fr] Bye.", 'backend': 'echo', 'src': 'en', 'dest': 'fr'}
+
+        status, _, body = await request(reader, writer, 'POST', '/translate/batch',
+                                        {'texts': ["a", "b"], 'src': 'en', 'dest': 'de'})
+        assert (status, body['translations']) == (200, ["[de] a", "[de] b"])
+
+        status, _, body = await request(reader, writer, 'POST', '/translate/multi',
+                                        {'text': "hello", 'src': 'en', 'dests': ['es', 'it']})
+        assert status == 200
+        assert body['translations'] == {'es': {'translation': "[es] hello", 'backend': 'echo'},
+                                        'it': {'translation': "[it] hello", 'backend': 'echo'}}
+
+        status, _, body = await request(reader, writer, 'GET', '/health')
+        assert (status, body['requests']) == (200, 4)
+    serve(test)
+
+
+@pytest.mark.parametrize('method, path, payload, raw, expected', [
+    ('GET', '/nowhere', None, None, 404),
+    ('GET', '/translate', None, None, 405),
+    ('POST', '/translate', None, b'{not json', 400),
+    ('POST', '/translate', None, b'[1, 2]', 400),
+    ('POST', '/translate', {'text': 5, 'dest': 'fr'}, None, 400),
+    ('POST', '/translate', {'text': "hi", 'dest': 'xx'}, None, 400),
+    ('POST', '/translate/batch', {'texts': ["a", "b", "c", "d"], 'dest': 'fr'}, None, 413),
+    ('POST', '/translate', {'text': "explode", 'src': 'en', 'dest': 'fr'}, None, 502),
+])
+def test_bad_requests_get_json_errors(method, path, payload, raw, expected):
+    async def test(service, reader, writer):
+        status, _, body = await request(reader, writer, method, path, payload, raw)
+        assert status == expected
+        assert body['error']
+        # The connection stays usable after an application error
+        status, _, _ = await request(reader, writer, 'GET', '/languages')
+        assert status == 200
+    serve(test)
+
+
+def test_oversized_body_is_rejected_and_the_connection_closed():
+    async def test(service, reader, writer):
+        status, headers, body = await request(reader, writer, 'POST', '/translate', raw=b'x' * 5000)
+        assert status == 413
+        assert headers['connection'] == 'close'
+        assert await reader.read() == b''
+    serve(test)
+
+
+@pytest.mark.parametrize('head, expected', [
+    (b"POST /translate HTTP/1.1\r\nContent-Length: -5\r\n\r\n", 400),
+    (b"GET /health HTTP/1.1\r\nX-Padding: " + b"x" * 70000 + b"\r\n\r\n", 431),
+    (b"GET /" + b"x" * 70000 + b" HTTP/1.1\r\n\r\n", 400),
+    (b"GET /health HTTP/1.1\r\n" + b"X-Header: 1\r\n" * 101 + b"\r\n", 431),
+], ids=['negative-length', 'long-header', 'long-request-line', 'too-many-headers'])
+def test_malformed_heads_get_a_json_error(head, expected):
+    async def test(service, reader, writer):
+        writer.write(head)
+        status, headers, body = await read_response(reader, writer)
+        assert (status, headers['connection']) == (expected, 'close')
+        assert 'error' in body
+    serve(test)
+
+
+def test_connection_close_is_honoured():
+    async def test(service, reader, writer):
+        status, headers, _ = await request(reader, writer, 'GET', '/languages', headers="Connection: close\r\n")
+        assert (status, headers['connection']) == (200, 'close')
+        assert await reader.read() == b''
+    serve(test)
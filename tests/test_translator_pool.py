@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip('deep_translator')
+pytest.importorskip('requests')
+
+import travelspeak
+from travelspeak import StubTranslationServer, TranslationError, TranslatorPool, shared_http_session
+
+
+@pytest.fixture
+def stub():
+    server = StubTranslationServer().start()
+    yield server
+    server.stop()
+
+
+def test_pooled_clients_share_one_session(stub, monkeypatch):
+    session = shared_http_session()
+    sessions = []
+    get = session.get
+
+    def tracking_get(url, **kwargs):
+        sessions.append(session)
+        return get(url, **kwargs)
+
+    monkeypatch.setattr(session, 'get', tracking_get)
+    pool = TranslatorPool(base_url=stub.url)
+    spanish = pool.create_client('en', 'es')
+    french = pool.create_client('en', 'fr')
+    assert spanish is not french
+    assert spanish.translate("Hello") and french.translate("Goodbye")
+    assert len(sessions) == 2
+    assert sessions[0] is sessions[1] is shared_http_session()
+
+
+def test_released_clients_are_reused(stub):
+    pool = TranslatorPool(base_url=stub.url)
+    client = pool.acquire('en', 'es')
+    pool.release('en', 'es', client)
+    assert pool.acquire('en', 'es') is client
+    assert pool.stats()['reused'] == 1
+
+
+def test_missing_base_url_attribute_is_an_error(monkeypatch):
+    class Client:
+        def __init__(self, source, target):
+            pass
+
+    monkeypatch.setattr(travelspeak.deep_translator, 'GoogleTranslator', Client, raising=False)
+    with pytest.raises(TranslationError, match="_base_url"):
+        TranslatorPool(base_url='http://127.0.0.1:1').create_client('en', 'es')
+
+
+def test_unpatchable_engine_module_is_reported(monkeypatch, capsys):
+    import deep_translator.google
+    monkeypatch.setattr(travelspeak, '_shared_session', None)
+    monkeypatch.delattr(deep_translator.google, 'requests')
+    shared_http_session()
+    assert "deep_translator.google no longer uses requests" in capsys.readouterr().err
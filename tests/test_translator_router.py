@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+
+from travelspeak import (BackendHealth, FallbackTranslator, TranslationError, TranslationResult, TranslatorRouter,
+                         translate_document)
+
+
+class FakeBackend:
+    def __init__(self, prefix, fail=False, delay=0.0):
+        self.prefix = prefix
+        self.fail = fail
+        self.delay = delay
+        self.calls = 0
+
+    def translate(self, text, src='auto', dest='en'):
+        self.calls += 1
+        if self.delay:
+            threading.Event().wait(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.prefix} is down")
+        return TranslationResult(f"{self.prefix}:{text}")
+
+    def translate_batch(self, texts, src='auto', dest='en'):
+        return [self.translate(text, src, dest).text for text in texts]
+
+
+@pytest.fixture
+def router():
+    router = TranslatorRouter(hedge=False)
+    yield router
+    router.close()
+
+
+def test_fails_over_to_the_next_backend(router):
+    down = router.register('down', FakeBackend('down', fail=True))
+    router.register('up', FakeBackend('up'))
+    result = router.translate("hello", 'en', 'es')
+    assert (result.text, result.backend) == ("up:hello", 'up')
+    assert down.calls == 1
+    assert router.health['down'].snapshot()['error_rate'] == 1.0
+
+
+def test_unhealthy_backend_is_ranked_last(router):
+    down = router.register('a-down', FakeBackend('down', fail=True))
+    router.register('b-up', FakeBackend('up'))
+    for _ in range(3):
+        assert router.translate("hello", 'en', 'es').backend == 'b-up'
+    assert down.calls == 1
+    assert router.ranked('en') == ['b-up', 'a-down']
+
+
+def test_breaker_opens_after_repeated_failures(router):
+    down = router.register('down', FakeBackend('down', fail=True))
+    for _ in range(5):
+        with pytest.raises(TranslationError):
+            router.translate("hello", 'en', 'es')
+    # Three consecutive failures open the circuit; later calls skip the backend
+    assert down.calls == 3
+    assert router.health['down'].state() == 'open'
+    assert router.ranked('en') == []
+    with pytest.raises(TranslationError, match="No translation backend available"):
+        router.translate("hello", 'en', 'es')
+
+
+def test_half_open_backend_is_tried_again_and_closes_on_success(router):
+    flaky = router.register('flaky', FakeBackend('flaky', fail=True))
+    router.health['flaky'] = BackendHealth(failure_threshold=1, cooldown=0.0)
+    with pytest.raises(TranslationError):
+        router.translate("hello", 'en', 'es')
+    assert router.health['flaky'].state() == 'half-open'
+    flaky.fail = False
+    assert router.translate_batch(["one", "two"], 'en', 'es') == ["flaky:one", "flaky:two"]
+    assert router.health['flaky'].state() == 'closed'
+
+
+def test_all_backends_failing_uses_the_fallback():
+    router = TranslatorRouter(fallback=FallbackTranslator(phrasebook_path=None), hedge=False)
+    try:
+        router.register('down', FakeBackend('down', fail=True))
+        result = router.translate("hello", 'en', 'es')
+        assert (result.text, result.backend) == ("hola", 'phrasebook')
+        assert router.translate_batch(["water"], 'en', 'es', with_backend=True) == (["agua"], 'phrasebook')
+        assert router.stats()['fallbacks'] == 2
+    finally:
+        router.close()
+
+
+def test_without_a_fallback_errors_are_raised(router):
+    router.register('down', FakeBackend('down', fail=True))
+    with pytest.raises(TranslationError, match="down is down"):
+        router.translate("hello", 'en', 'es')
+    with pytest.raises(TranslationError):
+        router.translate_batch(["hello"], 'en', 'es')
+
+
+def test_faster_backend_is_ranked_first(router):
+    router.register('a-slow', FakeBackend('slow'))
+    router.register('b-fast', FakeBackend('fast'))
+    router.health['a-slow'].record(True, 0.5)
+    router.health['b-fast'].record(True, 0.05)
+    assert router.ranked('en') == ['b-fast', 'a-slow']
+    assert router.translate("hi", 'en', 'fr').backend == 'b-fast'
+
+
+def test_auto_detect_skips_backends_that_need_a_source_language(router):
+    router.register('fixed', FakeBackend('fixed'), auto_detect=False)
+    router.register('auto', FakeBackend('auto'))
+    assert router.ranked('auto') == ['auto']
+    assert sorted(router.ranked('en')) == ['auto', 'fixed']
+
+
+def test_slow_call_is_hedged_on_the_next_backend():
+    router = TranslatorRouter(min_hedge_delay=0.05, default_hedge_delay=0.05)
+    try:
+        router.register('primary', FakeBackend('slow', delay=1.0))
+        router.register('secondary', FakeBackend('fast'))
+        result = router.translate("hi", 'en', 'fr')
+        assert (result.text, result.backend) == ("fast:hi", 'secondary')
+        assert router.stats()['hedged'] == 1
+        assert router.stats()['hedge_wins'] == 1
+    finally:
+        router.close()
+
+
+def test_single_sentence_document_is_hedged_and_timed():
+    router = TranslatorRouter(min_hedge_delay=0.05, default_hedge_delay=0.05)
+    try:
+        router.register('primary', FakeBackend('slow', delay=1.0))
+        router.register('secondary', FakeBackend('fast'))
+        result = translate_document(router, "Where is the station?", 'en', 'fr')
+        assert (result.text, result.backend) == ("fast:Where is the station?", 'secondary')
+        assert router.stats()['hedged'] == 1
+        assert router.health['secondary'].percentile(50) is not None
+    finally:
+        router.close()
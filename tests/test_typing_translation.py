@@ -0,0 +1,150 @@
+import threading
+
+import pytest
+
+pytest.importorskip('tkinter')
+
+from travelspeak import LanguageTranslator, TranslationResult, translate_document
+
+
+class FakeVar:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+# Tk root whose after() jobs only run when the test fires them
+class FakeRoot:
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 0
+
+    def after(self, delay, fn, *args):
+        self.next_id += 1
+        self.jobs[self.next_id] = (delay, fn, args)
+        return self.next_id
+
+    def after_cancel(self, job):
+        del self.jobs[job]
+
+    def fire(self):
+        jobs, self.jobs = self.jobs, {}
+        for delay, fn, args in jobs.values():
+            fn(*args)
+
+
+@pytest.fixture
+def app():
+    app = LanguageTranslator.__new__(LanguageTranslator)
+    app.root = FakeRoot()
+    app.typing_job = None
+    app.type_translate_var = FakeVar(True)
+    app.passes = []
+    app.translate_text = lambda as_you_type=False: app.passes.append(as_you_type)
+    return app
+
+
+def test_keystrokes_are_debounced_into_one_pass(app):
+    for _ in range(5):
+        app.schedule_typing_translation()
+    assert len(app.root.jobs) == 1
+    assert list(app.root.jobs.values())[0][0] == 600
+    app.root.fire()
+    assert app.passes == [True]
+    assert app.typing_job is None
+
+
+def test_turning_the_mode_off_cancels_the_pending_pass(app):
+    app.schedule_typing_translation()
+    app.type_translate_var.value = False
+    app.schedule_typing_translation()
+    assert app.root.jobs == {}
+    assert app.typing_job is None
+
+
+class CountingTranslator:
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def max_chars(self):
+        return 4500
+
+    def translate(self, text, src, dest):
+        return TranslationResult(self.translate_batch([text], src, dest)[0][0], backend='fake')
+
+    def translate_batch(self, texts, src, dest, with_backend=False):
+        with self.lock:
+            self.sent.extend(texts)
+        return [f"<{text}>" for text in texts], 'fake'
+
+
+def test_only_edited_sentences_are_sent_again():
+    translator = CountingTranslator()
+    first = translate_document(translator, "One. Two. Three.", 'en', 'fr')
+    assert len(translator.sent) == 3
+
+    translator.sent.clear()
+    second = translate_document(translator, "One. Two! Three. Four.", 'en', 'fr', memo=first.sentences)
+    assert sorted(translator.sent) == ["Four.", "Two!"]
+    assert second.text == "<One.> <Two!> <Three.> <Four.>"
+
+    translator.sent.clear()
+    third = translate_document(translator, "One. Two! Three. Four.", 'en', 'fr', memo=second.sentences)
+    assert translator.sent == []
+    assert third.backend == 'cache'
+
+
+# Text widget whose <<Modified>> events queue up like Tk's, until the test delivers them
+class FakeInputText:
+    def __init__(self, app):
+        self.app = app
+        self.text = ""
+        self.modified = False
+        self.events = 0
+
+    def get(self, start, end):
+        return self.text + "\n"
+
+    def insert(self, index, text):
+        self.text += text
+        self.edit_modified(True)
+
+    def edit_modified(self, flag=None):
+        if flag is None:
+            return self.modified
+        if flag and not self.modified:
+            self.events += 1
+        self.modified = flag
+
+    def deliver(self):
+        while self.events:
+            self.events -= 1
+            self.app.on_input_modified()
+
+
+class IdleTasks:
+    def cancel(self, channel):
+        return False
+
+
+def test_recognized_speech_does_not_start_an_as_you_type_pass(app):
+    app.live_translate_var = FakeVar(True)
+    app.input_text = FakeInputText(app)
+    app.tasks = IdleTasks()
+    segments = []
+    app.translate_segment = segments.append
+    app.update_input_text("where is the station")
+    app.update_input_text("please")
+    app.input_text.deliver()
+    assert app.root.jobs == {}
+    assert app.input_text.text == "where is the station please"
+    assert segments == ["where is the station", "please"]
+
+    # Typing is still picked up
+    app.input_text.insert('end', "!")
+    app.input_text.deliver()
+    app.root.fire()
+    assert app.passes == [True]
@@ -0,0 +1,99 @@
+import queue
+import threading
+
+import pytest
+
+from travelspeak import UiTaskRunner
+
+
+# Stands in for the Tk root: after() callbacks run when the test drains them
+class FakeRoot:
+    def __init__(self):
+        self.calls = queue.Queue()
+
+    def after(self, delay, fn, *args):
+        self.calls.put((fn, args))
+
+    def drain(self, expected, timeout=5):
+        for _ in range(expected):
+            fn, args = self.calls.get(timeout=timeout)
+            fn(*args)
+
+
+@pytest.fixture
+def runner():
+    root = FakeRoot()
+    runner = UiTaskRunner(root, max_workers=2)
+    yield runner
+    runner.shutdown()
+
+
+def test_success_is_delivered_on_the_ui_thread(runner):
+    results = []
+    runner.submit('translate', lambda text: text.upper(), "hola", on_success=results.append)
+    assert runner.pending('translate')
+    runner.root.drain(1)
+    assert results == ["HOLA"]
+    assert not runner.pending('translate')
+
+
+def test_errors_go_to_on_error(runner):
+    errors = []
+
+    def fail():
+        raise ValueError("boom")
+
+    runner.submit('translate', fail, on_success=pytest.fail, on_error=errors.append)
+    runner.root.drain(1)
+    assert [str(e) for e in errors] == ["boom"]
+
+
+def test_newer_submission_supersedes_the_older_one(runner):
+    release = threading.Event()
+    results = []
+    runner.submit('translate', lambda: release.wait(5) and "old", on_success=results.append)
+    runner.submit('translate', lambda: "new", on_success=results.append)
+    release.set()
+    runner.root.drain(2)
+    assert results == ["new"]
+
+
+def test_cancel_drops_the_result(runner):
+    release = threading.Event()
+    results = []
+    runner.submit('speech', lambda: release.wait(5), on_success=results.append)
+    assert runner.cancel('speech')
+    assert not runner.cancel('speech')
+    release.set()
+    runner.root.drain(1)
+    assert results == []
+
+
+def test_progress_reports_stop_once_superseded(runner):
+    started = threading.Event()
+    release = threading.Event()
+    reports = []
+    returned = []
+
+    def work(progress):
+        returned.append(progress("first"))
+        started.set()
+        release.wait(5)
+        returned.append(progress("second"))
+
+    runner.submit('document', work, on_progress=reports.append)
+    assert started.wait(5)
+    runner.root.drain(1)
+    runner.cancel('document')
+    release.set()
+    runner.root.drain(1)
+    assert reports == ["first"]
+    assert returned == [True, False]
+
+
+def test_channel_none_is_never_superseded(runner):
+    results = []
+    runner.submit(None, lambda: 1, on_success=results.append)
+    runner.submit(None, lambda: 2, on_success=results.append)
+    runner.root.drain(2)
+    assert sorted(results) == [1, 2]
@@ -1,37 +1,889 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
 import threading
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 import os
 import sys
+import argparse
+import csv
+import io
+import gzip
+import queue
+import hashlib
+import itertools
+import shutil
+import subprocess
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait as wait_futures
+import sqlite3
+import unicodedata
+import re
+import mmap
+import struct
+import importlib
+import importlib.util
+import math
+import bisect
+import random
+from difflib import SequenceMatcher
+from contextlib import contextmanager
+from collections import OrderedDict, deque, namedtuple
+import asyncio
+import signal
 
-# Try to import optional dependencies
+# Tk is only needed for the GUI; the serve command runs on headless installs without it
 try:
-    import speech_recognition as sr
-    SPEECH_RECOGNITION_AVAILABLE = True
+    import tkinter as tk
+    from tkinter import ttk, messagebox, scrolledtext, filedialog
+    import tkinter.font as tkfont
+    TKINTER_AVAILABLE = True
 except ImportError:
-    SPEECH_RECOGNITION_AVAILABLE = False
-    print("Speech recognition not available. Install with: pip install speechrecognition pyaudio")
+    tk = ttk = messagebox = scrolledtext = filedialog = tkfont = None
+    TKINTER_AVAILABLE = False
 
-try:
-    import pyttsx3
-    TTS_AVAILABLE = True
-except ImportError:
-    TTS_AVAILABLE = False
-    print("Text-to-speech not available. Install with: pip install pyttsx3")
+CACHE_FILE = 'translation_cache.db'
+TTS_CACHE_DIR = 'tts_cache'
+HISTORY_FILE = 'translation_history.db'
+PHRASEBOOK_FILE = 'phrasebook.tspk'
+STARTUP_REPORT_FILE = 'startup_timings.jsonl'
+SPEECH_MODEL_DIR = os.environ.get('TRAVELSPEAK_SPEECH_MODELS', 'speech_models')
 
-try:
-    from deep_translator import GoogleTranslator
-    TRANSLATOR_AVAILABLE = True
-except ImportError:
-    TRANSLATOR_AVAILABLE = False
-    print("Deep Translator not available. Install with: pip install deep-translator")
+# Records how long each startup phase takes
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = OrderedDict()
+        self.lock = threading.Lock()
 
-# Fallback translator using basic dictionary (limited functionality)
-class FallbackTranslator:
+    @contextmanager
+    def measure(self, name):
+        """Time the enclosed block as one subsystem"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.timings[name] = time.perf_counter() - started
+
+    def mark(self, name):
+        """Record the time elapsed since the process started loading this module"""
+        with self.lock:
+            self.timings[name] = time.perf_counter() - self.started
+
+    def report(self, path=STARTUP_REPORT_FILE):
+        """Print the timings and append them to the startup report file"""
+        with self.lock:
+            timings = {name: round(seconds * 1000, 1) for name, seconds in self.timings.items()}
+        print("Startup (ms): " + ", ".join(f"{name}={ms}" for name, ms in timings.items()), file=sys.stderr)
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'time': datetime.now().isoformat(timespec='seconds'),
+                                    'timings_ms': timings}) + "\n")
+        except OSError:
+            pass
+
+STARTUP = StartupTimer()
+
+# Histogram bucket upper bounds in seconds
+METRIC_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# In-process counters and latency histograms; one lock and a dict update per observation
+class Metrics:
+    def __init__(self, buckets=METRIC_BUCKETS):
+        self.buckets = buckets
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration in a histogram"""
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the enclosed block into a histogram"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def quantile(self, counts, total, q):
+        """Estimate a quantile as the upper bound of the bucket it falls in"""
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return None
+
+    def snapshot(self):
+        """Return every counter and histogram as plain data"""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (list(counts), total, count))
+                                for key, (counts, total, count) in self.histograms.items())
+        return {
+            'uptime_s': round(time.time() - self.started, 1),
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                         for (name, labels), value in counters],
+            'histograms': [{
+                'name': name,
+                'labels': dict(labels),
+                'count': count,
+                'sum': round(total, 6),
+                'p50': self.quantile(counts, count, 0.5),
+                'p95': self.quantile(counts, count, 0.95),
+                'buckets': dict(zip([str(bound) for bound in self.buckets] + ['+Inf'],
+                                    itertools.accumulate(counts))),
+            } for (name, labels), (counts, total, count) in histograms],
+        }
+
+    def summary(self):
+        """Return one human-readable line per histogram and counter"""
+        def label_text(labels):
+            return "{" + ",".join(f"{key}={value}" for key, value in labels.items()) + "}" if labels else ""
+
+        def ms(seconds):
+            return "-" if seconds is None else ">10s" if seconds == float('inf') else f"{seconds * 1000:g}ms"
+
+        snapshot = self.snapshot()
+        lines = []
+        for histogram in snapshot['histograms']:
+            mean = histogram['sum'] / histogram['count']
+            lines.append(f"{histogram['name']}{label_text(histogram['labels'])}: n={histogram['count']} "
+                         f"mean={mean * 1000:.1f}ms p50<={ms(histogram['p50'])} p95<={ms(histogram['p95'])}")
+        for counter in snapshot['counters']:
+            lines.append(f"{counter['name']}{label_text(counter['labels'])}: {counter['value']}")
+        return lines
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        def label_text(labels, extra=None):
+            pairs = [f'{key}="{value}"' for key, value in labels.items()]
+            if extra:
+                pairs.append(extra)
+            return "{" + ",".join(pairs) + "}" if pairs else ""
+
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+        for counter in snapshot['counters']:
+            if counter['name'] not in typed:
+                typed.add(counter['name'])
+                lines.append(f"# TYPE {counter['name']} counter")
+            lines.append(f"{counter['name']}{label_text(counter['labels'])} {counter['value']}")
+        for histogram in snapshot['histograms']:
+            name = histogram['name']
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, cumulative in histogram['buckets'].items():
+                bucket_labels = label_text(histogram['labels'], 'le="%s"' % bound)
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{label_text(histogram['labels'])} {histogram['sum']}")
+            lines.append(f"{name}_count{label_text(histogram['labels'])} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write the metrics to path: Prometheus text for .prom/.txt, JSON otherwise"""
+        if os.path.splitext(path)[1].lower() in ('.prom', '.txt'):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), indent=2)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+METRICS = Metrics()
+
+# Writes METRICS to disk every interval seconds from a daemon thread
+class MetricsDumper:
+    def __init__(self, path, interval=30.0, metrics=None):
+        self.path = path
+        self.interval = interval
+        self.metrics = metrics or METRICS
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread and write a final dump"""
+        self.stopped.set()
+        self._dump()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self._dump()
+
+    def _dump(self):
+        try:
+            self.metrics.dump(self.path)
+        except OSError as e:
+            print(f"Metrics dump error: {e}", file=sys.stderr)
+
+# On-demand cProfile + tracemalloc capture for diagnosing a slow session
+class ProfileCapture:
     def __init__(self):
+        self.active = False
+        self.profile = None
+        self.worker_profiles = []
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Profile the calling thread and, through wrap(), work handed to worker threads"""
+        import cProfile
+        import tracemalloc
+        tracemalloc.start(25)
+        self.worker_profiles = []
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        self.active = True
+
+    def wrap(self, fn):
+        """Return fn, or a version of it that runs under its own profiler while capturing"""
+        if not self.active:
+            return fn
+        import cProfile
+
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self.lock:
+                    self.worker_profiles.append(profile)
+        return profiled
+
+    def stop(self, prefix='profile'):
+        """Stop capturing; write .prof call stats and a top-allocations report, returning both paths"""
+        import pstats
+        import tracemalloc
+        self.profile.disable()
+        self.active = False
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        stats_path = f"{prefix}_{stamp}.prof"
+        stats = pstats.Stats(self.profile)
+        with self.lock:
+            for profile in self.worker_profiles:
+                stats.add(profile)
+            self.worker_profiles = []
+        stats.dump_stats(stats_path)
+
+        memory_path = f"{prefix}_{stamp}_memory.txt"
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(memory_path, 'w', encoding='utf-8') as f:
+            f.write(f"Traced memory: current {current // 1024} KiB, peak {peak // 1024} KiB\n")
+            for stat in snapshot.statistics('traceback')[:25]:
+                f.write(f"\n{stat.size // 1024} KiB in {stat.count} blocks\n")
+                f.write("\n".join(stat.traceback.format()) + "\n")
+        return stats_path, memory_path
+
+# Module proxy that defers the real import until an attribute is first used
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+def module_available(name):
+    """Check whether a module can be imported without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+# Check optional dependencies; heavy imports happen on first use
+sr = LazyModule('speech_recognition')
+SPEECH_RECOGNITION_AVAILABLE = module_available('speech_recognition')
+if not SPEECH_RECOGNITION_AVAILABLE:
+    print("Speech recognition not available. Install with: pip install speechrecognition pyaudio", file=sys.stderr)
+
+pyttsx3 = LazyModule('pyttsx3')
+TTS_AVAILABLE = module_available('pyttsx3')
+if not TTS_AVAILABLE:
+    print("Text-to-speech not available. Install with: pip install pyttsx3", file=sys.stderr)
+
+deep_translator = LazyModule('deep_translator')
+TRANSLATOR_AVAILABLE = module_available('deep_translator')
+if not TRANSLATOR_AVAILABLE:
+    print("Deep Translator not available. Install with: pip install deep-translator", file=sys.stderr)
+
+# Offline speech recognition is an optional extra, so a missing engine is not reported
+vosk = LazyModule('vosk')
+VOSK_AVAILABLE = module_available('vosk')
+pocketsphinx = LazyModule('pocketsphinx')
+POCKETSPHINX_AVAILABLE = module_available('pocketsphinx')
+
+# NumPy only speeds up audio preprocessing; without it phrases go to the recognizer untouched
+np = LazyModule('numpy')
+NUMPY_AVAILABLE = module_available('numpy')
+
+# Zstandard is only needed to read or write .zst history exports
+zstandard = LazyModule('zstandard')
+ZSTD_AVAILABLE = module_available('zstandard')
+
+# Words are runs of letters/digits; scripts written without spaces are split per character
+PHRASE_TOKEN_RE = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u0e00-\u0e7f]|[^\W_]+(?:['’][^\W_]+)*"
+)
+
+def phrase_tokens(text):
+    """Return (normalized token, start, end) for each token in already NFC-normalized text"""
+    return [(match.group().casefold().replace('’', "'"), match.start(), match.end())
+            for match in PHRASE_TOKEN_RE.finditer(text)]
+
+def phrase_key(text):
+    """Normalize a phrase to the key stored in a phrasebook index"""
+    return " ".join(token for token, _, _ in phrase_tokens(unicodedata.normalize('NFC', text)))
+
+# Compiled phrase pack, read straight from a memory map
+#
+# Layout (little endian): header, language table, concept table, per-language
+# sorted key indexes, then a heap of length-prefixed UTF-8 strings. The concept
+# table holds, for every concept and language, the heap offset of its phrase.
+class Phrasebook:
+    MAGIC = b'TSPK'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHHIIQ')
+    LANGUAGE = struct.Struct('<8sQI')
+    ENTRY = struct.Struct('<II')
+    MISSING = 0xFFFFFFFF
+
+    def __init__(self, path=None, data=None):
+        self.file = None
+        if path is not None:
+            self.file = open(path, 'rb')
+            data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = data
+        magic, version, language_count, self.concept_count, self.max_tokens, self.heap_offset = \
+            self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("Not a phrasebook file")
+        self.languages = {}
+        for index in range(language_count):
+            code, index_offset, index_count = self.LANGUAGE.unpack_from(
+                data, self.HEADER.size + index * self.LANGUAGE.size)
+            self.languages[code.rstrip(b'\0').decode('ascii')] = (index, index_offset, index_count)
+        self.concepts_offset = self.HEADER.size + language_count * self.LANGUAGE.size
+
+    @classmethod
+    def compile(cls, rows):
+        """Build phrasebook bytes from rows of {language code: phrase}"""
+        strings = {}
+        heap = bytearray()
+
+        def intern(text):
+            if text not in strings:
+                encoded = text.encode('utf-8')
+                strings[text] = len(heap)
+                heap.extend(struct.pack('<H', len(encoded)))
+                heap.extend(encoded)
+            return strings[text]
+
+        rows = [{code: phrase for code, phrase in row.items() if phrase and phrase.strip()} for row in rows]
+        codes = sorted({code for row in rows for code in row})
+        indexes = {code: [] for code in codes}
+        concepts = bytearray()
+        max_tokens = 1
+        for concept, row in enumerate(rows):
+            for code in codes:
+                phrase = row.get(code)
+                concepts.extend(struct.pack('<I', intern(phrase) if phrase else cls.MISSING))
+                if phrase:
+                    key = phrase_key(phrase)
+                    if key:
+                        indexes[code].append((key.encode('utf-8'), concept))
+                        max_tokens = max(max_tokens, key.count(' ') + 1)
+
+        body = bytearray()
+        index_start = cls.HEADER.size + len(codes) * cls.LANGUAGE.size + len(concepts)
+        language_table = bytearray()
+        for code in codes:
+            entries = sorted(set(indexes[code]))
+            language_table.extend(cls.LANGUAGE.pack(code.encode('ascii'), index_start + len(body), len(entries)))
+            for key, concept in entries:
+                body.extend(cls.ENTRY.pack(intern(key.decode('utf-8')), concept))
+        heap_offset = index_start + len(body)
+        header = cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(codes), len(rows), max_tokens, heap_offset)
+        return bytes(header + language_table + concepts + body + heap)
+
+    def _string(self, offset):
+        start = self.heap_offset + offset
+        length = struct.unpack_from('<H', self.data, start)[0]
+        return bytes(self.data[start + 2:start + 2 + length])
+
+    def _lower_bound(self, language, key):
+        """Return (position, key at position) of the first index key >= key"""
+        _, index_offset, index_count = self.languages[language]
+        low, high = 0, index_count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, _ = self.ENTRY.unpack_from(self.data, index_offset + middle * self.ENTRY.size)
+            if self._string(key_offset) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == index_count:
+            return low, None
+        key_offset, _ = self.ENTRY.unpack_from(self.data, index_offset + low * self.ENTRY.size)
+        return low, self._string(key_offset)
+
+    def longest_match(self, tokens, start, language):
+        """Return (token count, concept) of the longest phrase at tokens[start:], or (0, None)"""
+        if language not in self.languages:
+            return 0, None
+        _, index_offset, _ = self.languages[language]
+        best = (0, None)
+        for length in range(1, min(self.max_tokens, len(tokens) - start) + 1):
+            key = " ".join(tokens[start:start + length]).encode('utf-8')
+            position, found = self._lower_bound(language, key)
+            if found == key:
+                _, concept = self.ENTRY.unpack_from(self.data, index_offset + position * self.ENTRY.size)
+                best = (length, concept)
+            # Sorted keys act as a trie: stop once no longer phrase shares this prefix
+            _, following = self._lower_bound(language, key + b' ')
+            if following is None or not following.startswith(key + b' '):
+                break
+        return best
+
+    def phrase(self, concept, language):
+        """Return the phrase for concept in language, or None"""
+        if language not in self.languages:
+            return None
+        index = self.languages[language][0]
+        offset = struct.unpack_from(
+            '<I', self.data, self.concepts_offset + (concept * len(self.languages) + index) * 4)[0]
+        if offset == self.MISSING:
+            return None
+        return self._string(offset).decode('utf-8')
+
+    def close(self):
+        if self.file is not None:
+            self.data.close()
+            self.file.close()
+            self.file = None
+
+def load_phrase_rows(path):
+    """Read phrasebook source rows from CSV (one column per language code) or JSON (list of objects)"""
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+def compile_phrasebook(source_path, output_path):
+    """Compile a CSV/JSON phrase list into a binary phrasebook; returns the number of phrases"""
+    rows = load_phrase_rows(source_path)
+    with open(output_path, 'wb') as f:
+        f.write(Phrasebook.compile(rows))
+    return len(rows)
+
+# Language mappings (updated for deep-translator compatibility)
+LANGUAGES = {
+    'English': 'en',
+    'Spanish': 'es',
+    'French': 'fr',
+    'German': 'de',
+    'Italian': 'it',
+    'Portuguese': 'pt',
+    'Russian': 'ru',
+    'Japanese': 'ja',
+    'Korean': 'ko',
+    'Chinese (Simplified)': 'zh',
+    'Chinese (Traditional)': 'zh-tw',
+    'Arabic': 'ar',
+    'Hindi': 'hi',
+    'Dutch': 'nl',
+    'Swedish': 'sv',
+    'Norwegian': 'no',
+    'Danish': 'da',
+    'Finnish': 'fi',
+    'Polish': 'pl',
+    'Czech': 'cs',
+    'Hungarian': 'hu',
+    'Turkish': 'tr',
+    'Greek': 'el',
+    'Hebrew': 'he',
+    'Thai': 'th',
+    'Vietnamese': 'vi',
+    'Indonesian': 'id',
+    'Malay': 'ms',
+    'Filipino': 'tl',
+    'Swahili': 'sw',
+    'Bengali': 'bn',
+    'Tamil': 'ta',
+    'Telugu': 'te',
+    'Marathi': 'mr',
+    'Gujarati': 'gu',
+    'Punjabi': 'pa',
+    'Urdu': 'ur',
+    'Persian': 'fa',
+    'Romanian': 'ro',
+    'Bulgarian': 'bg',
+    'Croatian': 'hr',
+    'Serbian': 'sr',
+    'Slovak': 'sk',
+    'Slovenian': 'sl',
+    'Lithuanian': 'lt',
+    'Latvian': 'lv',
+    'Estonian': 'et',
+    'Ukrainian': 'uk',
+    'Catalan': 'ca',
+    'Basque': 'eu',
+    'Galician': 'gl',
+    'Welsh': 'cy',
+    'Irish': 'ga',
+    'Scottish Gaelic': 'gd',
+    'Maltese': 'mt',
+    'Icelandic': 'is',
+    'Albanian': 'sq',
+    'Macedonian': 'mk',
+    'Bosnian': 'bs',
+    'Afrikaans': 'af',
+    'Zulu': 'zu',
+    'Xhosa': 'xh',
+    'Yoruba': 'yo',
+    'Hausa': 'ha',
+    'Amharic': 'am',
+    'Somali': 'so',
+    'Esperanto': 'eo',
+    'Latin': 'la'
+}
+
+# Minimum LanguageDetector confidence before the source language is switched
+DETECTION_MIN_CONFIDENCE = 0.2
+
+# Seed vocabulary for the offline language identifier; trigram profiles are built from it
+LANGUAGE_SEED_TEXT = {
+    'en': "the and you that was for are with his they this have from one had word but not what all were when "
+          "your can said there use each which she how their will other about out many then them these some her "
+          "would make like him into time has look two more write see number way could people than first been "
+          "where is thank please hello help water food how much station hotel ticket where is the",
+    'es': "el la de que y en los se del las un por con no una su para es al lo como más pero sus le ya o este "
+          "sí porque esta entre cuando muy sin sobre también me hasta hay donde quien desde todo nos durante "
+          "gracias hola por favor dónde está cuánto cuesta agua comida baño estación usted ayuda necesito quiero",
+    'fr': "le de un être et à il avoir ne je son que se qui ce dans en du elle au pour pas que vous par sur "
+          "faire plus dire me on mon lui nous comme mais pouvoir avec tout y aller voir en bien où sans tu ou "
+          "merci bonjour s'il vous plaît où est combien coûte l'eau les toilettes la gare aidez-moi je voudrais",
+    'de': "der die und in den von zu das mit sich des auf für ist im dem nicht ein eine als auch es an werden "
+          "aus er hat dass sie nach wird bei einer um am sind noch wie einem über einen so zum war haben nur "
+          "danke bitte hallo wo ist wie viel kostet das wasser essen bahnhof hilfe ich möchte entschuldigung",
+    'it': "di che il la è e per un in non sono mi ho lo ma ti ha le si con cosa se io questo qui hai una del "
+          "bene sei tu gli come mio da sì no lui ci cosa sua molto fare anche quando dove perché questa tutto "
+          "grazie ciao per favore dov'è quanto costa acqua cibo stazione aiuto vorrei scusi buongiorno",
+    'pt': "de a o que e do da em um para é com não uma os no se na por mais as dos como mas foi ao ele das tem "
+          "à seu sua ou ser quando muito há nos já está eu também só pelo pela até isso ela entre era depois "
+          "obrigado olá por favor onde fica quanto custa água comida estação ajuda eu quero você não",
+    'nl': "de het een van en in is dat op te zijn met voor niet aan er om ook als bij of maar dan nog wat door "
+          "over ze zich uit naar hij je worden kan tot zo geen meer wel heeft hebben was ik wij jij waar hoe "
+          "dank je wel alstublieft hallo waar is hoeveel kost het water eten station help ik wil graag",
+    'sv': "och i att det som en på är av för med till den har de inte om ett han men var jag sig från vi så "
+          "kan man när år säger hon under också efter eller nu sin där vid mot ska skulle kommer ut får finns "
+          "tack snälla hej var är hur mycket kostar vatten mat stationen hjälp jag vill ursäkta",
+    'no': "og i det som en på er av for med til den har de ikke om et han men var jeg seg fra vi så kan man "
+          "når år sier hun under også etter eller nå sin der ved mot skal skulle kommer ut får finnes hvor "
+          "takk vær så snill hei hvor er hvor mye koster vann mat stasjonen hjelp jeg vil unnskyld meg",
+    'da': "og i at det som en på er af for med til den har de ikke om et han men var jeg sig fra vi så kan "
+          "man når år siger hun under også efter eller nu sin der ved mod skal skulle kommer ud får findes "
+          "tak venligst hej hvor er hvor meget koster vand mad stationen hjælp jeg vil gerne undskyld",
+    'fi': "ja on ei se että hän oli ovat mutta kun niin kuin myös tai jos vain sen ole hänen tämä minä sinä "
+          "me te he mitä missä miten koska kanssa olla joka nyt voi ovat sitten vielä ollut tämän kaikki "
+          "kiitos ole hyvä hei missä on paljonko maksaa vesi ruoka asema apua haluaisin anteeksi",
+    'pl': "i w nie na się z do to że jest jak co ale o tak za od po już tylko jego był czy przez ja ty on ona "
+          "my wy oni może być mnie jej tym które który kiedy bardzo gdzie jestem jesteś są mam masz dla "
+          "dziękuję proszę cześć dzień dobry gdzie jest ile kosztuje woda jedzenie dworzec pomocy chciałbym",
+    'cs': "a v se na je že to s z do o k i jako ale jsem jsi jsou by byl bylo pro jak tak už jen po od co "
+          "jeho její který která které když kde také není mám máš ano ne tady tam můj tvůj velmi "
+          "děkuji prosím ahoj dobrý den kde je kolik stojí voda jídlo nádraží pomoc chtěl bych promiňte",
+    'hu': "a az és hogy nem is egy meg de van ez már csak mint még ki el ha volt lesz vagy kell mi én te ő "
+          "mi ti ők itt ott hol mikor miért nagyon igen nem sok minden után között alatt fel le "
+          "köszönöm kérem szia jó napot hol van mennyibe kerül víz étel pályaudvar segítség szeretnék",
+    'tr': "bir ve bu da de için ne ile çok ben sen o biz siz onlar var yok ama gibi daha en mi mı mu mü her "
+          "şey kadar sonra önce değil olarak olan oldu ise diye nasıl nerede neden evet hayır şimdi "
+          "teşekkür ederim lütfen merhaba nerede ne kadar su yemek istasyon yardım istiyorum affedersiniz",
+    'vi': "và của là có không những được trong một người cho này với các đã để khi thì đến cũng như về nhiều "
+          "tôi bạn anh chị em chúng ta họ ở đây đó gì nào sao rất làm đi nói biết muốn cần "
+          "cảm ơn xin chào làm ơn ở đâu bao nhiêu tiền nước đồ ăn nhà ga giúp tôi với xin lỗi",
+    'id': "yang dan di itu dengan untuk tidak ini dari dalam akan pada juga saya ke karena tersebut bisa ada "
+          "mereka lebih kami kita anda sudah atau hanya oleh telah dia jika sangat apa bagaimana di mana "
+          "terima kasih tolong halo di mana berapa harganya air makanan stasiun bantuan saya mau permisi",
+    'ms': "yang dan di itu dengan untuk tidak ini dari dalam akan pada juga saya ke kerana tersebut boleh ada "
+          "mereka lebih kami kita anda sudah atau hanya oleh telah dia jika sangat apa bagaimana di mana "
+          "terima kasih tolong helo di mana berapa harganya air makanan stesen bantuan saya mahu maafkan",
+    'tl': "ang ng sa na at mga ay si ni kay ko mo niya namin natin nila ako ikaw siya kami tayo sila ito iyan "
+          "iyon hindi oo po opo may wala para kung pero dahil saan ano sino kailan paano magkano "
+          "salamat po pakiusap kumusta nasaan ang magkano ito tubig pagkain istasyon tulong gusto ko",
+    'sw': "na ya wa kwa ni la za katika kama hiyo lakini pia hii huo sana yake wake wao sisi mimi wewe yeye "
+          "kuwa kwamba hakuna kuna nini wapi lini vipi kwa nini ndiyo hapana sasa baada kabla "
+          "asante tafadhali habari jambo iko wapi ni bei gani maji chakula kituo msaada nataka samahani",
+    'ro': "și în de la a pe cu nu o un să se din că ce mai este pentru care sunt fi dar sau ca după lui ei eu "
+          "tu el ea noi voi ele acest această unde când cum foarte bine da aici acolo "
+          "mulțumesc vă rog bună ziua unde este cât costă apă mâncare gara ajutor aș vrea scuzați-mă",
+    'hr': "i je u se na da za su od s ne a to što kao ali ili bi smo sam si biti bio bila koji koja koje kad "
+          "gdje kako vrlo samo još već ja ti on ona mi vi oni ovo ono ovdje tamo da ne "
+          "hvala molim bok dobar dan gdje je koliko košta voda hrana kolodvor pomoć želio bih oprostite",
+    'bs': "i je u se na da za su od sa ne a to šta kao ali ili bi smo sam si biti bio bila koji koja koje kad "
+          "gdje kako vrlo samo još već ja ti on ona mi vi oni ovo ono ovdje tamo hoću može "
+          "hvala molim vas zdravo dobar dan gdje je koliko košta voda hrana stanica pomoć želio bih izvinite",
+    'sk': "a v sa na je že to s z do o k i ako ale som si sú by bol bolo pre ako tak už len po od čo "
+          "jeho jej ktorý ktorá ktoré keď kde tiež nie je mám máš áno nie tu tam môj tvoj veľmi "
+          "ďakujem prosím ahoj dobrý deň kde je koľko stojí voda jedlo stanica pomoc chcel by som prepáčte",
+    'sl': "in je v se na da za so od z ne a to kot ali pa bi smo sem si biti bil bila ki kdaj kje kako zelo "
+          "samo še že jaz ti on ona mi vi oni to tukaj tam da ne lahko moram imam "
+          "hvala prosim živjo dober dan kje je koliko stane voda hrana postaja pomoč rad bi oprostite",
+    'lt': "ir yra į kad su ne tai kaip bet jis ji aš tu mes jūs jie tik dar jau buvo bus iš per apie prie "
+          "kur kada kodėl labai taip čia ten mano tavo savo kuris kuri visi viskas "
+          "ačiū prašau labas laba diena kur yra kiek kainuoja vanduo maistas stotis pagalba norėčiau atsiprašau",
+    'lv': "un ir ar ka no uz par kā bet tas tā es tu mēs jūs viņi viņš viņa tikai vēl jau bija būs pie "
+          "kur kad kāpēc ļoti jā nē šeit tur mans tavs savs kurš kura visi viss "
+          "paldies lūdzu sveiki labdien kur ir cik maksā ūdens ēdiens stacija palīdzība es vēlos atvainojiet",
+    'et': "ja on ei see et ta oli nad aga kui nii kui ka või kas ainult selle mina sina meie teie nemad "
+          "mis kus kuidas sest koos olla kes nüüd võib siis veel olnud kõik väga jah ei siin seal "
+          "aitäh palun tere kus on kui palju maksab vesi toit jaam appi ma sooviksin vabandage",
+    'ca': "el la de que i a en els es un per amb no una les del al com més però seu seva o aquest sí perquè "
+          "aquesta entre quan molt sense sobre també fins hi ha on qui des de tot nosaltres jo tu ell ella "
+          "gràcies hola si us plau on és quant costa aigua menjar estació ajuda necessito vull perdoni",
+    'eu': "eta da ez du bat ere baina hau hori hura ni zu gu zuek haiek dira zen dago daude izan egin "
+          "non noiz nola zergatik bai ez hemen han nire zure bere oso dena guztiak gabe barik "
+          "eskerrik asko mesedez kaixo egun on non dago zenbat balio du ura janaria geltokia laguntza nahi dut",
+    'gl': "o a de que e en os as un unha por con non se do da para é ao como máis pero seu súa ou este "
+          "si porque esta entre cando moi sen sobre tamén ata hai onde quen dende todo nós eu ti el ela "
+          "grazas ola por favor onde está canto custa auga comida estación axuda necesito quero desculpe",
+    'cy': "y yr a ac i o yn mae ar am ei eu wedi bod gyda fel ond roedd hefyd neu pan mwy dim ddim ni chi "
+          "fi ti nhw hi fe beth ble sut pam ie na yma yna fy dy eich ein llawer iawn "
+          "diolch os gwelwch yn dda helo bore da ble mae faint yw dŵr bwyd gorsaf help hoffwn esgusodwch fi",
+    'ga': "an na agus is i ar ag a le do go bhí sé sí siad mé tú muid sibh seo sin ach nó nuair níos ní "
+          "cá háit conas cén fáth tá níl anseo ansin mo do a ár bhur an-mhaith uile "
+          "go raibh maith agat le do thoil dia dhuit cá bhfuil cé mhéad uisce bia stáisiún cabhair ba mhaith liom",
+    'gd': "an na agus is anns air aig a le do gu bha e i iad mi thu sinn sibh seo sin ach no nuair nas chan "
+          "càite ciamar carson tha chan eil an seo an sin mo do ar ur glè math uile "
+          "tapadh leat mas e do thoil halò madainn mhath càite a bheil dè na prìs uisge biadh stèisean cuideachadh",
+    'mt': "il u ta li fil għal ma minn fuq dan din dawk jien int hu hi aħna intom huma kien kienet huwa "
+          "hija mhux iva le hawn hemm fejn meta kif għaliex ħafna kollha tiegħi tiegħek "
+          "grazzi jekk jogħġbok bonġu fejn hu kemm jiswa ilma ikel stazzjon għajnuna nixtieq skużani",
+    'is': "og að í er á sem það var ekki við hann hún þeir þær ég þú við þið en eða þegar um til frá með "
+          "hvar hvenær hvernig af hverju já nei hér þar minn þinn sinn mjög allt allir "
+          "takk fyrir gjörðu svo vel halló góðan dag hvar er hvað kostar vatn matur stöð hjálp ég vil afsakið",
+    'sq': "dhe të në një që është me për nga nuk se si por ka më do u ai ajo unë ti ne ju ata ato ky kjo "
+          "ku kur pse shumë po jo këtu atje im yt i saj gjithë gjithçka "
+          "faleminderit ju lutem përshëndetje mirëdita ku është sa kushton ujë ushqim stacion ndihmë dua",
+    'af': "die en van in is dat het nie op te vir met hy sy ek jy ons julle hulle was sal kan maar of as "
+          "waar wanneer hoe hoekom ja nee hier daar my jou baie al alles ook nog "
+          "dankie asseblief hallo goeie dag waar is hoeveel kos dit water kos stasie help ek wil graag verskoon my",
+    'zu': "futhi ukuthi kodwa noma uma ngoba ngi u si ni ba ngiyabonga ngicela sawubona unjani "
+          "kuphi malini amanzi ukudla isiteshi usizo ngifuna uxolo yebo cha lapha lapho mina wena thina "
+          "nina bona kakhulu konke bonke ngubani nini kanjani kungani yini ukuze",
+    'xh': "kwaye ukuba kodwa okanye xa ngoba ndi u si ni ba enkosi ndicela molo unjani phi "
+          "yimalini amanzi ukutya isikhululo uncedo ndifuna uxolo ewe hayi apha apho mna wena thina "
+          "nina bona kakhulu konke bonke ngubani nini njani kutheni yintoni ukuze",
+    'yo': "ati ni ti o si kò kì àti pé fún sí láti wọn mo ìwọ òun àwa ẹ̀yin àwọn yìí yẹn ibo nígbà "
+          "báwo kí ló dé bẹ́ẹ̀ni rárá níbí níbẹ̀ mi rẹ gan an gbogbo "
+          "ẹ ṣé jọ̀wọ́ ẹ kú àárọ̀ báwo ni níbo ni èló ni omi oúnjẹ ibùdókọ̀ ìrànlọ́wọ́ mo fẹ́",
+    'ha': "da na a ta shi ita su mu ku ni kai ke wannan wancan amma ko idan saboda don ina yaushe yaya "
+          "me yasa eh a'a nan can nawa naka naki sosai duka duk "
+          "na gode don allah sannu ina kwana ina ne nawa ne ruwa abinci tasha taimako ina so yi haƙuri",
+    'so': "iyo waa ka ku u la oo ah in uu ay aan ma waxaa waxay isaga iyada anigu adiga annaga idinka "
+          "iyaga halkee goorma sidee maxaa haa maya halkan halkaas aad badan dhammaan "
+          "mahadsanid fadlan salaan subax wanaagsan xaggee waa immisa biyo cunto saldhig caawimo waxaan rabaa",
+    'eo': "la kaj de en estas al ke ne por kun mi vi li ŝi ni ili tio ĉi tiu kiu kio kie kiam kiel kial "
+          "jes ne tie ĉi tie mia via lia tre ĉiuj ĉio sed aŭ se estas estis estos "
+          "dankon bonvolu saluton bonan tagon kie estas kiom kostas akvo manĝaĵo stacidomo helpon mi volas pardonu",
+    'la': "et in est non ad cum quod sed ut de qui quae ex si esse enim etiam est sunt erat ego tu nos vos "
+          "is ea id hic haec hoc ubi quando quomodo cur ita minime hic ibi meus tuus suus valde omnes omnia "
+          "gratias tibi ago quaeso salve ubi est quanti constat aqua cibus statio auxilium volo ignosce mihi",
+    # Cyrillic
+    'ru': "и в не на я что он с как а то все она так его но да ты к у же вы за бы по только ее мне было вот "
+          "от меня еще нет о из ему теперь когда даже ну вдруг ли если уже или ни быть был него до вас "
+          "спасибо пожалуйста привет здравствуйте где сколько стоит вода еда вокзал помогите я хотел бы извините",
+    'uk': "і в не на я що він з як а то все вона так його але так ти до у же ви за б по тільки її мені було "
+          "ось від мене ще немає про із йому тепер коли навіть ну раптом чи якщо вже або ні бути був "
+          "дякую будь ласка привіт добрий день де скільки коштує вода їжа вокзал допоможіть я хотів би вибачте",
+    'bg': "и в не на аз че той с като а то всичко тя така него но да ти към у вие за би по само нея мен "
+          "беше ето от мене още няма за от му сега когато дори ли ако вече или ни съм е са бъде "
+          "благодаря моля здравей добър ден къде колко струва вода храна гара помощ бих искал извинете",
+    'sr': "и у не на ја да он са као а то све она тако његов али да ти ка код ви за би по само њу мени је "
+          "био ево од мене још нема о из њему сада када чак ли ако већ или ни бити где како врло "
+          "хвала молим здраво добар дан где је колико кошта вода храна станица помоћ желео бих извините",
+    'mk': "и во не на јас дека тој со како а тоа сè таа така него но да ти кон кај вие за би по само неа "
+          "мене беше ете од мене уште нема за од му сега кога дури ли ако веќе или ни сум е се биде "
+          "благодарам ве молам здраво добар ден каде колку чини вода храна станица помош сакам извинете",
+    # Arabic script
+    'ar': "في من على أن إلى هذا التي الذي عن مع هو هي كان ما لا كل بعد ذلك أو هذه بين قد لم عند إذا "
+          "نحن أنا أنت هم أين كيف متى لماذا نعم شكرا من فضلك مرحبا أين كم السعر ماء طعام محطة مساعدة أريد",
+    'fa': "و در به از که این را با است برای آن یک خود تا کرد بر هم نیز گفت می شود شده بود یا ما من تو "
+          "آنها کجا چگونه چه کی چرا بله نه متشکرم لطفا سلام کجاست چقدر قیمت آب غذا ایستگاه کمک می خواهم ببخشید",
+    'ur': "اور کے میں کی ہے کو سے کہ یہ پر ایک ہیں نے تھا وہ بھی کر ہو گا کیا جو نہیں ہم آپ میں تم "
+          "کہاں کیسے کب کیوں ہاں نہیں شکریہ براہ کرم ہیلو کہاں ہے کتنے کا ہے پانی کھانا اسٹیشن مدد چاہتا ہوں معاف کیجئے",
+    # Devanagari
+    'hi': "और के में की है को से कि यह पर एक हैं ने था वह भी कर हो गा क्या जो नहीं हम आप मैं तुम "
+          "कहाँ कैसे कब क्यों हाँ धन्यवाद कृपया नमस्ते कहाँ है कितने का है पानी खाना स्टेशन मदद चाहिए माफ़ कीजिए",
+    'mr': "आणि च्या मध्ये ची आहे ला पासून की हे वर एक आहेत ने होता तो पण कर होईल काय जे नाही आम्ही "
+          "तुम्ही मी तू कुठे कसे केव्हा का हो धन्यवाद कृपया नमस्कार कुठे आहे किती आहे पाणी जेवण स्टेशन मदत हवी आहे माफ करा",
+    # Han
+    'zh': "的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年得就那要下以生会自着去之过家学"
+          "对可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面"
+          "谢谢请你好在哪里多少钱水食物车站帮助我想要对不起",
+    'zh-tw': "的一是不了人我在有他這中大來上國個到說們為子和你地出道也時年得就那要下以生會自著去之過家學"
+             "對可她裡後小麼心多天而能好都然沒日於起還發成事隻作當想看文無開手十用主行方又如前所本見經頭面"
+             "謝謝請你好在哪裡多少錢水食物車站幫助我想要對不起",
+}
+
+# Unicode script ranges and the languages in LANGUAGES written in each
+LANGUAGE_SCRIPTS = [
+    ('latin', ((0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F), (0x1E00, 0x1EFF)), None),
+    ('cyrillic', ((0x0400, 0x04FF),), ('ru', 'uk', 'bg', 'sr', 'mk')),
+    ('greek', ((0x0370, 0x03FF), (0x1F00, 0x1FFF)), ('el',)),
+    ('hebrew', ((0x0590, 0x05FF),), ('he',)),
+    ('arabic', ((0x0600, 0x06FF), (0x0750, 0x077F), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF)), ('ar', 'fa', 'ur')),
+    ('devanagari', ((0x0900, 0x097F),), ('hi', 'mr')),
+    ('bengali', ((0x0980, 0x09FF),), ('bn',)),
+    ('gurmukhi', ((0x0A00, 0x0A7F),), ('pa',)),
+    ('gujarati', ((0x0A80, 0x0AFF),), ('gu',)),
+    ('tamil', ((0x0B80, 0x0BFF),), ('ta',)),
+    ('telugu', ((0x0C00, 0x0C7F),), ('te',)),
+    ('thai', ((0x0E00, 0x0E7F),), ('th',)),
+    ('ethiopic', ((0x1200, 0x137F),), ('am',)),
+    ('hangul', ((0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7AF)), ('ko',)),
+    ('kana', ((0x3040, 0x30FF), (0x31F0, 0x31FF)), ('ja',)),
+    ('han', ((0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF)), ('zh', 'zh-tw')),
+]
+
+# Fast offline language identifier: script ranges narrow the candidates, then
+# character trigram profiles built from LANGUAGE_SEED_TEXT pick the language
+class LanguageDetector:
+    UNSEEN = -12.0
+
+    def __init__(self, languages=None):
+        self.languages = set(languages) if languages else None
+        self.ranges = sorted((low, high, script) for script, ranges, _ in LANGUAGE_SCRIPTS for low, high in ranges)
+        self.range_starts = [low for low, _, _ in self.ranges]
+        latin = tuple(code for code, text in LANGUAGE_SEED_TEXT.items()
+                      if all(self._script(ch) in (None, 'latin') for ch in set(text)))
+        self.script_candidates = {
+            script: tuple(code for code in (codes or latin) if self._allowed(code))
+            for script, _, codes in LANGUAGE_SCRIPTS
+        }
+
+        # Inverted index: trigram -> list of (language code, log probability above UNSEEN)
+        self.index = {}
+        for code, text in LANGUAGE_SEED_TEXT.items():
+            if not self._allowed(code) or code.startswith('zh'):
+                continue
+            counts = {}
+            for gram in self._trigrams(text):
+                counts[gram] = counts.get(gram, 0) + 1
+            total = sum(counts.values())
+            for gram, count in counts.items():
+                self.index.setdefault(gram, []).append((code, math.log(count / total) - self.UNSEEN))
+
+        # Simplified and Traditional Chinese are told apart by characters unique to each form
+        simplified = set(LANGUAGE_SEED_TEXT['zh'])
+        traditional = set(LANGUAGE_SEED_TEXT['zh-tw'])
+        self.simplified_only = simplified - traditional
+        self.traditional_only = traditional - simplified
+
+    def _allowed(self, code):
+        return self.languages is None or code in self.languages
+
+    def _script(self, ch):
+        point = ord(ch)
+        position = bisect.bisect_right(self.range_starts, point) - 1
+        if position >= 0:
+            low, high, script = self.ranges[position]
+            if point <= high:
+                return script
+        return None
+
+    @staticmethod
+    def _trigrams(text):
+        for word in text.casefold().split():
+            word = word.strip('.,!?¿¡;:"()«»…“”„')
+            if not word:
+                continue
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3]
+
+    def dominant_script(self, text):
+        """Return the script most letters in text belong to, or None"""
+        counts = {}
+        for ch in text:
+            if ch.isalpha():
+                script = self._script(ch)
+                if script:
+                    counts[script] = counts.get(script, 0) + 1
+        if not counts:
+            return None
+        # Japanese mixes kana with Han characters
+        if 'kana' in counts:
+            return 'kana'
+        return max(counts, key=counts.get)
+
+    def detect(self, text):
+        """Return (language code, confidence between 0 and 1), or (None, 0.0)"""
+        script = self.dominant_script(text)
+        candidates = self.script_candidates.get(script, ())
+        if not candidates:
+            return None, 0.0
+        if len(candidates) == 1:
+            return candidates[0], 1.0
+
+        if script == 'han':
+            simplified = sum(1 for ch in text if ch in self.simplified_only)
+            traditional = sum(1 for ch in text if ch in self.traditional_only)
+            if traditional > simplified and 'zh-tw' in candidates:
+                return 'zh-tw', traditional / (simplified + traditional)
+            if simplified:
+                return 'zh', simplified / (simplified + traditional)
+            return candidates[0], 0.5
+
+        grams = list(self._trigrams(text))
+        if not grams:
+            return None, 0.0
+        scores = dict.fromkeys(candidates, 0.0)
+        for gram in grams:
+            for code, weight in self.index.get(gram, ()):
+                if code in scores:
+                    scores[code] += weight
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        best, best_score = ranked[0]
+        if best_score <= 0:
+            return None, 0.0
+        # Confidence grows with the margin over the runner-up, relative to the evidence seen
+        margin = best_score - ranked[1][1]
+        return best, min(1.0, 4 * margin / (abs(self.UNSEEN) * len(grams)))
+
+# Fallback translator using offline phrasebooks (limited functionality)
+class FallbackTranslator:
+    def __init__(self, phrasebook_path=PHRASEBOOK_FILE):
         self.basic_translations = {
             'en': {
                 'hello': {'es': 'hola', 'fr': 'bonjour', 'de': 'hallo', 'it': 'ciao'},
@@ -46,42 +898,2672 @@ class FallbackTranslator:
                 'food': {'es': 'comida', 'fr': 'nourriture', 'de': 'essen', 'it': 'cibo'}
             }
         }
+        
+        # Installed phrase pack first, then the built-in basics
+        self.phrasebooks = []
+        if phrasebook_path and os.path.exists(phrasebook_path):
+            try:
+                self.phrasebooks.append(Phrasebook(phrasebook_path))
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Phrasebook error: {e}", file=sys.stderr)
+        basic_rows = [dict(translations, en=phrase)
+                      for phrase, translations in self.basic_translations['en'].items()]
+        self.phrasebooks.append(Phrasebook(data=Phrasebook.compile(basic_rows)))
     
     def translate(self, text, src='en', dest='es'):
-        text_lower = text.lower().strip()
-        if src in self.basic_translations and text_lower in self.basic_translations[src]:
-            if dest in self.basic_translations[src][text_lower]:
-                return self.basic_translations[src][text_lower][dest]
+        # Segment the same normalized string the token offsets point into
+        text = unicodedata.normalize('NFC', text)
+        tokens = phrase_tokens(text)
+        languages = [src]
+        if src == 'auto':
+            languages = sorted({code for book in self.phrasebooks for code in book.languages})
+        
+        # Use the source language under which the most tokens are covered
+        best = None
+        for language in languages:
+            pieces, covered = self._segment(text, tokens, language, dest)
+            if covered and (best is None or covered > best[1]):
+                best = (pieces, covered)
+        if best:
+            return "".join(best[0]).strip()
         
         # If no translation found, return original text with a note
         return f"[Translation not available] {text}"
 
+    def translate_batch(self, texts, src='en', dest='es'):
+        """Translate a list of texts, returning a list of strings in the same order"""
+        return [self.translate(text, src=src, dest=dest) if text.strip() else text for text in texts]
+
+    def _segment(self, text, tokens, src, dest):
+        """Greedy longest-match segmentation; unknown words are kept as they are"""
+        keys = [token for token, _, _ in tokens]
+        pieces = []
+        covered = 0
+        position = 0
+        index = 0
+        while index < len(keys):
+            length, translated = 0, None
+            for book in self.phrasebooks:
+                match_length, concept = book.longest_match(keys, index, src)
+                if match_length > length:
+                    phrase = book.phrase(concept, dest)
+                    if phrase is not None:
+                        length, translated = match_length, phrase
+            if not length:
+                index += 1
+                continue
+            start = tokens[index][1]
+            end = tokens[index + length - 1][2]
+            if text[start].isupper() and translated[:1].islower():
+                translated = translated[0].upper() + translated[1:]
+            pieces.append(text[position:start])
+            pieces.append(translated)
+            position = end
+            covered += length
+            index += length
+        pieces.append(text[position:])
+        return pieces, covered
+
+# Result object with .text attribute, shared by every translator backend
+class TranslationResult:
+    def __init__(self, text, backend=None):
+        self.text = text
+        self.backend = backend
+
+def normalize_cache_text(text):
+    """Normalize text for use as a translation cache key"""
+    return " ".join(unicodedata.normalize('NFC', text).split())
+
+# Two-tier (memory LRU + SQLite) cache of finished translations
+class TranslationCache:
+    def __init__(self, path=CACHE_FILE, memory_size=1024, max_entries=50000, ttl=30 * 24 * 3600):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        # SQLite has its own lock so memory hits never wait on disk I/O; take it before self.lock
+        self.db_lock = threading.Lock()
+        # Disk access times from get(), written in one batch by the next put, prune or close
+        self.accessed = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db = None
+        self.writes_since_prune = 0
+        if path:
+            try:
+                self.db = sqlite3.connect(path, check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    "src TEXT NOT NULL, dest TEXT NOT NULL, text TEXT NOT NULL, "
+                    "translation TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL, "
+                    "PRIMARY KEY (src, dest, text))"
+                )
+                self.db.execute("CREATE INDEX IF NOT EXISTS translations_accessed ON translations (accessed)")
+                self.db.commit()
+                self.prune()
+            except sqlite3.Error as e:
+                print(f"Translation cache unavailable: {e}", file=sys.stderr)
+                self.db = None
+
+    def get(self, text, src, dest):
+        """Return a cached translation or None"""
+        key = (normalize_cache_text(text), src, dest)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                translation, created = entry
+                if now - created <= self.ttl:
+                    self.memory.move_to_end(key)
+                    self.hits += 1
+                    return translation
+                del self.memory[key]
+
+        row = None
+        with self.db_lock:
+            if self.db is not None:
+                try:
+                    row = self.db.execute(
+                        "SELECT translation, created FROM translations WHERE src = ? AND dest = ? AND text = ?",
+                        (src, dest, key[0])
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Translation cache read error: {e}", file=sys.stderr)
+
+        with self.lock:
+            if row and now - row[1] <= self.ttl:
+                self._remember(key, row[0], row[1])
+                self.accessed[key] = now
+                self.hits += 1
+                self.disk_hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, text, src, dest, translation):
+        """Store a translation in both tiers"""
+        key = (normalize_cache_text(text), src, dest)
+        now = time.time()
+        with self.lock:
+            self._remember(key, translation, now)
+            self.accessed.pop(key, None)
+        self._write([(src, dest, key[0], translation, now, now)])
+
+    def put_many(self, entries):
+        """Store (text, src, dest, translation) tuples on disk in one transaction; returns how many"""
+        now = time.time()
+        rows = [(src, dest, normalize_cache_text(text), translation, now, now)
+                for text, src, dest, translation in entries]
+        if self.db is None or not rows:
+            return 0
+        return len(rows) if self._write(rows) else 0
+
+    def _write(self, rows):
+        """Insert rows on disk along with pending access times; returns False on error"""
+        with self.db_lock:
+            if self.db is None:
+                return False
+            try:
+                self._flush_accessed()
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO translations (src, dest, text, translation, created, accessed) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self.db.commit()
+                self.writes_since_prune += len(rows)
+                if self.writes_since_prune >= 500:
+                    self._prune_locked()
+                return True
+            except sqlite3.Error as e:
+                print(f"Translation cache write error: {e}", file=sys.stderr)
+                return False
+
+    def _flush_accessed(self):
+        """Queue the batched access-time updates; the caller holds db_lock and commits"""
+        with self.lock:
+            accessed, self.accessed = self.accessed, {}
+        if accessed:
+            self.db.executemany(
+                "UPDATE translations SET accessed = ? WHERE src = ? AND dest = ? AND text = ?",
+                [(when, src, dest, text) for (text, src, dest), when in accessed.items()]
+            )
+
+    def _remember(self, key, translation, created):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self.memory[key] = (translation, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def prune(self):
+        """Drop expired entries and trim the disk tier to max_entries"""
+        with self.db_lock:
+            self._prune_locked()
+
+    def _prune_locked(self):
+        self.writes_since_prune = 0
+        if self.db is None:
+            return
+        try:
+            self._flush_accessed()
+            self.db.execute("DELETE FROM translations WHERE created < ?", (time.time() - self.ttl,))
+            count = self.db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            if count > self.max_entries:
+                self.db.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY accessed LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self.db.commit()
+        except sqlite3.Error as e:
+            print(f"Translation cache prune error: {e}", file=sys.stderr)
+
+    def clear(self):
+        """Remove every cached translation"""
+        with self.db_lock:
+            with self.lock:
+                self.memory.clear()
+                self.accessed.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM translations")
+                self.db.commit()
+
+    def stats(self):
+        """Return hit/miss counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_entries': len(self.memory),
+            }
+
+    def close(self):
+        """Write pending access times and close the disk tier"""
+        with self.db_lock:
+            if self.db is not None:
+                try:
+                    self._flush_accessed()
+                    self.db.commit()
+                except sqlite3.Error as e:
+                    print(f"Translation cache write error: {e}", file=sys.stderr)
+                self.db.close()
+                self.db = None
+
+# Numbers are masked before fuzzy matching so "gate 12" and "gate 14" look identical
+MEMORY_NUMBER_RE = re.compile(r'\d+(?:[.,:]\d+)*')
+MEMORY_HASH_MASK = (1 << 64) - 1
+
+# Stored translation in the fuzzy memory
+MemoryEntry = namedtuple('MemoryEntry', 'text translation src dest shingles keys')
+
+# Near-duplicate match returned by TranslationMemory.lookup
+MemoryMatch = namedtuple('MemoryMatch', 'translation source similarity')
+
+# Fuzzy translation memory: MinHash signatures bucketed with LSH, per language pair
+class TranslationMemory:
+    def __init__(self, threshold=0.9, num_perm=32, bands=8, max_entries=100000, substitute=True,
+                 max_candidates=50):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.substitute = substitute
+        self.max_candidates = max_candidates
+        self.entries = OrderedDict()
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def is_placeholder(token, position):
+        """Numbers and capitalized words after the first (likely names) may be substituted"""
+        return any(char.isdigit() for char in token) or (position > 0 and token[:1].isupper())
+
+    @classmethod
+    def shingles(cls, text):
+        """Character trigrams of the case-folded, placeholder-masked, punctuation-free text"""
+        tokens = PHRASE_TOKEN_RE.findall(unicodedata.normalize('NFC', text))
+        words = ['#' if cls.is_placeholder(token, position) else token.casefold()
+                 for position, token in enumerate(tokens)]
+        normalized = f" {' '.join(words)} "
+        if len(normalized) <= 3:
+            return {normalized}
+        return {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+
+    def signature_keys(self, shingles, src, dest):
+        """Return one LSH bucket key per band"""
+        # One-permutation MinHash: each shingle is hashed once and lands in one bin
+        bins = self.rows * self.bands
+        signature = [None] * bins
+        for shingle in shingles:
+            value = hash(shingle) & MEMORY_HASH_MASK
+            slot = value % bins
+            if signature[slot] is None or value < signature[slot]:
+                signature[slot] = value
+        # Empty bins borrow from the next filled one (rotation densification)
+        for slot in range(bins):
+            if signature[slot] is None:
+                offset = 1
+                while signature[(slot + offset) % bins] is None:
+                    offset += 1
+                signature[slot] = (signature[(slot + offset) % bins], offset)
+        return [(src, dest, band, hash(tuple(signature[band * self.rows:(band + 1) * self.rows])))
+                for band in range(self.bands)]
+
+    def add(self, text, translation, src, dest):
+        """Remember a finished translation"""
+        if not text.strip() or not translation or src == 'auto':
+            return
+        shingles = self.shingles(text)
+        keys = self.signature_keys(shingles, src, dest)
+        with self.lock:
+            entry_id = self.next_id
+            self.next_id += 1
+            self.entries[entry_id] = MemoryEntry(text, translation, src, dest, frozenset(shingles), keys)
+            for key in keys:
+                self.buckets.setdefault(key, []).append(entry_id)
+            while len(self.entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        entry_id, entry = self.entries.popitem(last=False)
+        for key in entry.keys:
+            bucket = self.buckets[key]
+            bucket.remove(entry_id)
+            if not bucket:
+                del self.buckets[key]
+
+    def lookup(self, text, src, dest):
+        """Return the closest stored translation at or above the threshold, or None"""
+        if src == 'auto' or not text.strip():
+            return None
+        shingles = self.shingles(text)
+        keys = self.signature_keys(shingles, src, dest)
+        with self.lock:
+            # Newest first, so a corrected translation wins over an older one
+            candidates = sorted({entry_id for key in keys for entry_id in self.buckets.get(key, ())},
+                                reverse=True)[:self.max_candidates]
+            scored = []
+            for entry_id in candidates:
+                entry = self.entries[entry_id]
+                similarity = len(shingles & entry.shingles) / len(shingles | entry.shingles)
+                if similarity >= self.threshold:
+                    scored.append((similarity, entry_id, entry))
+        for similarity, _, entry in sorted(scored, key=lambda item: item[:2], reverse=True):
+            translation = self.adapt(entry, text)
+            if translation is not None:
+                with self.lock:
+                    self.hits += 1
+                return MemoryMatch(translation, entry.text, similarity)
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def adapt(self, entry, text):
+        """Carry changed numbers and names over into the stored translation
+
+        Only placeholder substitutions are adapted; case and punctuation never differ here
+        because tokens are compared case-folded and punctuation isn't tokenized. Any other
+        inserted, deleted or replaced word ("left"/"right", an added "not") can change the
+        meaning, so it returns None and the backend translates instead, as it also does
+        when a changed placeholder can't be placed.
+        """
+        old_tokens = PHRASE_TOKEN_RE.findall(entry.text)
+        new_tokens = PHRASE_TOKEN_RE.findall(text)
+        matcher = SequenceMatcher(None, [token.casefold() for token in old_tokens],
+                                  [token.casefold() for token in new_tokens], autojunk=False)
+        replacements = {}
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            if tag != 'replace' or i2 - i1 != j2 - j1:
+                return None
+            for offset, (old, new) in enumerate(zip(old_tokens[i1:i2], new_tokens[j1:j2])):
+                if not (self.is_placeholder(old, i1 + offset) and self.is_placeholder(new, j1 + offset)):
+                    return None
+                if not self.substitute or replacements.get(old, new) != new:
+                    return None
+                if len(re.findall(rf'(?<!\w){re.escape(old)}(?!\w)', entry.translation)) != 1:
+                    return None
+                replacements[old] = new
+        if not replacements:
+            return entry.translation
+        pattern = re.compile(r'(?<!\w)(' + '|'.join(map(re.escape, replacements)) + r')(?!\w)')
+        return pattern.sub(lambda match: replacements[match.group(1)], entry.translation)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        """Return size and hit counters"""
+        with self.lock:
+            return {'entries': len(self.entries), 'buckets': len(self.buckets),
+                    'hits': self.hits, 'misses': self.misses}
+
+# Stand-in for the requests module that routes deep_translator's calls through one Session
+class _SessionRequests:
+    def __init__(self, session, timeout=10):
+        self.session = session
+        self.timeout = timeout
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.post(url, **kwargs)
+
+    def __getattr__(self, name):
+        import requests
+        return getattr(requests, name)
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+def shared_http_session():
+    """Return the keep-alive Session used by every pooled translator client"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _shared_session = session
+            shim = _SessionRequests(session)
+            # deep_translator has no session hook, so each engine module's requests is swapped;
+            # if a release renames either, fall back to its own per-call connections, loudly
+            for name, engine in TRANSLATOR_ENGINES.items():
+                try:
+                    module = importlib.import_module(f"deep_translator.{engine.module}")
+                except ImportError as e:
+                    print(f"Warning: can't share HTTP connections with the {name} engine: {e}", file=sys.stderr)
+                    continue
+                if not hasattr(module, 'requests'):
+                    print(f"Warning: deep_translator.{engine.module} no longer uses requests; "
+                          f"the {name} engine opens a connection per call", file=sys.stderr)
+                    continue
+                module.requests = shim
+        return _shared_session
+
+# deep_translator engines usable as routing backends
+TranslatorEngine = namedtuple('TranslatorEngine', 'class_name module max_chars auto_detect key_env')
+TRANSLATOR_ENGINES = {
+    'google': TranslatorEngine('GoogleTranslator', 'google', 4500, True, None),
+    'mymemory': TranslatorEngine('MyMemoryTranslator', 'mymemory', 450, False, None),
+    'deepl': TranslatorEngine('DeeplTranslator', 'deepl', 4500, True, 'DEEPL_API_KEY'),
+    'microsoft': TranslatorEngine('MicrosoftTranslator', 'microsoft', 4500, True, 'MICROSOFT_API_KEY'),
+    'libre': TranslatorEngine('LibreTranslator', 'libre', 4500, True, 'LIBRE_API_KEY'),
+}
+
+def configured_engines():
+    """Return the engines that need no API key or whose key is set in the environment"""
+    return [name for name, engine in TRANSLATOR_ENGINES.items()
+            if engine.key_env is None or os.environ.get(engine.key_env)]
+
+def engine_language(engine, code):
+    """Map one of our Google-style language codes to the code an engine expects"""
+    if engine != 'mymemory' or code == 'auto':
+        return code
+    # MyMemory wants locale codes ('fr-FR'); match exactly, then by language name, then by prefix
+    from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES, MY_MEMORY_LANGUAGES_TO_CODES
+    for locale in MY_MEMORY_LANGUAGES_TO_CODES.values():
+        if locale.lower() == code.lower():
+            return locale
+    for name, google_code in GOOGLE_LANGUAGES_TO_CODES.items():
+        if google_code.lower() == code.lower() and name in MY_MEMORY_LANGUAGES_TO_CODES:
+            return MY_MEMORY_LANGUAGES_TO_CODES[name]
+    for locale in MY_MEMORY_LANGUAGES_TO_CODES.values():
+        if locale.lower().startswith(code.lower() + '-'):
+            return locale
+    return code
+
+# Pool of warm translator clients, keyed by language pair
+class TranslatorPool:
+    def __init__(self, max_clients=32, idle_timeout=300, base_url=None, engine='google'):
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.base_url = base_url
+        self.engine = engine
+        self.idle = OrderedDict()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def create_client(self, src, dest):
+        """Construct a new client; language validation happens here, once per client"""
+        shared_http_session()
+        client_class = getattr(deep_translator, TRANSLATOR_ENGINES[self.engine].class_name)
+        client = client_class(source=engine_language(self.engine, src),
+                              target=engine_language(self.engine, dest))
+        if self.base_url:
+            # Private attribute; refuse rather than silently send traffic to the real service
+            if not hasattr(client, '_base_url'):
+                raise TranslationError(f"Can't point {type(client).__name__} at {self.base_url}: "
+                                       f"this deep_translator version has no _base_url")
+            client._base_url = self.base_url
+        return client
+
+    def acquire(self, src, dest):
+        """Check out a client for (src, dest), creating one if none is idle"""
+        with self.lock:
+            self._evict_idle()
+            clients = self.idle.get((src, dest))
+            if clients:
+                client, _ = clients.pop()
+                if not clients:
+                    del self.idle[(src, dest)]
+                self.reused += 1
+                return client
+            self.created += 1
+        return self.create_client(src, dest)
+
+    def release(self, src, dest, client):
+        """Return a client to the pool so the next request for the pair can reuse it"""
+        with self.lock:
+            self.idle.setdefault((src, dest), []).append((client, time.monotonic()))
+            self.idle.move_to_end((src, dest))
+            while self._idle_count() > self.max_clients:
+                pair, clients = next(iter(self.idle.items()))
+                clients.pop(0)
+                if not clients:
+                    del self.idle[pair]
+
+    def translate(self, text, src, dest):
+        """Translate text with a pooled client"""
+        client = self.acquire(src, dest)
+        # A client that raised is dropped; a fresh one is built on the next request
+        result = client.translate(text)
+        self.release(src, dest, client)
+        return result
+
+    def _idle_count(self):
+        return sum(len(clients) for clients in self.idle.values())
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        for pair in list(self.idle):
+            clients = [entry for entry in self.idle[pair] if entry[1] >= cutoff]
+            if clients:
+                self.idle[pair] = clients
+            else:
+                del self.idle[pair]
+
+    def stats(self):
+        """Return client reuse counters"""
+        with self.lock:
+            return {'created': self.created, 'reused': self.reused, 'idle': self._idle_count()}
+
+# Local HTTP server that mimics the Google endpoint for offline benchmarking
+class StubTranslationServer:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.server.server_address[1]}/m"
+
+    @property
+    def recognize_url(self):
+        """Speech endpoint: POST WAV data, get {"transcript": ...} back"""
+        return f"http://{self.host}:{self.server.server_address[1]}/recognize"
+
+    def _fail(self):
+        """Count a request and decide whether it gets an injected error"""
+        with self.lock:
+            self.requests += 1
+            failed = self.error_rate and self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return failed
+
+    def start(self):
+        """Start serving in a daemon thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import urlparse, parse_qs
+        from html import escape
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                text = params.get('q', [''])[0]
+                target = params.get('tl', ['en'])[0]
+                if stub._fail():
+                    self.respond(503, 'text/html', b'Service Unavailable')
+                    return
+                translated = "\n".join(f"[{target}] {line}" for line in text.split("\n"))
+                body = f'<html><body><div class="t0">{escape(translated)}</div></body></html>'
+                self.respond(200, 'text/html; charset=utf-8', body.encode('utf-8'))
+
+            def do_POST(self):
+                audio = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if stub._fail():
+                    self.respond(503, 'application/json', b'{"error": "unavailable"}')
+                    return
+                transcript = json.dumps({'transcript': f"stub transcript of {len(audio)} bytes"})
+                self.respond(200, 'application/json', transcript.encode('utf-8'))
+
+            def respond(self, status, content_type, payload):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+class TranslationError(Exception):
+    """Raised when a translation backend could not translate a request"""
+
+# Exception class names (deep_translator and requests) worth retrying after a pause
+RETRYABLE_ERROR_NAMES = {'TooManyRequests', 'RequestError', 'ServerException', 'Timeout', 'ChunkedEncodingError'}
+
+def is_retryable_error(error):
+    """Return True for throttling, network and server-side failures"""
+    if isinstance(error, OSError):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+# Token bucket: allows bursts of up to `burst` requests, then `rate` requests per second
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how long the caller must wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+# One in-flight request that identical concurrent requests wait on
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+# Single-flight deduplication, client-side rate limiting and retries for a backend
+class RequestScheduler:
+    def __init__(self, rate=5.0, burst=10, max_retries=3, base_delay=0.5, max_delay=8.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.failures = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def call(self, key, fn):
+        """Run fn() for key, or wait for the identical request that is already running"""
+        with self.lock:
+            self.requests += 1
+            flight = self.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._run(fn)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[key]
+            flight.done.set()
+
+    def _run(self, fn):
+        attempt = 0
+        while True:
+            self._wait_for_token()
+            try:
+                return fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    with self.lock:
+                        self.failures += 1
+                    raise
+                attempt += 1
+                with self.lock:
+                    self.retries += 1
+                # Full jitter keeps retrying clients from synchronizing
+                time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def _wait_for_token(self):
+        delay = self.bucket.reserve()
+        if delay <= 0:
+            return
+        with self.lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        time.sleep(delay)
+        with self.lock:
+            self.waiting -= 1
+            self.total_wait += delay
+            self.max_wait = max(self.max_wait, delay)
+
+    def stats(self):
+        """Return dedup, retry, queue depth and wait-time counters"""
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'coalesced': self.coalesced,
+                'retries': self.retries,
+                'failures': self.failures,
+                'queue_depth': self.waiting,
+                'max_queue_depth': self.max_waiting,
+                'total_wait': self.total_wait,
+                'max_wait': self.max_wait,
+            }
+
 # DeepTranslator wrapper to maintain compatibility
 class DeepTranslatorWrapper:
-    def __init__(self):
+    def __init__(self, cache=None, pool=None, scheduler=None, engine='google'):
         self.translator = None
+        self.engine = engine
+        # Providers reject oversized payloads (Google at 5000 characters, MyMemory at 500)
+        self.max_batch_chars = TRANSLATOR_ENGINES[engine].max_chars
+        self.cache = cache
+        self.pool = pool or TranslatorPool(engine=engine)
+        self.scheduler = scheduler or RequestScheduler()
         
     def translate(self, text, src='auto', dest='en'):
+        # Serve repeated phrases from the cache; 'auto' results depend on detection so skip them
+        if self.cache is not None and src != 'auto':
+            cached = self.cache.get(text, src, dest)
+            if cached is not None:
+                return TranslationResult(cached)
+
+        translated_text = self._request(text, src, dest)
+        if self.cache is not None and src != 'auto' and translated_text:
+            self.cache.put(text, src, dest, translated_text)
+
+        # Return object with .text attribute for compatibility
+        return TranslationResult(translated_text)
+
+    def _request(self, text, src, dest):
+        """Send one request through the scheduler; raises TranslationError once retries run out"""
         try:
-            # Create translator instance for this translation
-            translator = GoogleTranslator(source=src, target=dest)
-            translated_text = translator.translate(text)
-            
-            # Return object with .text attribute for compatibility
-            class TranslationResult:
-                def __init__(self, text):
-                    self.text = text
-                    
-            return TranslationResult(translated_text)
-            
+            # Reuse a warm client for this language pair
+            return self.scheduler.call((normalize_cache_text(text), src, dest),
+                                       lambda: self.pool.translate(text, src, dest))
         except Exception as e:
-            print(f"Translation error: {e}")
-            # Return original text if translation fails
-            class TranslationResult:
-                def __init__(self, text):
-                    self.text = text
-                    
-            return TranslationResult(text)
+            raise TranslationError(f"{type(e).__name__}: {e}") from e
+
+    def translate_batch(self, texts, src='auto', dest='en'):
+        """Translate a list of texts, returning a list of strings in the same order
+
+        Cached and duplicate segments are resolved locally; the remaining ones are
+        packed into newline-joined requests of up to max_batch_chars characters.
+        """
+        results = [None] * len(texts)
+        pending = OrderedDict()
+        for index, text in enumerate(texts):
+            if not text.strip():
+                results[index] = text
+                continue
+            if self.cache is not None and src != 'auto':
+                cached = self.cache.get(text, src, dest)
+                if cached is not None:
+                    results[index] = cached
+                    continue
+            pending.setdefault(text, []).append(index)
+
+        for group in self._pack_batches(list(pending)):
+            for text, translated_text in zip(group, self._translate_group(group, src, dest)):
+                for index in pending[text]:
+                    results[index] = translated_text
+        return results
+
+    def _pack_batches(self, texts):
+        """Group texts into newline-joined requests that fit the provider's size limit"""
+        group = []
+        size = 0
+        for text in texts:
+            # Multi-line or oversized segments can't be split back reliably, so send them alone
+            if '\n' in text or len(text) >= self.max_batch_chars:
+                yield [text]
+                continue
+            if group and size + len(text) + 1 > self.max_batch_chars:
+                yield group
+                group = []
+                size = 0
+            group.append(text)
+            size += len(text) + 1
+        if group:
+            yield group
+
+    def _translate_group(self, group, src, dest):
+        """Translate one packed request, falling back to per-segment calls on misalignment"""
+        if len(group) > 1:
+            parts = self._request("\n".join(group), src, dest).split("\n")
+            if len(parts) == len(group):
+                if self.cache is not None and src != 'auto':
+                    for text, translated_text in zip(group, parts):
+                        if translated_text:
+                            self.cache.put(text, src, dest, translated_text)
+                return parts
+        return [self.translate(text, src=src, dest=dest).text for text in group]
+
+def percentile(ordered, q):
+    """Return the q-th percentile (nearest rank) of an already sorted list, or None if empty"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+# Rolling latency and error statistics for one backend, with a circuit breaker
+class BackendHealth:
+    def __init__(self, window=50, failure_threshold=3, cooldown=30.0):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def record(self, ok, latency=None):
+        """Record one call; latency is None for calls whose timing isn't comparable (batches)"""
+        with self.lock:
+            self.outcomes.append(ok)
+            if ok:
+                if latency is not None:
+                    self.latencies.append(latency)
+                self.consecutive_failures = 0
+                self.opened_at = None
+            else:
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= self.failure_threshold:
+                    # Open (or re-open after a failed half-open trial)
+                    self.opened_at = time.monotonic()
+
+    def state(self):
+        """Return 'closed', 'open', or 'half-open' once the cooldown has passed"""
+        with self.lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                return 'half-open'
+            return 'open'
+
+    def percentile(self, q):
+        """Return the q-th latency percentile in seconds, or None without samples"""
+        with self.lock:
+            ordered = sorted(self.latencies)
+        return percentile(ordered, q)
+
+    def error_rate(self):
+        with self.lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+
+    def snapshot(self):
+        """Return the health figures shown in stats()"""
+        return {
+            'state': self.state(),
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'error_rate': self.error_rate(),
+            'calls': len(self.outcomes),
+        }
+
+# Routes each request to the fastest healthy backend, failing over and hedging slow calls
+class TranslatorRouter:
+    def __init__(self, fallback=None, cache=None, hedge=True, min_hedge_delay=0.25,
+                 default_hedge_delay=1.5, max_error_rate=0.5, memory=None):
+        self.backends = OrderedDict()
+        self.memory = memory
+        self.health = {}
+        self.auto_detect = {}
+        self.fallback = fallback
+        self.cache = cache
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.max_error_rate = max_error_rate
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='travelspeak-route')
+        self.lock = threading.Lock()
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    def register(self, name, backend, auto_detect=True):
+        """Add a backend; it should not cache, since the router owns the shared cache"""
+        self.backends[name] = backend
+        self.health[name] = BackendHealth()
+        self.auto_detect[name] = auto_detect
+        return backend
+
+    def ranked(self, src='auto'):
+        """Return backend names ordered fastest-first, unhealthy ones last and open ones dropped"""
+        candidates = []
+        for name in self.backends:
+            if src == 'auto' and not self.auto_detect[name]:
+                continue
+            health = self.health[name]
+            state = health.state()
+            if state == 'open':
+                continue
+            p50 = health.percentile(50)
+            healthy = state == 'closed' and health.error_rate() <= self.max_error_rate
+            # Backends without samples go first so every one gets measured
+            candidates.append((not healthy, p50 is not None, p50 or 0.0, name))
+        candidates.sort()
+        return [candidate[-1] for candidate in candidates]
+
+    def translate(self, text, src='auto', dest='en'):
+        """Translate text on the best available backend, or the fallback if all of them fail"""
+        # 'auto' results depend on detection so they're never cached
+        if self.cache is not None and src != 'auto':
+            cached = self.cache.get(text, src, dest)
+            if cached is not None:
+                METRICS.inc('travelspeak_translation_lookups_total', source='cache')
+                return TranslationResult(cached, backend='cache')
+        if self.memory is not None:
+            match = self.memory.lookup(text, src, dest)
+            if match is not None:
+                METRICS.inc('travelspeak_translation_lookups_total', source='memory')
+                return TranslationResult(match.translation, backend='memory')
+
+        try:
+            name, translated_text = self._race(self.ranked(src), text, src, dest)
+        except TranslationError:
+            if self.fallback is None:
+                raise
+            with self.lock:
+                self.fallbacks += 1
+            METRICS.inc('travelspeak_translation_lookups_total', source='phrasebook')
+            return TranslationResult(self.fallback.translate(text, src=src, dest=dest), backend='phrasebook')
+
+        if self.cache is not None and src != 'auto' and translated_text:
+            self.cache.put(text, src, dest, translated_text)
+        if self.memory is not None:
+            self.memory.add(text, translated_text, src, dest)
+        METRICS.inc('travelspeak_translation_lookups_total', source='backend')
+        return TranslationResult(translated_text, backend=name)
+
+    def _call(self, name, text, src, dest):
+        started = time.perf_counter()
+        try:
+            translated_text = self.backends[name].translate(text, src=src, dest=dest).text
+        except Exception as e:
+            self.health[name].record(False)
+            METRICS.inc('travelspeak_backend_requests_total', backend=name, outcome='error')
+            if isinstance(e, TranslationError):
+                raise
+            raise TranslationError(f"{type(e).__name__}: {e}") from e
+        elapsed = time.perf_counter() - started
+        self.health[name].record(True, elapsed)
+        METRICS.inc('travelspeak_backend_requests_total', backend=name, outcome='ok')
+        METRICS.observe('travelspeak_backend_seconds', elapsed, backend=name)
+        return translated_text
+
+    def _hedge_delay(self, name):
+        p95 = self.health[name].percentile(95)
+        return max(self.min_hedge_delay, p95 if p95 is not None else self.default_hedge_delay)
+
+    def _race(self, candidates, text, src, dest):
+        """Run candidates in order; a second one starts early if the first is slower than its p95"""
+        queue = list(candidates)
+        pending = {}
+        errors = []
+
+        def launch():
+            name = queue.pop(0)
+            pending[self.executor.submit(self._call, name, text, src, dest)] = name
+
+        if queue:
+            launch()
+        while pending:
+            timeout = None
+            if self.hedge and queue and len(pending) == 1:
+                timeout = self._hedge_delay(next(iter(pending.values())))
+            done, _ = wait_futures(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                with self.lock:
+                    self.hedged += 1
+                launch()
+                continue
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    translated_text = future.result()
+                except TranslationError as e:
+                    errors.append(f"{name}: {e}")
+                    continue
+                # The slower call keeps running; its timing still feeds the health stats
+                if pending and name != candidates[0]:
+                    with self.lock:
+                        self.hedge_wins += 1
+                return name, translated_text
+            if queue and len(pending) < 2:
+                launch()
+        raise TranslationError("; ".join(errors) or "No translation backend available")
+
+    def translate_batch(self, texts, src='auto', dest='en', with_backend=False):
+        """Translate a list of texts, returning a list of strings in the same order
+
+        With with_backend=True a (results, backend name) pair is returned instead.
+        """
+        results = [None] * len(texts)
+        pending = OrderedDict()
+        for index, text in enumerate(texts):
+            if not text.strip():
+                results[index] = text
+                continue
+            if self.cache is not None and src != 'auto':
+                cached = self.cache.get(text, src, dest)
+                if cached is not None:
+                    results[index] = cached
+                    continue
+            pending.setdefault(text, []).append(index)
+        memory_hits = 0
+        if self.memory is not None:
+            for text in list(pending):
+                match = self.memory.lookup(text, src, dest)
+                if match is not None:
+                    for index in pending.pop(text):
+                        results[index] = match.translation
+                    memory_hits += 1
+        if not pending:
+            backend = 'memory' if memory_hits else 'cache'
+            return (results, backend) if with_backend else results
+
+        unique = list(pending)
+        # Batches are too long to hedge; fail over between backends instead
+        translated, errors, backend = None, [], 'phrasebook'
+        for name in self.ranked(src):
+            started = time.perf_counter()
+            try:
+                translated = self.backends[name].translate_batch(unique, src=src, dest=dest)
+            except Exception as e:
+                self.health[name].record(False)
+                METRICS.inc('travelspeak_backend_requests_total', backend=name, outcome='error')
+                errors.append(f"{name}: {type(e).__name__}: {e}")
+                continue
+            elapsed = time.perf_counter() - started
+            # A one-segment batch is a single request, so its timing is comparable
+            self.health[name].record(True, elapsed if len(unique) == 1 else None)
+            METRICS.inc('travelspeak_backend_requests_total', backend=name, outcome='ok')
+            METRICS.observe('travelspeak_backend_batch_seconds', elapsed, backend=name)
+            if self.cache is not None and src != 'auto':
+                for text, translated_text in zip(unique, translated):
+                    if translated_text:
+                        self.cache.put(text, src, dest, translated_text)
+            if self.memory is not None:
+                for text, translated_text in zip(unique, translated):
+                    self.memory.add(text, translated_text, src, dest)
+            backend = name
+            break
+        if translated is None:
+            if self.fallback is None:
+                raise TranslationError("; ".join(errors) or "No translation backend available")
+            with self.lock:
+                self.fallbacks += 1
+            translated = self.fallback.translate_batch(unique, src=src, dest=dest)
+
+        for text, translated_text in zip(unique, translated):
+            for index in pending[text]:
+                results[index] = translated_text
+        return (results, backend) if with_backend else results
+
+    def max_chars(self):
+        """Return the largest request every registered backend accepts"""
+        return min((getattr(backend, 'max_batch_chars', 4500) for backend in self.backends.values()),
+                   default=4500)
+
+    def queue_depth(self):
+        """Return how many requests are waiting on a backend's rate limit"""
+        return sum(backend.scheduler.stats()['queue_depth'] for backend in self.backends.values()
+                   if getattr(backend, 'scheduler', None))
+
+    def stats(self):
+        """Return per-backend health plus hedging and fallback counters"""
+        with self.lock:
+            counters = {'hedged': self.hedged, 'hedge_wins': self.hedge_wins, 'fallbacks': self.fallbacks}
+        counters['backends'] = {name: health.snapshot() for name, health in self.health.items()}
+        if self.memory is not None:
+            counters['memory'] = self.memory.stats()
+        return counters
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+def create_translator(cache=None, engines=None, stub_url=None, rate=5.0, fallback=True, memory=None):
+    """Build a router over the online engines with the offline phrasebook as the fallback"""
+    if not TRANSLATOR_AVAILABLE:
+        return TranslatorRouter(fallback=FallbackTranslator(), memory=memory)
+    router = TranslatorRouter(fallback=FallbackTranslator() if fallback else None, cache=cache, memory=memory)
+
+    def make_scheduler():
+        # Each provider has its own quota, so each backend gets its own limiter
+        return RequestScheduler(rate=rate, burst=max(1, int(rate * 2)))
+
+    if stub_url:
+        router.register('stub', DeepTranslatorWrapper(pool=TranslatorPool(base_url=stub_url),
+                                                      scheduler=make_scheduler()))
+        return router
+    for engine in engines or configured_engines():
+        router.register(engine, DeepTranslatorWrapper(engine=engine, scheduler=make_scheduler()),
+                        auto_detect=TRANSLATOR_ENGINES[engine].auto_detect)
+    return router
+
+# Long inputs are translated in chunks of about this many characters, this many at a time
+DOCUMENT_CHUNK_CHARS = 1000
+DOCUMENT_WORKERS = 4
+# Threads in the pool shared by every document being translated at once
+DOCUMENT_POOL_WORKERS = 16
+
+# Long-lived thread pools, created on first use and shared by every caller
+_shared_executors = {}
+_shared_executors_lock = threading.Lock()
+
+def shared_executor(name, max_workers):
+    """Return the process-wide thread pool called name"""
+    with _shared_executors_lock:
+        if name not in _shared_executors:
+            _shared_executors[name] = ThreadPoolExecutor(max_workers=max_workers,
+                                                         thread_name_prefix=f'travelspeak-{name}')
+        return _shared_executors[name]
+
+def completed_in_window(executor, calls, limit):
+    """Submit (key, fn, args) calls with at most limit in flight; yield (key, future) as each finishes
+
+    Calls that haven't started are cancelled if the caller stops iterating early.
+    """
+    calls = iter(calls)
+    pending = {}
+    try:
+        while True:
+            for key, fn, args in itertools.islice(calls, max(0, limit - len(pending))):
+                pending[executor.submit(fn, *args)] = key
+            if not pending:
+                return
+            done, _ = wait_futures(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future
+    finally:
+        for future in pending:
+            future.cancel()
+
+# A sentence runs to terminal punctuation followed by whitespace, a CJK full stop, or the end of the line
+SENTENCE_RE = re.compile(r'\S(?:[^\n]*?(?:[.!?…]+["\'”’»)\]]*(?=\s|$)|[。！？]+|(?=\n)|$))')
+
+# Piece of a document: sentences are translated, the whitespace between them is kept as is
+Segment = namedtuple('Segment', 'text translate')
+
+def split_sentences(text, max_chars=4500):
+    """Split text into sentence and whitespace segments that join back into text
+
+    Sentences longer than max_chars are cut at word boundaries.
+    """
+    segments = []
+    position = 0
+    for match in SENTENCE_RE.finditer(text):
+        sentence = match.group().rstrip()
+        if match.start() > position:
+            segments.append(Segment(text[position:match.start()], False))
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            head = sentence[:cut]
+            segments.append(Segment(head, True))
+            rest = sentence[cut:]
+            sentence = rest.lstrip()
+            if len(rest) > len(sentence):
+                segments.append(Segment(rest[:len(rest) - len(sentence)], False))
+        segments.append(Segment(sentence, True))
+        position = match.start() + len(match.group().rstrip())
+    if position < len(text):
+        segments.append(Segment(text[position:], False))
+    return segments
+
+def translate_document(translator, text, src, dest, chunk_chars=DOCUMENT_CHUNK_CHARS,
+                       max_workers=DOCUMENT_WORKERS, on_progress=None, memo=None):
+    """Translate a long text in concurrent sentence chunks, keeping its whitespace and line breaks
+
+    Repeated sentences are sent once, and sentences found in memo (sentence -> translation,
+    usually the previous result's .sentences) are not sent at all. on_progress(piece, done,
+    total) receives each newly finished stretch of output in document order; if it returns
+    False the rest is abandoned and None is returned. Up to max_workers chunks run at once on
+    a shared pool; a lone chunk runs on the calling thread.
+    """
+    segments = split_sentences(text, translator.max_chars())
+    translated = {}
+    chunks = []
+    size = chunk_chars
+    for sentence in OrderedDict.fromkeys(segment.text for segment in segments if segment.translate):
+        if memo and sentence in memo:
+            translated[sentence] = memo[sentence]
+            continue
+        if size + len(sentence) > chunk_chars:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(sentence)
+        size += len(sentence) + 1
+
+    emitted = 0
+
+    def release(done):
+        # Hand out the longest run of segments whose sentences are all translated
+        nonlocal emitted
+        start = emitted
+        while emitted < len(segments) and (not segments[emitted].translate
+                                           or segments[emitted].text in translated):
+            emitted += 1
+        if on_progress is None or (emitted == start and done < len(chunks)):
+            return True
+        piece = "".join(translated[segment.text] if segment.translate else segment.text
+                        for segment in segments[start:emitted])
+        return on_progress(piece, done, len(chunks)) is not False
+
+    def translate_chunk(chunk):
+        if len(chunk) == 1:
+            # A lone sentence goes through translate(), which hedges slow backends and times them
+            result = translator.translate(chunk[0], src, dest)
+            return [result.text], result.backend
+        return translator.translate_batch(chunk, src, dest, True)
+
+    backends = set()
+    if not release(0):
+        return None
+    if len(chunks) > 1 and max_workers > 1:
+        calls = ((chunk, translate_chunk, (chunk,)) for chunk in chunks)
+        finished = completed_in_window(shared_executor('document', DOCUMENT_POOL_WORKERS), calls, max_workers)
+    else:
+        # Nothing to overlap, so the chunks run on the calling thread
+        finished = ((chunk, None) for chunk in chunks)
+    try:
+        for done, (chunk, future) in enumerate(finished, 1):
+            results, backend = future.result() if future is not None else translate_chunk(chunk)
+            translated.update(zip(chunk, results))
+            backends.add(backend)
+            if not release(done):
+                return None
+    finally:
+        finished.close()
+
+    output = "".join(translated[segment.text] if segment.translate else segment.text for segment in segments)
+    # Name the online backends that served the text; 'cache' if nothing had to be sent
+    served = sorted(backends - {'cache'}) or ['cache']
+    result = TranslationResult(output, backend=", ".join(served))
+    result.sentences = translated
+    return result
+
+# Languages translated at the same time by translate_many
+FANOUT_WORKERS = 8
+
+def translate_many(translator, text, src, targets, max_workers=FANOUT_WORKERS, on_result=None):
+    """Translate text into every target language concurrently
+
+    Returns an OrderedDict of target code -> TranslationResult, or the exception that
+    target failed with. on_result(dest, outcome, done, total) runs as each target
+    finishes; if it returns False the rest is abandoned and None is returned.
+    """
+    targets = list(OrderedDict.fromkeys(targets))
+    results = OrderedDict((dest, None) for dest in targets)
+    if not targets:
+        return results
+
+    def translate_target(dest):
+        # Targets already run side by side, so each document stays on its target's thread
+        return translate_document(translator, text, src, dest, max_workers=1)
+
+    calls = ((dest, translate_target, (dest,)) for dest in targets)
+    finished = completed_in_window(shared_executor('fanout', FANOUT_WORKERS), calls, max_workers)
+    try:
+        for done, (dest, future) in enumerate(finished, 1):
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = e
+            results[dest] = outcome
+            if on_result is not None and on_result(dest, outcome, done, len(targets)) is False:
+                return None
+    finally:
+        finished.close()
+    return results
+
+def export_translations(path, text, src, results):
+    """Write one source text and its translations to a CSV or JSON file, chosen by extension"""
+    names = {code: name for name, code in LANGUAGES.items()}
+    rows = [{'code': src, 'language': names.get(src, src), 'text': text, 'backend': 'source', 'error': ''}]
+    for dest, outcome in results.items():
+        failed = isinstance(outcome, Exception)
+        rows.append({
+            'code': dest,
+            'language': names.get(dest, dest),
+            'text': '' if failed or outcome is None else outcome.text,
+            'backend': '' if failed or outcome is None else outcome.backend,
+            'error': str(outcome) if failed else '',
+        })
+    if os.path.splitext(path)[1].lower() == '.json':
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['code', 'language', 'text', 'backend', 'error'])
+            writer.writeheader()
+            writer.writerows(rows)
+    return len(rows) - 1
+
+# Long-lived microphone stream: the device is opened once and kept open across phrases
+class MicrophoneAudioSource:
+    def __init__(self, recognizer, microphone, timeout=1, phrase_time_limit=5):
+        self.recognizer = recognizer
+        self.microphone = microphone
+        self.timeout = timeout
+        self.phrase_time_limit = phrase_time_limit
+        self.stream = None
+        # Let listen() keep tracking the noise floor while it waits for speech
+        self.recognizer.dynamic_energy_threshold = True
+
+    def open(self):
+        """Open the audio device if it isn't open yet"""
+        if self.stream is None:
+            self.stream = self.microphone.__enter__()
+        return self.stream
+
+    def calibrate(self, duration=1):
+        """Measure ambient noise to set the recognizer's energy threshold"""
+        self.recognizer.adjust_for_ambient_noise(self.open(), duration=duration)
+
+    def read(self):
+        """Return the next phrase, or None if nothing was heard before the timeout"""
+        try:
+            return self.recognizer.listen(self.open(), timeout=self.timeout,
+                                          phrase_time_limit=self.phrase_time_limit)
+        except sr.WaitTimeoutError:
+            return None
+
+    @property
+    def sample_rate(self):
+        return self.open().SAMPLE_RATE
+
+    def read_raw(self):
+        """Return the next block of raw 16-bit mono samples, for streaming recognizers"""
+        microphone = self.open()
+        return microphone.stream.read(microphone.CHUNK)
+
+    def close(self):
+        """Release the audio device"""
+        if self.stream is not None:
+            self.stream = None
+            self.microphone.__exit__(None, None, None)
+
+# Offline recognizers work on 16 kHz 16-bit mono audio
+RECOGNITION_SAMPLE_RATE = 16000
+
+# Audio source that replays an audio file (WAV/AIFF/FLAC) in fixed-length chunks
+class AudioFileSource:
+    def __init__(self, path, recognizer, chunk_seconds=5):
+        self.recognizer = recognizer
+        self.chunk_seconds = chunk_seconds
+        self.audio_file = sr.AudioFile(path)
+        self.source = self.audio_file.__enter__()
+
+    def calibrate(self, duration=1):
+        pass
+
+    def read(self):
+        """Return the next chunk; raises EOFError at the end of the file"""
+        # Recognizer.record() drops the buffer that crosses the duration on every call,
+        # so read exact frame counts instead
+        frames = max(1, int(self.chunk_seconds * self.source.SAMPLE_RATE))
+        data = self.source.stream.read(frames)
+        if not data:
+            raise EOFError
+        return sr.AudioData(data, self.source.SAMPLE_RATE, self.source.SAMPLE_WIDTH)
+
+    sample_rate = RECOGNITION_SAMPLE_RATE
+
+    def read_raw(self):
+        """Return the next chunk as raw 16 kHz 16-bit mono samples; raises EOFError at the end"""
+        return self.read().get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+
+    def close(self):
+        self.audio_file.__exit__(None, None, None)
+
+# Trims silence from captured phrases, splits them on pauses and downsamples them for the recognizer
+class AudioPreprocessor:
+    def __init__(self, recognizer=None, target_rate=RECOGNITION_SAMPLE_RATE, energy_threshold=300,
+                 frame_ms=30, padding_ms=150, split_pause_ms=600, min_speech_ms=120):
+        # recognizer's (calibrated, possibly adapting) energy_threshold wins over the fixed one
+        self.recognizer = recognizer
+        self.target_rate = target_rate
+        self.energy_threshold = energy_threshold
+        self.frame_ms = frame_ms
+        self.padding_frames = padding_ms // frame_ms
+        self.split_frames = max(1, split_pause_ms // frame_ms)
+        self.min_frames = max(1, math.ceil(min_speech_ms / frame_ms))
+        self.kernels = {}
+        self.lock = threading.Lock()
+        self.phrases = 0
+        self.silent = 0
+        self.segments = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.ms_in = 0.0
+        self.ms_out = 0.0
+        self.processing = 0.0
+
+    def process(self, audio):
+        """Return the speech in audio as a list of 16-bit AudioData segments at no more than target_rate"""
+        started = time.perf_counter()
+        rate = audio.sample_rate
+        samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype='<i2')
+        frame = max(1, rate * self.frame_ms // 1000)
+        count = len(samples) // frame
+
+        # Frame energy in the units speech_recognition uses for energy_threshold (RMS of 16-bit samples)
+        frames = samples[:count * frame].reshape(count, frame).astype(np.float32)
+        voiced = np.sqrt(np.mean(frames * frames, axis=1)) > self.threshold()
+        if self.padding_frames and count:
+            # Keep a little audio around each voiced stretch so word onsets and endings survive
+            voiced = np.convolve(voiced, np.ones(2 * self.padding_frames + 1), 'same') > 0
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+
+        runs = []
+        for start, end in edges.reshape(-1, 2).tolist():
+            if runs and start - runs[-1][1] < self.split_frames:
+                runs[-1][1] = end
+            else:
+                runs.append([start, end])
+        segments = []
+        for start, end in runs:
+            if end - start < self.min_frames:
+                continue
+            piece, piece_rate = self.resample(samples[start * frame:end * frame], rate)
+            segments.append(sr.AudioData(piece.astype('<i2').tobytes(), piece_rate, 2))
+
+        elapsed = time.perf_counter() - started
+        bytes_out = sum(len(segment.frame_data) for segment in segments)
+        ms_in = len(samples) * 1000 / rate
+        ms_out = sum(len(segment.frame_data) * 500 / segment.sample_rate for segment in segments)
+        with self.lock:
+            self.phrases += 1
+            self.silent += not segments
+            self.segments += len(segments)
+            self.bytes_in += len(audio.frame_data)
+            self.bytes_out += bytes_out
+            self.ms_in += ms_in
+            self.ms_out += ms_out
+            self.processing += elapsed
+        METRICS.observe('travelspeak_audio_preprocess_seconds', elapsed)
+        METRICS.inc('travelspeak_audio_bytes_saved_total', len(audio.frame_data) - bytes_out)
+        METRICS.inc('travelspeak_audio_ms_saved_total', round(ms_in - ms_out))
+        return segments
+
+    def threshold(self):
+        if self.recognizer is not None:
+            return self.recognizer.energy_threshold
+        return self.energy_threshold
+
+    def resample(self, samples, rate):
+        """Downsample to target_rate; audio at or below it is returned unchanged"""
+        if rate <= self.target_rate or not len(samples):
+            return samples, rate
+        ratio = self.target_rate / rate
+        kernel = self.kernels.get(rate)
+        if kernel is None:
+            # Windowed-sinc low-pass at the new Nyquist frequency so downsampling doesn't alias
+            taps = np.arange(63) - 31
+            kernel = self.kernels[rate] = np.sinc(ratio * taps) * ratio * np.hanning(63)
+        filtered = np.convolve(samples.astype(np.float32), kernel, 'same')
+        positions = np.arange(int(len(samples) * ratio)) / ratio
+        resampled = np.interp(positions, np.arange(len(samples)), filtered)
+        return np.clip(np.round(resampled), -32768, 32767), self.target_rate
+
+    def wrap(self, recognize):
+        """Return a recognize function that only sends the speech segments of each phrase"""
+        def recognize_speech(audio):
+            texts = []
+            for segment in self.process(audio):
+                try:
+                    text = recognize(segment)
+                except sr.UnknownValueError:
+                    continue
+                if text:
+                    texts.append(text)
+            if not texts:
+                # Silent phrases never reach the recognizer
+                raise sr.UnknownValueError()
+            return " ".join(texts)
+        return recognize_speech
+
+    def stats(self):
+        """Return phrase counts and the audio bytes and milliseconds removed before recognition"""
+        with self.lock:
+            return {
+                'phrases': self.phrases,
+                'silent_phrases': self.silent,
+                'segments': self.segments,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'bytes_saved': self.bytes_in - self.bytes_out,
+                'audio_ms_in': round(self.ms_in),
+                'audio_ms_out': round(self.ms_out),
+                'audio_ms_saved': round(self.ms_in - self.ms_out),
+                'processing_ms': round(self.processing * 1000, 1),
+            }
+
+# Producer/consumer pipeline: one capture loop feeds a pool of recognizer workers
+class SpeechPipeline:
+    def __init__(self, source, recognize, on_result, workers=2, queue_size=8):
+        self.source = source
+        self.recognize = recognize
+        self.on_result = on_result
+        self.worker_count = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.next_seq = 0
+        self.error = None
+        self.captured = 0
+        self.recognized = 0
+        self.unrecognized = 0
+        self.max_queue_depth = 0
+        self.blocked_puts = 0
+        self.put_wait = 0.0
+
+    def run(self, should_continue):
+        """Capture on the calling thread until should_continue() is false or the source ends
+
+        Phrases already captured are still recognized and delivered, in capture order,
+        before run returns.
+        """
+        workers = [threading.Thread(target=self._work, daemon=True) for _ in range(self.worker_count)]
+        for worker in workers:
+            worker.start()
+
+        seq = 0
+        try:
+            while should_continue() and self.error is None:
+                started = time.perf_counter()
+                try:
+                    audio = self.source.read()
+                except EOFError:
+                    break
+                if audio is None:
+                    continue
+                METRICS.observe('travelspeak_capture_seconds', time.perf_counter() - started)
+                self.captured += 1
+                if not self._put((seq, audio)):
+                    break
+                seq += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            for _ in workers:
+                self.queue.put(None)
+            for worker in workers:
+                worker.join()
+            self.source.close()
+
+    def _put(self, item):
+        """Enqueue captured audio, blocking while every worker is busy (backpressure)"""
+        started = time.perf_counter()
+        if self.queue.full():
+            self.blocked_puts += 1
+        while self.error is None:
+            try:
+                self.queue.put(item, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        self.put_wait += time.perf_counter() - started
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return self.error is None
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            seq, audio = item
+            text = None
+            if self.error is None:
+                started = time.perf_counter()
+                outcome = 'ok'
+                try:
+                    text = self.recognize(audio)
+                except sr.UnknownValueError:
+                    outcome = 'unrecognized'
+                except Exception as e:
+                    outcome = 'error'
+                    self.error = self.error or e
+                METRICS.observe('travelspeak_recognition_seconds', time.perf_counter() - started, outcome=outcome)
+            self._deliver(seq, text)
+
+    def _deliver(self, seq, text):
+        """Release results in sequence order, holding back any that finished early"""
+        with self.lock:
+            if text:
+                self.recognized += 1
+            else:
+                self.unrecognized += 1
+            self.pending[seq] = text
+            while self.next_seq in self.pending:
+                ready = self.pending.pop(self.next_seq)
+                self.next_seq += 1
+                if ready:
+                    self.on_result(ready)
+
+    def stats(self):
+        """Return capture, recognition and backpressure counters"""
+        return {
+            'captured': self.captured,
+            'recognized': self.recognized,
+            'unrecognized': self.unrecognized,
+            'queue_depth': self.queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'queue_size': self.queue.maxsize,
+            'blocked_puts': self.blocked_puts,
+            'put_wait': self.put_wait,
+            'reorder_pending': len(self.pending),
+        }
+
+# Online recognition through speech_recognition's Google Web Speech client
+class GoogleRecognitionEngine:
+    name = 'google'
+    offline = False
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+
+    def supports(self, language):
+        return True
+
+    def recognize(self, audio, language):
+        return self.recognizer.recognize_google(audio, language=language)
+
+def speech_model_language(name):
+    """Map a model directory or locale name ('vosk-model-small-en-us-0.15', 'fr-FR') to a LANGUAGES code"""
+    match = re.match(r'(?:vosk-model-(?:small-)?)?([a-z]{2,3})(?:[-_]([a-z]{2}))?(?=$|[-_])', name.lower())
+    if not match:
+        return None
+    code, region = match.groups()
+    if code == 'cn':
+        return 'zh'
+    if code == 'zh' and region == 'tw':
+        return 'zh-tw'
+    return code
+
+# Offline streaming recognition with Vosk; each model is loaded once and shared by every session
+class VoskRecognitionEngine:
+    name = 'vosk'
+    offline = True
+
+    def __init__(self, model_dir=SPEECH_MODEL_DIR):
+        self.paths = {}
+        self.models = {}
+        self.lock = threading.Lock()
+        if os.path.isdir(model_dir):
+            # Small models come first: they load faster and answer sooner
+            for name in sorted(os.listdir(model_dir), key=lambda name: ('small' not in name, name)):
+                path = os.path.join(model_dir, name)
+                code = speech_model_language(name) if name.startswith('vosk') else None
+                if code and os.path.isdir(path):
+                    self.paths.setdefault(code, path)
+
+    def supports(self, language):
+        return language in self.paths
+
+    def model(self, language):
+        """Return the loaded model for language, loading it on first use"""
+        with self.lock:
+            model = self.models.get(language)
+            if model is None:
+                vosk.SetLogLevel(-1)
+                with METRICS.timer('travelspeak_speech_model_load_seconds', engine=self.name):
+                    model = self.models[language] = vosk.Model(self.paths[language])
+            return model
+
+    def recognize(self, audio, language):
+        recognizer = vosk.KaldiRecognizer(self.model(language), RECOGNITION_SAMPLE_RATE)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=RECOGNITION_SAMPLE_RATE, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get('text', '')
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def session(self, language, sample_rate):
+        """Start an incremental recognition of raw 16-bit mono audio at sample_rate"""
+        return VoskSession(vosk.KaldiRecognizer(self.model(language), sample_rate))
+
+# One Vosk utterance stream: feed() audio as it arrives, finish() when the audio stops
+class VoskSession:
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+
+    def feed(self, data):
+        """Return (partial, final); final is set when Vosk detects the end of an utterance"""
+        if self.recognizer.AcceptWaveform(data):
+            return None, json.loads(self.recognizer.Result()).get('text') or None
+        return json.loads(self.recognizer.PartialResult()).get('partial') or None, None
+
+    def finish(self):
+        return json.loads(self.recognizer.FinalResult()).get('text') or None
+
+# Offline phrase recognition with PocketSphinx; one decoder per language, loaded once
+class SphinxRecognitionEngine:
+    name = 'sphinx'
+    offline = True
+
+    def __init__(self, model_dir=SPEECH_MODEL_DIR):
+        # Same layout speech_recognition uses: <locale>/{acoustic-model, language-model.lm.bin,
+        # pronounciation-dictionary.dict}; its bundled en-US model is found too
+        self.paths = {}
+        roots = [os.path.join(model_dir, 'pocketsphinx-data')]
+        spec = importlib.util.find_spec('speech_recognition') if SPEECH_RECOGNITION_AVAILABLE else None
+        if spec and spec.origin:
+            roots.append(os.path.join(os.path.dirname(spec.origin), 'pocketsphinx-data'))
+        for root in roots:
+            if not os.path.isdir(root):
+                continue
+            for name in sorted(os.listdir(root)):
+                path = os.path.join(root, name)
+                code = speech_model_language(name)
+                if code and os.path.isdir(os.path.join(path, 'acoustic-model')):
+                    self.paths.setdefault(code, path)
+        self.decoders = {}
+        self.lock = threading.Lock()
+
+    def supports(self, language):
+        return language in self.paths
+
+    def decoder(self, language):
+        """Return (decoder, lock) for language, creating the decoder on first use"""
+        with self.lock:
+            entry = self.decoders.get(language)
+            if entry is None:
+                path = self.paths[language]
+                with METRICS.timer('travelspeak_speech_model_load_seconds', engine=self.name):
+                    decoder = pocketsphinx.Decoder(
+                        hmm=os.path.join(path, 'acoustic-model'),
+                        lm=os.path.join(path, 'language-model.lm.bin'),
+                        dict=os.path.join(path, 'pronounciation-dictionary.dict'),
+                        logfn=os.devnull
+                    )
+                # A decoder holds one utterance at a time
+                entry = self.decoders[language] = (decoder, threading.Lock())
+            return entry
+
+    def recognize(self, audio, language):
+        decoder, lock = self.decoder(language)
+        with lock:
+            decoder.start_utt()
+            decoder.process_raw(audio.get_raw_data(convert_rate=RECOGNITION_SAMPLE_RATE, convert_width=2),
+                                full_utt=True)
+            decoder.end_utt()
+            hypothesis = decoder.hyp()
+        if hypothesis is None or not hypothesis.hypstr:
+            raise sr.UnknownValueError()
+        return hypothesis.hypstr
+
+# Recognition engines in preference order; picks one per language from the installed models
+class SpeechEngines:
+    def __init__(self, recognizer=None, model_dir=SPEECH_MODEL_DIR):
+        self.engines = OrderedDict()
+        if VOSK_AVAILABLE:
+            self.engines['vosk'] = VoskRecognitionEngine(model_dir)
+        if POCKETSPHINX_AVAILABLE:
+            self.engines['sphinx'] = SphinxRecognitionEngine(model_dir)
+        if recognizer is not None:
+            self.engines['google'] = GoogleRecognitionEngine(recognizer)
+
+    def select(self, language, preference='auto'):
+        """Return the engine to use for language, or None
+
+        'auto' prefers an offline engine with a model for the language and falls back to
+        Google; 'offline' never uses the network; any other value names an engine.
+        """
+        for engine in self.engines.values():
+            if not engine.supports(language):
+                continue
+            if (preference == engine.name or (preference == 'auto')
+                    or (preference == 'offline' and engine.offline)):
+                return engine
+        return None
+
+    def offline_languages(self):
+        """Return the language codes some offline engine has a model for"""
+        return {code for engine in self.engines.values() if engine.offline for code in engine.paths}
+
+    def preload(self, language, preference='auto'):
+        """Load the model the selected engine needs for language ahead of the first phrase"""
+        engine = self.select(language, preference)
+        if isinstance(engine, VoskRecognitionEngine):
+            engine.model(language)
+        elif isinstance(engine, SphinxRecognitionEngine):
+            engine.decoder(language)
+        return engine
+
+def stream_recognition(session, read_raw, should_continue, on_partial, on_final):
+    """Feed raw audio to a streaming session until should_continue() is false or the source ends
+
+    on_partial gets each changed hypothesis for the utterance in progress, on_final each
+    finished utterance. Returns the number of utterances recognized.
+    """
+    last_partial = None
+    finals = 0
+    while should_continue():
+        try:
+            data = read_raw()
+        except EOFError:
+            break
+        started = time.perf_counter()
+        partial, final = session.feed(data)
+        METRICS.observe('travelspeak_streaming_chunk_seconds', time.perf_counter() - started)
+        if final:
+            finals += 1
+            last_partial = None
+            on_final(final)
+        elif partial and partial != last_partial:
+            last_partial = partial
+            on_partial(partial)
+    final = session.finish()
+    if final:
+        finals += 1
+        on_final(final)
+    METRICS.inc('travelspeak_streaming_utterances_total', finals)
+    return finals
+
+def find_audio_player():
+    """Return a command (or 'winsound') able to play a synthesized audio file, or None"""
+    if sys.platform == 'win32':
+        return 'winsound'
+    for command in (['afplay'], ['aplay', '-q'], ['paplay'], ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet']):
+        if shutil.which(command[0]):
+            return command
+    return None
+
+# Long-lived text-to-speech worker; the only thread that touches the pyttsx3 engine
+class SpeechWorker:
+    PRIORITY_HIGH = 0
+    PRIORITY_NORMAL = 5
+    PRIORITY_LOW = 10
+
+    def __init__(self, engine, cache_dir=None, max_cache_files=200, max_cached_chars=200,
+                 on_idle=None, on_error=None):
+        self.engine = engine
+        self.max_cache_files = max_cache_files
+        self.max_cached_chars = max_cached_chars
+        self.on_idle = on_idle
+        self.on_error = on_error
+        self.player = find_audio_player() if cache_dir else None
+        self.cache_dir = cache_dir if self.player else None
+        self.extension = '.aiff' if sys.platform == 'darwin' else '.wav'
+        self.queue = queue.PriorityQueue()
+        self.counter = itertools.count()
+        self.interrupted = threading.Event()
+        self.process = None
+        self.cache_hits = 0
+        self.synthesized = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self.engine.connect('started-word', self._on_word)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def say(self, text, priority=PRIORITY_NORMAL, interrupt=False):
+        """Queue an utterance; interrupt=True stops the current one and drops queued ones"""
+        if interrupt:
+            self.skip(clear=True)
+        self.queue.put((priority, next(self.counter), 'say', text))
+
+    def presynthesize(self, text):
+        """Render text to the audio cache in the background so it replays instantly later"""
+        if self.cache_dir and len(text) <= self.max_cached_chars:
+            self.queue.put((self.PRIORITY_LOW, next(self.counter), 'synthesize', text))
+
+    def skip(self, clear=False):
+        """Stop the current utterance; clear=True also drops everything still queued to speak"""
+        if clear:
+            kept = []
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item[2] != 'say':
+                    kept.append(item)
+            for item in kept:
+                self.queue.put(item)
+        self.interrupted.set()
+        process = self.process
+        if process is not None:
+            process.terminate()
+
+    def stop(self):
+        """Finish the worker thread"""
+        self.skip(clear=True)
+        self.queue.put((-1, next(self.counter), 'stop', None))
+
+    def cache_path(self, text):
+        """Return the audio cache file for text with the current voice and rate"""
+        key = f"{self.engine.getProperty('voice')}\0{self.engine.getProperty('rate')}\0{text}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest + self.extension)
+
+    def _on_word(self, name, location, length):
+        if self.interrupted.is_set():
+            self.engine.stop()
+
+    def _run(self):
+        while True:
+            priority, _, kind, text = self.queue.get()
+            if kind == 'stop':
+                return
+            self.interrupted.clear()
+            try:
+                if kind == 'say':
+                    self._speak(text)
+                else:
+                    self._synthesize(text)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+            if kind == 'say' and self.on_idle and not self._say_pending():
+                self.on_idle()
+
+    def _say_pending(self):
+        with self.queue.mutex:
+            return any(item[2] == 'say' for item in self.queue.queue)
+
+    def _speak(self, text):
+        if self.cache_dir:
+            path = self.cache_path(text)
+            if os.path.exists(path):
+                self.cache_hits += 1
+                METRICS.inc('travelspeak_tts_cache_total', outcome='hit')
+                try:
+                    # Eviction goes by mtime, so a replay marks the file as recently used
+                    os.utime(path)
+                except OSError:
+                    pass
+                self._play(path)
+                return
+            METRICS.inc('travelspeak_tts_cache_total', outcome='miss')
+        with METRICS.timer('travelspeak_tts_speak_seconds'):
+            self.engine.say(text)
+            self.engine.runAndWait()
+        if not self.interrupted.is_set():
+            self.presynthesize(text)
+
+    def _synthesize(self, text):
+        path = self.cache_path(text)
+        if os.path.exists(path):
+            return
+        temp_path = path + '.tmp' + self.extension
+        with METRICS.timer('travelspeak_tts_synthesis_seconds'):
+            self.engine.save_to_file(text, temp_path)
+            self.engine.runAndWait()
+        if os.path.exists(temp_path):
+            os.replace(temp_path, path)
+            self.synthesized += 1
+            self._evict()
+
+    def _play(self, path):
+        if self.player == 'winsound':
+            import winsound
+            winsound.PlaySound(path, winsound.SND_FILENAME)
+            return
+        self.process = subprocess.Popen(self.player + [path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            self.process.wait()
+        finally:
+            self.process = None
+
+    def _evict(self):
+        """Keep only the most recently used max_cache_files entries"""
+        entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                   if name.endswith(self.extension) and '.tmp' not in name]
+        if len(entries) <= self.max_cache_files:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - self.max_cache_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# Compact in-memory form of one history row
+HistoryRecord = namedtuple('HistoryRecord', 'id timestamp original translation source_lang target_lang')
+
+# Translation history persisted in SQLite, with the newest records kept in memory
+class HistoryStore:
+    COLUMNS = 'id, timestamp, original, translation, source_lang, target_lang'
+
+    def __init__(self, path=HISTORY_FILE, window=200):
+        self.db = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp REAL NOT NULL, "
+            "original TEXT NOT NULL, translation TEXT NOT NULL, "
+            "source_lang TEXT NOT NULL, target_lang TEXT NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS history_pair ON history (source_lang, target_lang)")
+        self.fts = self._create_search_index()
+        self.db.commit()
+        self.window = window
+        self.recent = None
+        self.total = self.db.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def add(self, original, translation, source_lang, target_lang, timestamp=None):
+        """Append a record and return it"""
+        timestamp = timestamp or time.time()
+        with self.lock, METRICS.timer('travelspeak_history_write_seconds'):
+            cursor = self.db.execute(
+                "INSERT INTO history (timestamp, original, translation, source_lang, target_lang) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (timestamp, original, translation, source_lang, target_lang)
+            )
+            if self.fts:
+                self.db.execute(
+                    "INSERT INTO history_fts (rowid, original, translation) VALUES (?, ?, ?)",
+                    (cursor.lastrowid, original, translation)
+                )
+            self.db.commit()
+            record = HistoryRecord(cursor.lastrowid, timestamp, original, translation, source_lang, target_lang)
+            self.total += 1
+            if self.recent is not None:
+                self.recent.append(record)
+            return record
+
+    def add_many(self, records):
+        """Insert HistoryRecords in one transaction, skipping ones already stored; returns how many were added
+
+        A record counts as stored when a row stored before this call has the same texts, languages
+        and timestamp (to the microsecond exports keep), so importing an export twice doesn't
+        duplicate it while genuine repeats, even within one batch, are all kept.
+        """
+        with self.lock, METRICS.timer('travelspeak_history_bulk_write_seconds'):
+            last_id = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM history").fetchone()[0]
+            self.db.executemany(
+                "INSERT INTO history (timestamp, original, translation, source_lang, target_lang) "
+                "SELECT ?1, ?2, ?3, ?4, ?5 WHERE NOT EXISTS (SELECT 1 FROM history INDEXED BY history_timestamp "
+                "WHERE timestamp BETWEEN ?1 - 0.000001 AND ?1 + 0.000001 AND id <= ?6 AND original = ?2 "
+                "AND translation = ?3 AND source_lang = ?4 AND target_lang = ?5)",
+                [(record.timestamp, record.original, record.translation, record.source_lang, record.target_lang,
+                  last_id) for record in records]
+            )
+            added = self.db.execute("SELECT COUNT(*) FROM history WHERE id > ?", (last_id,)).fetchone()[0]
+            if self.fts and added:
+                self.db.execute(
+                    "INSERT INTO history_fts (rowid, original, translation) "
+                    "SELECT id, original, translation FROM history WHERE id > ?", (last_id,)
+                )
+            self.db.commit()
+            self.total += added
+            self.recent = None
+            return added
+
+    def count(self):
+        """Return the number of stored records"""
+        return self.total
+
+    def iter_records(self, batch_size=1000):
+        """Yield every record oldest first, reading batch_size rows at a time"""
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.db.execute(
+                    f"SELECT {self.COLUMNS} FROM history WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield HistoryRecord(*row)
+            last_id = rows[-1][0]
+
+    def page(self, offset, limit):
+        """Return up to limit records starting at position offset (oldest first)"""
+        with self.lock:
+            recent = self._recent_window()
+            first_recent = self.total - len(recent)
+            if offset >= first_recent:
+                start = offset - first_recent
+                return list(itertools.islice(recent, start, start + limit))
+            rows = self.db.execute(
+                f"SELECT {self.COLUMNS} FROM history ORDER BY id LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+            return [HistoryRecord(*row) for row in rows]
+
+    def _recent_window(self):
+        """Load the newest records on first use"""
+        if self.recent is None:
+            rows = self.db.execute(
+                f"SELECT {self.COLUMNS} FROM history ORDER BY id DESC LIMIT ?", (self.window,)
+            ).fetchall()
+            self.recent = deque((HistoryRecord(*row) for row in reversed(rows)), maxlen=self.window)
+        return self.recent
+
+    def _create_search_index(self):
+        """Create the full-text index over original and translated text, if SQLite has FTS5"""
+        try:
+            exists = self.db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_fts'"
+            ).fetchone()
+            if not exists:
+                self.db.execute(
+                    "CREATE VIRTUAL TABLE history_fts USING fts5("
+                    "original, translation, content='history', content_rowid='id', "
+                    "tokenize='unicode61 remove_diacritics 2')"
+                )
+                # Index rows written before the search index existed
+                self.db.execute("INSERT INTO history_fts (history_fts) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def search(self, query='', source_lang=None, target_lang=None):
+        """Return matching records as a HistorySearchResult, oldest first
+
+        Every word in query must match the original or the translation; the last word
+        matches as a prefix so results update while typing.
+        """
+        words = query.split()
+        conditions = []
+        params = []
+        if words and self.fts:
+            terms = ['"' + word.replace('"', '""') + '"' for word in words]
+            terms[-1] += '*'
+            conditions.append("id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)")
+            params.append(' '.join(terms))
+        else:
+            for word in words:
+                conditions.append("(original LIKE ? OR translation LIKE ?)")
+                params.extend([f"%{word}%", f"%{word}%"])
+        if source_lang:
+            conditions.append("source_lang = ?")
+            params.append(source_lang)
+        if target_lang:
+            conditions.append("target_lang = ?")
+            params.append(target_lang)
+
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        with self.lock:
+            total = self.db.execute("SELECT COUNT(*) FROM history" + where, params).fetchone()[0]
+        return HistorySearchResult(self, where, params, total)
+
+    def fetch_where(self, where, params, offset, limit):
+        """Return up to limit records matching where, starting at position offset (oldest first)"""
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT {self.COLUMNS} FROM history{where} ORDER BY id LIMIT ? OFFSET ?",
+                list(params) + [limit, offset]
+            ).fetchall()
+        return [HistoryRecord(*row) for row in rows]
+
+    def clear(self):
+        """Delete every record"""
+        with self.lock:
+            if self.fts:
+                self.db.execute("INSERT INTO history_fts (history_fts) VALUES ('delete-all')")
+            self.db.execute("DELETE FROM history")
+            self.db.commit()
+            self.total = 0
+            self.recent = None
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+HISTORY_EXPORT_FIELDS = ['timestamp', 'source_lang', 'target_lang', 'original', 'translation']
+HISTORY_FILE_TYPES = [("History files", "*.jsonl *.csv *.tmx *.gz *.zst"), ("All files", "*.*")]
+TMX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<tmx version="1.4">\n'
+    '  <header creationtool="travelspeak" creationtoolversion="1.0" datatype="plaintext" segtype="sentence" '
+    'adminlang="en" srclang="*all*" o-tmf="travelspeak"/>\n'
+    '  <body>\n'
+)
+XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+# Characters XML 1.0 can't carry at all, not even as character references
+XML_ILLEGAL_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+def history_file_format(path):
+    """Return (format, compression) for a history file such as history.jsonl.gz"""
+    base, extension = os.path.splitext(path.lower())
+    compression = None
+    if extension in ('.gz', '.zst'):
+        compression = extension[1:]
+        base, extension = os.path.splitext(base)
+    formats = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv', '.tmx': 'tmx'}
+    if extension not in formats:
+        raise ValueError(f"Unsupported history file: {path} (use .jsonl, .csv or .tmx, optionally with .gz or .zst)")
+    return formats[extension], compression
+
+@contextmanager
+def open_history_file(path, mode, compression):
+    """Open path as a binary stream ('rb' or 'wb') that (de)compresses on the fly; yields (stream, raw file)"""
+    if compression == 'zst' and not ZSTD_AVAILABLE:
+        raise ValueError("Zstandard compression needs: pip install zstandard")
+    with open(path, mode) as raw:
+        if compression == 'gz':
+            stream = gzip.GzipFile(fileobj=raw, mode=mode)
+        elif compression == 'zst':
+            if mode == 'rb':
+                stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+            else:
+                stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+        else:
+            yield raw, raw
+            return
+        try:
+            yield stream, raw
+        finally:
+            stream.close()
+
+def language_name(value):
+    """Map a language name or code ('Spanish', 'es', 'es-ES') to its LANGUAGES name, or None"""
+    if value in LANGUAGES:
+        return value
+    names = {code: name for name, code in LANGUAGES.items()}
+    code = (value or '').lower().replace('_', '-')
+    return names.get(code) or names.get(code.split('-')[0])
+
+def export_history(store, path, on_progress=None):
+    """Stream every history record to a JSONL, CSV or TMX file (optionally .gz/.zst); returns the count
+
+    on_progress(done, total) is called every 1000 records. The file is written under a temporary
+    name and moved into place once complete.
+    """
+    from xml.sax.saxutils import escape, quoteattr
+
+    def xml_text(value):
+        # Forbidden characters become U+FFFD; a raw \r would be read back as \n
+        return escape(XML_ILLEGAL_RE.sub('\ufffd', value), {'\r': '&#13;'})
+
+    def xml_attr(value):
+        return quoteattr(XML_ILLEGAL_RE.sub('\ufffd', value))
+
+    file_format, compression = history_file_format(path)
+    total = store.count()
+    written = 0
+    temp_path = path + '.tmp'
+    try:
+        with open_history_file(temp_path, 'wb', compression) as (stream, raw):
+            text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+            writer = csv.writer(text) if file_format == 'csv' else None
+            if writer:
+                writer.writerow(HISTORY_EXPORT_FIELDS)
+            elif file_format == 'tmx':
+                text.write(TMX_HEADER)
+            for record in store.iter_records():
+                moment = datetime.fromtimestamp(record.timestamp, timezone.utc)
+                source = LANGUAGES.get(record.source_lang, record.source_lang)
+                target = LANGUAGES.get(record.target_lang, record.target_lang)
+                if file_format == 'jsonl':
+                    text.write(json.dumps({'timestamp': moment.isoformat(), 'source_lang': source,
+                                           'target_lang': target, 'original': record.original,
+                                           'translation': record.translation}, ensure_ascii=False) + "\n")
+                elif writer:
+                    writer.writerow([moment.isoformat(), source, target, record.original, record.translation])
+                else:
+                    # creationdate only keeps whole seconds; the prop keeps the exact time for re-imports
+                    text.write(
+                        f'    <tu creationdate="{moment.strftime("%Y%m%dT%H%M%SZ")}" srclang={xml_attr(source)}>\n'
+                        f'      <prop type="x-timestamp">{record.timestamp!r}</prop>\n'
+                        f'      <tuv xml:lang={xml_attr(source)}><seg>{xml_text(record.original)}</seg></tuv>\n'
+                        f'      <tuv xml:lang={xml_attr(target)}><seg>{xml_text(record.translation)}</seg></tuv>\n'
+                        f'    </tu>\n'
+                    )
+                written += 1
+                if on_progress and written % 1000 == 0:
+                    on_progress(written, total)
+            if file_format == 'tmx':
+                text.write("  </body>\n</tmx>\n")
+            text.flush()
+            text.detach()
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if on_progress:
+        on_progress(written, total)
+    return written
+
+def parse_history_timestamp(value):
+    """Accept ISO 8601, TMX (20240101T120000Z) or epoch-second timestamps; None if unparseable"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = (value or '').strip()
+    for parse in (lambda v: float(v),
+                  lambda v: datetime.fromisoformat(v).timestamp(),
+                  lambda v: datetime.strptime(v, '%Y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc).timestamp()):
+        try:
+            return parse(value)
+        except ValueError:
+            continue
+    return None
+
+def read_history_rows(stream, file_format):
+    """Yield (timestamp, original, translation, source, target) from a history file, one row at a time"""
+    if file_format == 'tmx':
+        import xml.etree.ElementTree as ET
+        body = None
+        for event, element in ET.iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                if element.tag == 'body':
+                    body = element
+                continue
+            if element.tag != 'tu':
+                continue
+            variants = [(tuv.get(XML_LANG) or tuv.get('lang'), ''.join(tuv.find('seg').itertext()))
+                        for tuv in element.iter('tuv') if tuv.find('seg') is not None]
+            source_lang = element.get('srclang')
+            source = next((variant for variant in variants if variant[0] == source_lang), None)
+            source = source or (variants[0] if variants else None)
+            timestamp = element.get('creationdate')
+            for prop in element.iter('prop'):
+                if prop.get('type') == 'x-timestamp' and prop.text:
+                    timestamp = prop.text
+            for variant in variants:
+                if variant is not source:
+                    yield timestamp, source[1], variant[1], source[0], variant[0]
+            # Processed units are dropped so memory stays flat however large the file is
+            if body is not None:
+                body.clear()
+        return
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    try:
+        if file_format == 'csv':
+            for row in csv.DictReader(text):
+                yield (row.get('timestamp'), row.get('original'), row.get('translation'),
+                       row.get('source_lang'), row.get('target_lang'))
+            return
+        for line in text:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield None
+                continue
+            if not isinstance(row, dict):
+                yield None
+                continue
+            yield (row.get('timestamp'), row.get('original'), row.get('translation'),
+                   row.get('source_lang'), row.get('target_lang'))
+    finally:
+        # The caller owns the stream; don't let the wrapper close it
+        text.detach()
+
+def import_history(store, path, cache=None, memory=None, on_progress=None, batch_size=1000):
+    """Bulk-load a history file written by export_history (or any JSONL/CSV/TMX with the same fields)
+
+    Records are inserted batch_size at a time, and the same pass stores each pair in the
+    translation cache and fuzzy memory. on_progress(bytes read, file size) follows every
+    batch. Returns counts of added, duplicate and invalid rows.
+    """
+    file_format, compression = history_file_format(path)
+    size = os.path.getsize(path)
+    counts = {'added': 0, 'duplicates': 0, 'invalid': 0}
+    batch = []
+
+    def flush(raw):
+        added = store.add_many(batch)
+        counts['added'] += added
+        counts['duplicates'] += len(batch) - added
+        pairs = [(record.original, LANGUAGES[record.source_lang], LANGUAGES[record.target_lang],
+                  record.translation) for record in batch]
+        if cache is not None:
+            cache.put_many(pairs)
+        if memory is not None:
+            for original, source, target, translation in pairs:
+                memory.add(original, translation, source, target)
+        batch.clear()
+        if on_progress:
+            on_progress(raw.tell(), size)
+
+    with open_history_file(path, 'rb', compression) as (stream, raw):
+        for row in read_history_rows(stream, file_format):
+            if row is None:
+                counts['invalid'] += 1
+                continue
+            timestamp, original, translation, source, target = row
+            source, target = language_name(source), language_name(target)
+            timestamp = parse_history_timestamp(timestamp) if timestamp else time.time()
+            if not (original and translation and source and target) or timestamp is None:
+                counts['invalid'] += 1
+                continue
+            batch.append(HistoryRecord(None, timestamp, original, translation, source, target))
+            if len(batch) >= batch_size:
+                flush(raw)
+        flush(raw)
+    return counts
+
+# A history query, paged in SQL through the same interface as HistoryStore
+class HistorySearchResult:
+    def __init__(self, store, where, params, total):
+        self.store = store
+        self.where = where
+        self.params = params
+        self.total = total
+
+    def count(self):
+        return self.total
+
+    def page(self, offset, limit):
+        return self.store.fetch_where(self.where, self.params, offset, limit)
+
+# Listbox that only materializes the rows currently in view
+class VirtualListbox:
+    def __init__(self, parent, count, fetch, format_row, **listbox_options):
+        self.count = count
+        self.fetch = fetch
+        self.format_row = format_row
+        self.offset = 0
+        self.rows = []
+        self.follow_end = True
+        self.frame = ttk.Frame(parent)
+        self.listbox = tk.Listbox(self.frame, **listbox_options)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient='vertical', command=self.yview)
+        self.listbox.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+        font = tkfont.Font(font=self.listbox.cget('font'))
+        self.row_height = font.metrics('linespace') + 2 * int(self.listbox.cget('selectborderwidth')) + 1
+        self.listbox.bind('<Configure>', lambda event: self.refresh())
+        self.listbox.bind('<MouseWheel>', self.on_mousewheel)
+        self.listbox.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.listbox.bind('<Button-5>', lambda event: self.scroll(3))
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def set_source(self, count, fetch):
+        """Show a different data source, starting from its newest rows"""
+        self.count = count
+        self.fetch = fetch
+        self.scroll_to_end()
+
+    def bind(self, sequence, handler):
+        self.listbox.bind(sequence, handler)
+
+    def visible_rows(self):
+        return max(1, self.listbox.winfo_height() // self.row_height)
+
+    def refresh(self):
+        """Re-fetch the rows in view"""
+        total = self.count()
+        visible = self.visible_rows()
+        if self.follow_end:
+            self.offset = total - visible
+        self.offset = max(0, min(self.offset, total - visible))
+        self.rows = self.fetch(self.offset, visible)
+        self.listbox.delete(0, tk.END)
+        for row in self.rows:
+            self.listbox.insert(tk.END, self.format_row(row))
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + len(self.rows)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll(self, delta):
+        self.offset += delta
+        self.follow_end = self.offset + self.visible_rows() >= self.count()
+        self.refresh()
+        return 'break'
+
+    def scroll_to_end(self):
+        self.follow_end = True
+        self.refresh()
+
+    def yview(self, *args):
+        """Scrollbar command: translate moveto/scroll requests into a row offset"""
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * self.count())
+            self.follow_end = self.offset + self.visible_rows() >= self.count()
+            self.refresh()
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self.visible_rows()
+            self.scroll(step)
+
+    def on_mousewheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll(-3 * delta)
+
+    def selected_row(self):
+        """Return the row under the selection, or None"""
+        selection = self.listbox.curselection()
+        if selection and selection[0] < len(self.rows):
+            return self.rows[selection[0]]
+        return None
+
+# Runs blocking work on a bounded thread pool and hands results back to the Tk thread
+class UiTaskRunner:
+    def __init__(self, root, max_workers=4, profiler=None):
+        self.root = root
+        self.profiler = profiler
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='travelspeak')
+        self.lock = threading.Lock()
+        self.generations = {}
+        self.futures = {}
+
+    def submit(self, channel, fn, *args, on_success=None, on_error=None, on_progress=None):
+        """Run fn(*args) in the pool; a newer submit on the same channel supersedes this one
+
+        Pass channel=None for work that must not be cancelled by later submissions.
+        Callbacks run on the Tk thread and are skipped if the result went stale.
+        With on_progress, fn also gets a progress= function that forwards its arguments
+        to on_progress and returns False once the task has been superseded.
+        """
+        with self.lock:
+            if channel is not None:
+                generation = self.generations.get(channel, 0) + 1
+                self.generations[channel] = generation
+                previous = self.futures.pop(channel, None)
+                if previous is not None:
+                    previous.cancel()
+            else:
+                generation = None
+            kwargs = {}
+            if on_progress is not None:
+                kwargs['progress'] = lambda *values: self._report(channel, generation, on_progress, values)
+            if self.profiler is not None:
+                fn = self.profiler.wrap(fn)
+            future = self.executor.submit(fn, *args, **kwargs)
+            if channel is not None:
+                self.futures[channel] = future
+
+        def done(finished):
+            try:
+                self.root.after(0, self._deliver, channel, generation, finished, on_success, on_error)
+            except (RuntimeError, tk.TclError):
+                # The window is gone; nobody is waiting for the result
+                pass
+
+        future.add_done_callback(done)
+        return future
+
+    def cancel(self, channel):
+        """Drop the in-flight task on channel; returns True if there was one"""
+        with self.lock:
+            self.generations[channel] = self.generations.get(channel, 0) + 1
+            future = self.futures.pop(channel, None)
+        if future is None:
+            return False
+        future.cancel()
+        return True
+
+    def pending(self, channel):
+        """Return True while a task on channel has not delivered its result"""
+        with self.lock:
+            return channel in self.futures
+
+    def _current(self, channel, generation):
+        with self.lock:
+            return channel is None or self.generations.get(channel) == generation
+
+    def _report(self, channel, generation, on_progress, values):
+        if not self._current(channel, generation):
+            return False
+        try:
+            self.root.after(0, self._deliver_progress, channel, generation, on_progress, values)
+        except (RuntimeError, tk.TclError):
+            return False
+        return True
+
+    def _deliver_progress(self, channel, generation, on_progress, values):
+        if self._current(channel, generation):
+            on_progress(*values)
+
+    def _deliver(self, channel, generation, future, on_success, on_error):
+        if channel is not None:
+            with self.lock:
+                if self.generations.get(channel) != generation:
+                    return
+                self.futures.pop(channel, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+        elif on_success:
+            on_success(future.result())
+
+    def shutdown(self):
+        """Stop accepting work and abandon anything still queued"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
 class LanguageTranslator:
     def __init__(self):
@@ -95,124 +3577,175 @@ class LanguageTranslator:
         self.tts_available = TTS_AVAILABLE
         self.translator_available = TRANSLATOR_AVAILABLE
         
-        # Check for missing dependencies and show warnings
-        self.check_dependencies()
-        
-        # Initialize speech recognition and text-to-speech
-        if self.speech_available:
-            self.recognizer = sr.Recognizer()
-            try:
-                self.microphone = sr.Microphone()
-            except:
-                self.microphone = None
-                self.speech_available = False
-        else:
-            self.recognizer = None
-            self.microphone = None
-            
-        if self.tts_available:
-            try:
-                self.tts_engine = pyttsx3.init()
-            except:
-                self.tts_engine = None
-                self.tts_available = False
-        else:
-            self.tts_engine = None
-            
-        if self.translator_available:
-            self.translator = DeepTranslatorWrapper()
-        else:
-            self.translator = FallbackTranslator()
-        
+        # Check for missing dependencies and show warnings
+        self.check_dependencies()
+        
+        # Speech recognition and text-to-speech are set up in the background once the window is up
+        self.recognizer = None
+        self.microphone = None
+        self.speech_engines = None
+        self.audio_preprocessor = None
+        self.tts_engine = None
+        self.speech_worker = None
+        
+        with STARTUP.measure('translator'):
+            self.translation_cache = TranslationCache() if self.translator_available else None
+            self.translation_memory = TranslationMemory()
+            self.translator = create_translator(cache=self.translation_cache, memory=self.translation_memory)
+        
         # Language mappings (updated for deep-translator compatibility)
-        self.languages = {
-            'English': 'en',
-            'Spanish': 'es',
-            'French': 'fr',
-            'German': 'de',
-            'Italian': 'it',
-            'Portuguese': 'pt',
-            'Russian': 'ru',
-            'Japanese': 'ja',
-            'Korean': 'ko',
-            'Chinese (Simplified)': 'zh',
-            'Chinese (Traditional)': 'zh-tw',
-            'Arabic': 'ar',
-            'Hindi': 'hi',
-            'Dutch': 'nl',
-            'Swedish': 'sv',
-            'Norwegian': 'no',
-            'Danish': 'da',
-            'Finnish': 'fi',
-            'Polish': 'pl',
-            'Czech': 'cs',
-            'Hungarian': 'hu',
-            'Turkish': 'tr',
-            'Greek': 'el',
-            'Hebrew': 'he',
-            'Thai': 'th',
-            'Vietnamese': 'vi',
-            'Indonesian': 'id',
-            'Malay': 'ms',
-            'Filipino': 'tl',
-            'Swahili': 'sw',
-            'Bengali': 'bn',
-            'Tamil': 'ta',
-            'Telugu': 'te',
-            'Marathi': 'mr',
-            'Gujarati': 'gu',
-            'Punjabi': 'pa',
-            'Urdu': 'ur',
-            'Persian': 'fa',
-            'Romanian': 'ro',
-            'Bulgarian': 'bg',
-            'Croatian': 'hr',
-            'Serbian': 'sr',
-            'Slovak': 'sk',
-            'Slovenian': 'sl',
-            'Lithuanian': 'lt',
-            'Latvian': 'lv',
-            'Estonian': 'et',
-            'Ukrainian': 'uk',
-            'Catalan': 'ca',
-            'Basque': 'eu',
-            'Galician': 'gl',
-            'Welsh': 'cy',
-            'Irish': 'ga',
-            'Scottish Gaelic': 'gd',
-            'Maltese': 'mt',
-            'Icelandic': 'is',
-            'Albanian': 'sq',
-            'Macedonian': 'mk',
-            'Bosnian': 'bs',
-            'Afrikaans': 'af',
-            'Zulu': 'zu',
-            'Xhosa': 'xh',
-            'Yoruba': 'yo',
-            'Hausa': 'ha',
-            'Amharic': 'am',
-            'Somali': 'so',
-            'Esperanto': 'eo',
-            'Latin': 'la'
-        }
+        self.languages = LANGUAGES
+        self.language_names = {code: name for name, code in LANGUAGES.items()}
+        self.language_detector = None
         
         # Variables for recording state
         self.is_recording = False
         self.recording_thread = None
+        self.speech_pipeline = None
+        self.energy_threshold = None
+        
+        # Multi-translate window state
+        self.fanout_targets = []
+        self.fanout_window = None
+        self.fanout_results = None
+        
+        # Sentence translations of the last finished pass, reused for text that hasn't changed
+        self.document_memo = (None, {})
+        self.typing_job = None
+        
+        # Live translation state: segments are translated independently and shown in order
+        self.live_memo = {}
+        self.live_seq = 0
+        self.live_next = 0
+        self.live_ready = {}
         
         # Translation history
-        self.translation_history = []
+        with STARTUP.measure('history'):
+            self.translation_history = HistoryStore()
         
-        # Setup GUI
-        self.setup_gui()
+        # On-demand profiling of the Tk thread and the background tasks it starts
+        self.profiler = ProfileCapture()
+        self.stats_job = None
         
-        # Configure TTS engine
-        if self.tts_available and self.tts_engine:
-            self.configure_tts()
+        # Background workers for network-bound tasks
+        self.tasks = UiTaskRunner(self.root, profiler=self.profiler)
+        
+        # Setup GUI
+        with STARTUP.measure('gui'):
+            self.setup_gui()
         
         # Load saved settings
         self.load_settings()
         
+        # Drop in-flight translations when their input goes stale
+        self.input_text.bind('<<Modified>>', self.on_input_modified)
+        self.source_lang_var.trace_add('write', self.on_language_changed)
+        self.target_lang_var.trace_add('write', self.on_language_changed)
+        self.source_lang_var.trace_add('write', self.schedule_speech_model_load)
+        self.speech_engine_var.trace_add('write', self.schedule_speech_model_load)
+        
+        # Start device and engine initialization once the event loop is running
+        self.root.after_idle(self.start_background_init)
+        
+    def start_background_init(self):
+        """Show the window first, then initialize heavy subsystems off the Tk thread"""
+        STARTUP.mark('window')
+        threading.Thread(target=self.initialize_subsystems, daemon=True).start()
+        
+    def initialize_subsystems(self):
+        """Import speech/TTS/translation backends and open devices (runs on a background thread)"""
+        with STARTUP.measure('detector'):
+            self.language_detector = LanguageDetector(self.languages.values())
+            
+        if self.speech_available:
+            with STARTUP.measure('speech'):
+                try:
+                    self.recognizer = sr.Recognizer()
+                    if self.energy_threshold is not None:
+                        self.recognizer.energy_threshold = self.energy_threshold
+                    self.microphone = sr.Microphone()
+                    self.speech_engines = SpeechEngines(self.recognizer)
+                    if NUMPY_AVAILABLE:
+                        self.audio_preprocessor = AudioPreprocessor(self.recognizer)
+                except Exception:
+                    self.microphone = None
+                    self.speech_available = False
+            self.root.after(0, self.speech_ready)
+            if self.speech_engines:
+                # Loading an offline model takes a while; do it before the first phrase
+                with STARTUP.measure('speech_model'):
+                    self.preload_speech_model()
+            
+        if self.tts_available:
+            with STARTUP.measure('tts'):
+                try:
+                    self.tts_engine = pyttsx3.init()
+                    # Configure TTS engine and hand it to the speech worker
+                    self.configure_tts()
+                    self.speech_worker = SpeechWorker(
+                        self.tts_engine, cache_dir=TTS_CACHE_DIR,
+                        on_idle=lambda: self.root.after(0, lambda: self.status_var.set("Ready")),
+                        on_error=lambda e: self.root.after(0, self.show_error, f"TTS error: {e}")
+                    )
+                except Exception:
+                    self.tts_engine = None
+                    self.tts_available = False
+            self.root.after(0, self.tts_ready)
+            
+        if self.translator_available:
+            with STARTUP.measure('translator_import'):
+                try:
+                    deep_translator.GoogleTranslator
+                except Exception as e:
+                    print(f"Translator import error: {e}", file=sys.stderr)
+                    
+        STARTUP.mark('ready')
+        STARTUP.report()
+        self.warm_translation_memory()
+        
+    def warm_translation_memory(self, limit=20000):
+        """Index the most recent history records for fuzzy reuse (runs on a background thread)"""
+        total = self.translation_history.count()
+        for offset in range(max(0, total - limit), total, 1000):
+            for record in self.translation_history.page(offset, 1000):
+                source_lang = self.languages.get(record.source_lang)
+                target_lang = self.languages.get(record.target_lang)
+                if source_lang and target_lang:
+                    self.translation_memory.add(record.original, record.translation, source_lang, target_lang)
+        
+    def preload_speech_model(self):
+        """Load the offline model for the current source language, if one is used (runs off the Tk thread)"""
+        try:
+            self.speech_engines.preload(self.languages[self.source_lang_var.get()], self.speech_engine_var.get())
+        except Exception as e:
+            print(f"Speech model load error: {e}", file=sys.stderr)
+            
+    def schedule_speech_model_load(self, *args):
+        """Preload the speech model for a newly selected source language or engine"""
+        if self.speech_engines:
+            self.tasks.submit('speech_model', self.preload_speech_model)
+            
+    def speech_ready(self):
+        """Enable recording once the microphone is open"""
+        if self.speech_available and self.microphone:
+            self.record_btn.config(state='normal', text="🎤 Start Recording")
+            self.speech_engine_combo.config(values=['auto', 'offline'] + list(self.speech_engines.engines))
+            offline = [name for name, code in self.languages.items()
+                       if code in self.speech_engines.offline_languages()]
+            if offline:
+                self.status_var.set(f"Offline speech: {', '.join(offline)}")
+        else:
+            self.record_btn.config(state='disabled', text="🎤 Recording Unavailable")
+            
+    def tts_ready(self):
+        """Enable speech output once the engine is initialized"""
+        if self.tts_available and self.speech_worker:
+            self.speak_btn.config(state='normal', text="🔊 Speak")
+            self.stop_speak_btn.config(state='normal')
+        else:
+            self.speak_btn.config(state='disabled', text="🔊 Speech Unavailable")
+            self.stop_speak_btn.config(state='disabled')
+        
     def check_dependencies(self):
         """Check for missing dependencies and show installation instructions"""
         missing_deps = []
@@ -266,6 +3799,11 @@ class LanguageTranslator:
         swap_btn = ttk.Button(lang_frame, text="⇄", command=self.swap_languages, width=3)
         swap_btn.grid(row=0, column=4)
         
+        # Pick the source language from the text itself
+        self.auto_detect_var = tk.BooleanVar(value=False)
+        auto_detect_check = ttk.Checkbutton(lang_frame, text="Auto-detect", variable=self.auto_detect_var)
+        auto_detect_check.grid(row=0, column=5, padx=(20, 0))
+        
         # Input frame
         input_frame = ttk.LabelFrame(main_frame, text="Input", padding=10)
         input_frame.pack(fill='both', expand=True, pady=(0, 10))
@@ -283,6 +3821,8 @@ class LanguageTranslator:
                                     command=self.toggle_recording, style='Accent.TButton')
         if not self.speech_available:
             self.record_btn.config(state='disabled', text="🎤 Recording Unavailable")
+        else:
+            self.record_btn.config(state='disabled', text="🎤 Loading...")
         self.record_btn.pack(side='left', padx=(0, 10))
         
         # Clear button
@@ -293,6 +3833,24 @@ class LanguageTranslator:
         translate_btn = ttk.Button(control_frame, text="Translate", command=self.translate_text)
         translate_btn.pack(side='left', padx=(0, 10))
         
+        # Live translation of recognized speech
+        self.live_translate_var = tk.BooleanVar(value=False)
+        live_check = ttk.Checkbutton(control_frame, text="Live translate", variable=self.live_translate_var)
+        live_check.pack(side='left', padx=(0, 10))
+        
+        # Speech engine: 'auto' uses an installed offline model for the language, else Google
+        ttk.Label(control_frame, text="Speech:").pack(side='left', padx=(0, 5))
+        self.speech_engine_var = tk.StringVar(value='auto')
+        self.speech_engine_combo = ttk.Combobox(control_frame, textvariable=self.speech_engine_var,
+                                                values=['auto', 'offline'], state='readonly', width=8)
+        self.speech_engine_combo.pack(side='left', padx=(0, 10))
+        
+        # Translate the input shortly after typing stops
+        self.type_translate_var = tk.BooleanVar(value=False)
+        type_check = ttk.Checkbutton(control_frame, text="Translate as you type", variable=self.type_translate_var,
+                                     command=self.schedule_typing_translation)
+        type_check.pack(side='left', padx=(0, 10))
+        
         # Status label
         self.status_var = tk.StringVar(value="Ready")
         self.status_label = ttk.Label(control_frame, textvariable=self.status_var, foreground='green')
@@ -315,8 +3873,15 @@ class LanguageTranslator:
         self.speak_btn = ttk.Button(output_control_frame, text="🔊 Speak", command=self.speak_translation)
         if not self.tts_available:
             self.speak_btn.config(state='disabled', text="🔊 Speech Unavailable")
+        else:
+            self.speak_btn.config(state='disabled', text="🔊 Loading...")
         self.speak_btn.pack(side='left', padx=(0, 10))
         
+        # Stop speaking button
+        self.stop_speak_btn = ttk.Button(output_control_frame, text="⏹ Stop", command=self.stop_speaking)
+        self.stop_speak_btn.config(state='disabled')
+        self.stop_speak_btn.pack(side='left', padx=(0, 10))
+        
         # Copy translation button
         copy_btn = ttk.Button(output_control_frame, text="📋 Copy", command=self.copy_translation)
         copy_btn.pack(side='left', padx=(0, 10))
@@ -325,20 +3890,42 @@ class LanguageTranslator:
         save_btn = ttk.Button(output_control_frame, text="💾 Save", command=self.save_translation)
         save_btn.pack(side='left', padx=(0, 10))
         
+        # Translate into several languages at once
+        fanout_btn = ttk.Button(output_control_frame, text="🌐 Multi-translate", command=self.open_fanout_window)
+        fanout_btn.pack(side='left', padx=(0, 10))
+        
         # History frame
         history_frame = ttk.LabelFrame(main_frame, text="Translation History", padding=10)
         history_frame.pack(fill='both', expand=True)
         
-        # History listbox with scrollbar
-        history_list_frame = ttk.Frame(history_frame)
-        history_list_frame.pack(fill='both', expand=True)
+        # History search: full-text query plus language filters
+        search_frame = ttk.Frame(history_frame)
+        search_frame.pack(fill='x', pady=(0, 5))
+        
+        ttk.Label(search_frame, text="Search:").pack(side='left', padx=(0, 5))
+        self.history_search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.history_search_var, width=30)
+        search_entry.pack(side='left', padx=(0, 10))
         
-        self.history_listbox = tk.Listbox(history_list_frame, font=('Arial', 10))
-        history_scrollbar = ttk.Scrollbar(history_list_frame, orient='vertical', command=self.history_listbox.yview)
-        self.history_listbox.configure(yscrollcommand=history_scrollbar.set)
+        filter_values = ['Any'] + list(self.languages.keys())
+        ttk.Label(search_frame, text="From:").pack(side='left', padx=(0, 5))
+        self.history_source_filter = tk.StringVar(value='Any')
+        ttk.Combobox(search_frame, textvariable=self.history_source_filter, values=filter_values,
+                     state='readonly', width=15).pack(side='left', padx=(0, 10))
+        ttk.Label(search_frame, text="To:").pack(side='left', padx=(0, 5))
+        self.history_target_filter = tk.StringVar(value='Any')
+        ttk.Combobox(search_frame, textvariable=self.history_target_filter, values=filter_values,
+                     state='readonly', width=15).pack(side='left')
         
-        self.history_listbox.pack(side='left', fill='both', expand=True)
-        history_scrollbar.pack(side='right', fill='y')
+        self.history_search_job = None
+        for variable in (self.history_search_var, self.history_source_filter, self.history_target_filter):
+            variable.trace_add('write', self.schedule_history_search)
+        
+        # History list; only the rows in view are loaded from the history store
+        self.history_view = VirtualListbox(history_frame, self.translation_history.count,
+                                           self.translation_history.page, self.format_history_row,
+                                           font=('Arial', 10))
+        self.history_view.pack(fill='both', expand=True)
         
         # History controls
         history_control_frame = ttk.Frame(history_frame)
@@ -348,8 +3935,30 @@ class LanguageTranslator:
                                       command=self.clear_history)
         clear_history_btn.pack(side='left')
         
+        # Bulk export/import of the whole history
+        export_history_btn = ttk.Button(history_control_frame, text="Export History...", command=self.export_history)
+        export_history_btn.pack(side='left', padx=(10, 0))
+        import_history_btn = ttk.Button(history_control_frame, text="Import History...", command=self.import_history)
+        import_history_btn.pack(side='left', padx=(10, 0))
+        
+        # Live latency and counter panel, hidden until toggled
+        self.stats_btn = ttk.Button(history_control_frame, text="📊 Show Stats", command=self.toggle_stats)
+        self.stats_btn.pack(side='right')
+        
+        self.stats_frame = ttk.LabelFrame(main_frame, text="Performance", padding=10)
+        self.stats_text = scrolledtext.ScrolledText(self.stats_frame, height=8, font=('Courier', 9),
+                                                   state='disabled')
+        self.stats_text.pack(fill='both', expand=True, pady=(0, 10))
+        
+        stats_control_frame = ttk.Frame(self.stats_frame)
+        stats_control_frame.pack(fill='x')
+        self.profile_btn = ttk.Button(stats_control_frame, text="⏺ Start Profiling", command=self.toggle_profiling)
+        self.profile_btn.pack(side='left', padx=(0, 10))
+        dump_btn = ttk.Button(stats_control_frame, text="💾 Dump Metrics", command=self.dump_metrics)
+        dump_btn.pack(side='left')
+        
         # Bind double-click to load from history
-        self.history_listbox.bind('<Double-1>', self.load_from_history)
+        self.history_view.bind('<Double-1>', self.load_from_history)
         
     def configure_tts(self):
         """Configure text-to-speech engine settings"""
@@ -363,7 +3972,7 @@ class LanguageTranslator:
             self.tts_engine.setProperty('rate', 150)
             self.tts_engine.setProperty('volume', 0.9)
         except Exception as e:
-            print(f"TTS configuration error: {e}")
+            print(f"TTS configuration error: {e}", file=sys.stderr)
             self.tts_available = False
         
     def swap_languages(self):
@@ -376,6 +3985,7 @@ class LanguageTranslator:
     def clear_input(self):
         """Clear the input text area"""
         self.input_text.delete(1.0, tk.END)
+        self.reset_live_translation()
         
     def toggle_recording(self):
         """Toggle speech recording"""
@@ -411,93 +4021,297 @@ class LanguageTranslator:
             return
             
         try:
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
-                
-            while self.is_recording:
+            source = MicrophoneAudioSource(self.recognizer, self.microphone)
+            language = self.languages[self.source_lang_var.get()]
+            engine = self.speech_engines.select(language, self.speech_engine_var.get())
+            if engine is None:
+                source.close()
+                self.root.after(0, self.show_error, f"No {self.speech_engine_var.get()} speech recognition "
+                                                    f"engine has a model for {self.source_lang_var.get()}")
+                return
+            self.root.after(0, self.status_var.set, f"Listening ({engine.name})...")
+            
+            if hasattr(engine, 'session'):
+                # Streaming engines hear audio as it arrives and show the utterance in progress
                 try:
-                    with self.microphone as source:
-                        audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=5)
-                    
-                    # Get source language code
-                    source_lang = self.languages[self.source_lang_var.get()]
-                    
-                    # Recognize speech
-                    text = self.recognizer.recognize_google(audio, language=source_lang)
-                    
-                    # Update input text
-                    self.root.after(0, self.update_input_text, text)
-                    
-                except sr.WaitTimeoutError:
-                    continue
-                except sr.UnknownValueError:
-                    continue
-                except sr.RequestError as e:
-                    self.root.after(0, self.show_error, f"Speech recognition error: {e}")
-                    break
+                    stream_recognition(
+                        engine.session(language, source.sample_rate), source.read_raw,
+                        lambda: self.is_recording,
+                        on_partial=lambda text: self.root.after(0, self.status_var.set, f"Hearing: {text}"),
+                        on_final=lambda text: self.root.after(0, self.update_input_text, text)
+                    )
+                finally:
+                    source.close()
+                return
+            
+            # A saved noise floor skips the blocking calibration; listen() keeps adapting it
+            if self.energy_threshold is None:
+                source.calibrate(duration=1)
+            else:
+                self.recognizer.energy_threshold = self.energy_threshold
+            
+            # Capture keeps running while earlier phrases are being recognized; only their
+            # speech, downsampled, is sent on
+            recognize = self.recognize_audio
+            if self.audio_preprocessor is not None:
+                recognize = self.audio_preprocessor.wrap(recognize)
+            self.speech_pipeline = SpeechPipeline(
+                source, recognize,
+                on_result=lambda text: self.root.after(0, self.update_input_text, text)
+            )
+            self.speech_pipeline.run(lambda: self.is_recording)
+            
+            if isinstance(self.speech_pipeline.error, sr.RequestError):
+                self.root.after(0, self.show_error, f"Speech recognition error: {self.speech_pipeline.error}")
+            elif self.speech_pipeline.error is not None:
+                self.root.after(0, self.show_error, f"Recording error: {self.speech_pipeline.error}")
                     
         except Exception as e:
             self.root.after(0, self.show_error, f"Recording error: {e}")
         finally:
             self.root.after(0, self.recording_finished)
             
+    def recognize_audio(self, audio):
+        """Recognize one captured phrase (runs on a pipeline worker)"""
+        # Get source language code and the engine that handles it
+        source_lang = self.languages[self.source_lang_var.get()]
+        preference = self.speech_engine_var.get()
+        engine = self.speech_engines.select(source_lang, preference)
+        if engine is None:
+            raise sr.RequestError(f"No {preference} speech recognition engine for {source_lang}")
+        text = engine.recognize(audio, source_lang)
+        
+        if self.auto_detect_var.get() and self.language_detector:
+            code, confidence = self.language_detector.detect(text)
+            if code != source_lang and code in self.language_names and confidence >= DETECTION_MIN_CONFIDENCE:
+                # Later phrases are recognized in the detected language; redo this one too
+                self.root.after(0, self.source_lang_var.set, self.language_names[code])
+                engine = self.speech_engines.select(code, preference)
+                try:
+                    if engine is not None:
+                        text = engine.recognize(audio, code)
+                except sr.UnknownValueError:
+                    pass
+        return text
+            
     def update_input_text(self, text):
         """Update input text area with recognized speech"""
         current_text = self.input_text.get(1.0, tk.END).strip()
         if current_text:
-            self.input_text.insert(tk.END, " " + text)
+            self.insert_input(tk.END, " " + text)
         else:
-            self.input_text.insert(1.0, text)
+            self.insert_input(1.0, text)
+            
+        if self.live_translate_var.get():
+            self.translate_segment(text)
+            
+    def insert_input(self, index, text):
+        """Insert text into the input without it counting as a user edit"""
+        was_modified = self.input_text.edit_modified()
+        self.input_text.insert(index, text)
+        # <<Modified>> is delivered later; with the flag cleared, on_input_modified ignores it
+        # and the as-you-type pass doesn't replace what live translation is writing
+        if not was_modified:
+            self.input_text.edit_modified(False)
             
+    def translate_segment(self, text):
+        """Translate one recognized segment and append it to the output in arrival order"""
+        source_lang = self.languages[self.source_lang_var.get()]
+        target_lang = self.languages[self.target_lang_var.get()]
+        seq = self.live_seq
+        self.live_seq += 1
+        
+        key = (text, source_lang, target_lang)
+        if key in self.live_memo:
+            self.live_segment_finished(seq, self.live_memo[key])
+            return
+            
+        def finished(result):
+            if len(self.live_memo) >= 4096:
+                self.live_memo.clear()
+            self.live_memo[key] = result.text
+            self.live_segment_finished(seq, result.text)
+            
+        def failed(error):
+            self.status_var.set(f"Translation error: {error}")
+            self.live_segment_finished(seq, None)
+            
+        # channel=None: later segments must not cancel earlier ones
+        self.tasks.submit(None, self.perform_translation, text, source_lang, target_lang,
+                          on_success=finished, on_error=failed)
+        
+    def live_segment_finished(self, seq, translated):
+        """Append finished segments to the output, holding back any that arrived early"""
+        if seq < self.live_next:
+            # Belongs to a transcript that has since been cleared
+            return
+        self.live_ready[seq] = translated
+        self.output_text.config(state='normal')
+        while self.live_next in self.live_ready:
+            segment = self.live_ready.pop(self.live_next)
+            self.live_next += 1
+            if not segment:
+                continue
+            if self.output_text.compare('end-1c', '!=', '1.0'):
+                self.output_text.insert(tk.END, " " + segment)
+            else:
+                self.output_text.insert(tk.END, segment)
+        self.output_text.config(state='disabled')
+        self.output_text.see(tk.END)
+        
+    def reset_live_translation(self):
+        """Start a new live transcript; results still in flight are discarded"""
+        self.live_next = self.live_seq
+        self.live_ready.clear()
+        
     def recording_finished(self):
         """Handle recording completion"""
         self.is_recording = False
         self.record_btn.config(text="🎤 Start Recording")
         self.status_var.set("Ready")
         
-    def translate_text(self):
-        """Translate the input text"""
+        # Remember the adapted noise floor for the next session
+        if self.recognizer:
+            self.energy_threshold = self.recognizer.energy_threshold
+            self.save_settings()
+        
+    def translate_text(self, as_you_type=False):
+        """Translate the input text; as_you_type passes redraw once and skip the history"""
         text = self.input_text.get(1.0, tk.END).strip()
         if not text:
-            messagebox.showwarning("Warning", "Please enter text to translate or use speech recognition.")
+            if as_you_type:
+                self.tasks.cancel('translate')
+                self.output_text.config(state='normal')
+                self.output_text.delete(1.0, tk.END)
+                self.output_text.config(state='disabled')
+            else:
+                messagebox.showwarning("Warning", "Please enter text to translate or use speech recognition.")
             return
             
-        try:
+        if self.auto_detect_var.get() and self.language_detector:
+            if self.apply_detected_language(text) and self.typing_job is not None:
+                # The language switch scheduled a typing pass; this one already covers it
+                self.root.after_cancel(self.typing_job)
+                self.typing_job = None
+            
+        # Surface client-side throttling so a slow translation isn't mistaken for a hang
+        waiting = self.translator.queue_depth()
+        if waiting:
+            self.status_var.set(f"Translating... ({waiting} waiting for rate limit)")
+        else:
             self.status_var.set("Translating...")
+        
+        # Get language codes
+        source_name = self.source_lang_var.get()
+        target_name = self.target_lang_var.get()
+        source_lang = self.languages[source_name]
+        target_lang = self.languages[target_name]
+        
+        # Only sentences that changed since the last pass are sent again
+        memo_key, memo = self.document_memo
+        if memo_key != (source_lang, target_lang):
+            memo = {}
             
-            # Get language codes
-            source_lang = self.languages[self.source_lang_var.get()]
-            target_lang = self.languages[self.target_lang_var.get()]
+        # Perform translation off the Tk thread
+        started = time.perf_counter()
+        
+        def on_success(result):
+            METRICS.observe('travelspeak_ui_translation_seconds', time.perf_counter() - started,
+                            mode='typing' if as_you_type else 'manual')
+            self.translation_finished(text, result, source_name, target_name, record=not as_you_type)
+        if as_you_type:
+            # Typing passes replace the output in one go so it doesn't flicker
+            self.tasks.submit(
+                'translate', self.perform_document_translation, text, source_lang, target_lang, memo,
+                on_success=on_success,
+                on_error=lambda e: self.status_var.set(f"Translation error: {e}")
+            )
+            return
+        # Chunks stream into the output as they finish
+        self.output_text.config(state='normal')
+        self.output_text.delete(1.0, tk.END)
+        self.output_text.config(state='disabled')
+        self.tasks.submit(
+            'translate', self.perform_document_translation, text, source_lang, target_lang, memo,
+            on_success=on_success,
+            on_error=lambda e: self.show_error(f"Translation error: {e}"),
+            on_progress=self.translation_progress
+        )
+        
+    def schedule_typing_translation(self, *args):
+        """Translate the input shortly after the user stops typing, if that mode is on"""
+        if self.typing_job is not None:
+            self.root.after_cancel(self.typing_job)
+            self.typing_job = None
+        if self.type_translate_var.get():
+            self.typing_job = self.root.after(600, self.typing_translation_due)
             
-            # Perform translation
-            if self.translator_available:
-                translation = self.translator.translate(text, src=source_lang, dest=target_lang)
-            else:
-                # Use fallback translator
-                translation_result = self.translator.translate(text, src=source_lang, dest=target_lang)
-                # Create compatible result object
-                class TranslationResult:
-                    def __init__(self, text):
-                        self.text = text
-                translation = TranslationResult(translation_result)
-            
-            # Display translation
+    def typing_translation_due(self):
+        """Run the debounced translate-as-you-type pass"""
+        self.typing_job = None
+        self.translate_text(as_you_type=True)
+        
+    def apply_detected_language(self, text):
+        """Switch the source language to the one detected in text; returns True if it changed"""
+        code, confidence = self.language_detector.detect(text)
+        name = self.language_names.get(code)
+        if name is None or confidence < DETECTION_MIN_CONFIDENCE or name == self.source_lang_var.get():
+            return False
+        self.source_lang_var.set(name)
+        return True
+        
+    def perform_translation(self, text, source_lang, target_lang):
+        """Translate text with the backend router (runs on a worker thread)"""
+        return self.translator.translate(text, src=source_lang, dest=target_lang)
+        
+    def perform_document_translation(self, text, source_lang, target_lang, memo, progress=None):
+        """Translate a possibly long text in parallel sentence chunks (runs on a worker thread)"""
+        return translate_document(self.translator, text, source_lang, target_lang,
+                                  on_progress=progress, memo=memo)
+        
+    def translation_progress(self, piece, done, total):
+        """Append the next finished stretch of a chunked translation"""
+        self.output_text.config(state='normal')
+        self.output_text.insert('end-1c', piece)
+        self.output_text.config(state='disabled')
+        if total > 1:
+            self.status_var.set(f"Translating... ({done}/{total} chunks)")
+            
+    def translation_finished(self, original, result, source_name, target_name, record=True):
+        """Display a finished translation and record it in history"""
+        if result is None:
+            return
+        self.document_memo = ((self.languages[source_name], self.languages[target_name]), result.sentences)
+        # Streamed chunks normally already add up to the result; only redraw if they don't
+        if self.output_text.get(1.0, 'end-1c') != result.text:
             self.output_text.config(state='normal')
             self.output_text.delete(1.0, tk.END)
-            self.output_text.insert(1.0, translation.text)
+            self.output_text.insert(1.0, result.text)
             self.output_text.config(state='disabled')
+        
+        # Add to history
+        if record:
+            self.add_to_history(original, result.text, source_name, target_name)
+        
+        if result.backend == 'phrasebook':
+            self.status_var.set("Translation complete (offline phrasebook, limited functionality)")
+        else:
+            self.status_var.set(f"Translation complete ({result.backend})")
             
-            # Add to history
-            self.add_to_history(text, translation.text, 
-                              self.source_lang_var.get(), self.target_lang_var.get())
-            
-            if self.translator_available:
-                self.status_var.set("Translation complete")
-            else:
-                self.status_var.set("Translation complete (limited functionality)")
+    def on_input_modified(self, event=None):
+        """Cancel a pending translation once the input text changes"""
+        if not self.input_text.edit_modified():
+            return
+        self.input_text.edit_modified(False)
+        if self.tasks.cancel('translate'):
+            self.status_var.set("Ready")
+        self.schedule_typing_translation()
             
-        except Exception as e:
-            self.show_error(f"Translation error: {e}")
+    def on_language_changed(self, *args):
+        """Cancel a pending translation once the language selection changes"""
+        if self.tasks.cancel('translate'):
+            self.status_var.set("Ready")
+        self.schedule_typing_translation()
             
     def speak_translation(self):
         """Speak the translated text"""
@@ -512,21 +4326,15 @@ class LanguageTranslator:
             
         try:
             self.status_var.set("Speaking...")
-            threading.Thread(target=self.speak_text, args=(text,)).start()
+            self.speech_worker.say(text, priority=SpeechWorker.PRIORITY_HIGH, interrupt=True)
         except Exception as e:
             self.show_error(f"Speech error: {e}")
             
-    def speak_text(self, text):
-        """Speak text using TTS engine"""
-        if not self.tts_available or not self.tts_engine:
-            return
-            
-        try:
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
-            self.root.after(0, lambda: self.status_var.set("Ready"))
-        except Exception as e:
-            self.root.after(0, self.show_error, f"TTS error: {e}")
+    def stop_speaking(self):
+        """Stop the current utterance and anything queued after it"""
+        if self.speech_worker:
+            self.speech_worker.skip(clear=True)
+            self.status_var.set("Ready")
             
     def copy_translation(self):
         """Copy translation to clipboard"""
@@ -559,50 +4367,286 @@ class LanguageTranslator:
         except Exception as e:
             self.show_error(f"Save error: {e}")
             
+    def open_fanout_window(self):
+        """Open the window that translates the input into several languages at once"""
+        if self.fanout_window is not None and self.fanout_window.winfo_exists():
+            self.fanout_window.lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("Multi-translate")
+        window.geometry("900x500")
+        self.fanout_window = window
+        
+        # Target language list
+        targets_frame = ttk.LabelFrame(window, text="Target Languages", padding=10)
+        targets_frame.pack(side='left', fill='y', padx=(10, 5), pady=10)
+        self.fanout_listbox = tk.Listbox(targets_frame, selectmode='extended', exportselection=False, height=20)
+        for index, name in enumerate(self.languages):
+            self.fanout_listbox.insert(tk.END, name)
+            if name in self.fanout_targets:
+                self.fanout_listbox.selection_set(index)
+        self.fanout_listbox.pack(fill='y', expand=True)
+        
+        # Results table, filled in as languages finish
+        results_frame = ttk.LabelFrame(window, text="Translations", padding=10)
+        results_frame.pack(side='left', fill='both', expand=True, padx=(5, 10), pady=10)
+        self.fanout_tree = ttk.Treeview(results_frame, columns=('language', 'translation', 'backend', 'time'),
+                                        show='headings')
+        for column, heading, width in (('language', "Language", 140), ('translation', "Translation", 420),
+                                       ('backend', "Backend", 100), ('time', "Time", 60)):
+            self.fanout_tree.heading(column, text=heading)
+            self.fanout_tree.column(column, width=width, stretch=(column == 'translation'))
+        self.fanout_tree.pack(fill='both', expand=True, pady=(0, 10))
+        
+        controls = ttk.Frame(results_frame)
+        controls.pack(fill='x')
+        ttk.Button(controls, text="Translate All", command=self.translate_fanout).pack(side='left', padx=(0, 10))
+        ttk.Button(controls, text="💾 Export", command=self.export_fanout).pack(side='left', padx=(0, 10))
+        self.fanout_status_var = tk.StringVar(value="Select target languages")
+        ttk.Label(controls, textvariable=self.fanout_status_var).pack(side='right')
+        
+        def closed():
+            self.tasks.cancel('fanout')
+            window.destroy()
+        window.protocol("WM_DELETE_WINDOW", closed)
+        
+    def translate_fanout(self):
+        """Translate the input into every selected language concurrently"""
+        text = self.input_text.get(1.0, tk.END).strip()
+        if not text:
+            messagebox.showwarning("Warning", "Please enter text to translate.", parent=self.fanout_window)
+            return
+        if self.auto_detect_var.get() and self.language_detector:
+            self.apply_detected_language(text)
+        source_name = self.source_lang_var.get()
+        self.fanout_targets = [self.fanout_listbox.get(index) for index in self.fanout_listbox.curselection()]
+        targets = [name for name in self.fanout_targets if name != source_name]
+        if not targets:
+            messagebox.showwarning("Warning", "Please select at least one target language.", parent=self.fanout_window)
+            return
+            
+        self.fanout_tree.delete(*self.fanout_tree.get_children())
+        for name in targets:
+            self.fanout_tree.insert('', tk.END, iid=self.languages[name], values=(name, "…", "", ""))
+        self.fanout_results = None
+        started = time.perf_counter()
+        self.fanout_status_var.set(f"Translating into {len(targets)} languages...")
+        
+        def progress(dest, outcome, done, total):
+            if isinstance(outcome, Exception):
+                values = (self.language_names[dest], f"Error: {outcome}", "", "")
+            else:
+                values = (self.language_names[dest], outcome.text, outcome.backend,
+                          f"{time.perf_counter() - started:.1f}s")
+            if self.fanout_tree.winfo_exists():
+                self.fanout_tree.item(dest, values=values)
+                self.fanout_status_var.set(f"{done}/{total} languages")
+                
+        def finished(results):
+            if results is None or not self.fanout_window.winfo_exists():
+                return
+            self.fanout_results = (text, self.languages[source_name], results)
+            failed = sum(isinstance(outcome, Exception) for outcome in results.values())
+            summary = f"{len(results)} languages in {time.perf_counter() - started:.1f}s"
+            self.fanout_status_var.set(f"{summary}, {failed} failed" if failed else summary)
+            
+        self.tasks.submit(
+            'fanout', self.perform_fanout, text, self.languages[source_name],
+            [self.languages[name] for name in targets],
+            on_success=finished,
+            on_error=lambda e: self.fanout_status_var.set(f"Translation error: {e}"),
+            on_progress=progress
+        )
+        
+    def perform_fanout(self, text, source_lang, target_langs, progress):
+        """Translate into several languages at once (runs on a worker thread)"""
+        return translate_many(self.translator, text, source_lang, target_langs, on_result=progress)
+        
+    def export_fanout(self):
+        """Save the last multi-translate result set as one CSV file"""
+        if not self.fanout_results:
+            messagebox.showwarning("Warning", "No translations to export.", parent=self.fanout_window)
+            return
+        try:
+            filename = f"translations_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            count = export_translations(filename, *self.fanout_results)
+            self.fanout_status_var.set(f"Exported {count} languages to {filename}")
+        except OSError as e:
+            self.show_error(f"Export error: {e}")
+            
+    def toggle_stats(self):
+        """Show or hide the performance panel"""
+        if self.stats_job is not None:
+            self.root.after_cancel(self.stats_job)
+            self.stats_job = None
+            self.stats_frame.pack_forget()
+            self.stats_btn.config(text="📊 Show Stats")
+            return
+        self.stats_frame.pack(fill='both', pady=(10, 0))
+        self.stats_btn.config(text="📊 Hide Stats")
+        self.refresh_stats()
+        
+    def refresh_stats(self):
+        """Redraw the performance panel, once a second while it is visible"""
+        router = self.translator.stats()
+        lines = [f"Rate-limit queue: {self.translator.queue_depth()}  Hedged: {router['hedged']} "
+                 f"(won {router['hedge_wins']})  Fallbacks: {router['fallbacks']}"]
+        for name, health in router['backends'].items():
+            lines.append(f"Backend {name}: {health}")
+        if self.speech_pipeline is not None:
+            lines.append(f"Speech pipeline: {self.speech_pipeline.stats()}")
+        if self.audio_preprocessor is not None:
+            lines.append(f"Audio preprocessing: {self.audio_preprocessor.stats()}")
+        lines.extend(METRICS.summary() or ["No timings recorded yet"])
+        
+        # Keep the scroll position so the panel can be read while it updates
+        position = self.stats_text.yview()[0]
+        self.stats_text.config(state='normal')
+        self.stats_text.delete(1.0, tk.END)
+        self.stats_text.insert(1.0, "\n".join(lines))
+        self.stats_text.config(state='disabled')
+        self.stats_text.yview_moveto(position)
+        self.stats_job = self.root.after(1000, self.refresh_stats)
+        
+    def toggle_profiling(self):
+        """Start a cProfile/tracemalloc capture, or stop it and write the reports"""
+        if not self.profiler.active:
+            self.profiler.start()
+            self.profile_btn.config(text="⏹ Stop Profiling")
+            self.status_var.set("Profiling... reproduce the slow action, then stop")
+            return
+        self.profile_btn.config(text="⏺ Start Profiling")
+        try:
+            stats_path, memory_path = self.profiler.stop()
+        except OSError as e:
+            self.show_error(f"Failed to write profile: {e}")
+            return
+        self.status_var.set(f"Profile saved to {stats_path} and {memory_path}")
+        
+    def dump_metrics(self):
+        """Save the current metrics as JSON next to the app"""
+        path = f"metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            METRICS.dump(path)
+        except OSError as e:
+            self.show_error(f"Failed to save metrics: {e}")
+            return
+        self.status_var.set(f"Metrics saved to {path}")
+        
     def add_to_history(self, original, translation, source_lang, target_lang):
         """Add translation to history"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        entry = {
-            'timestamp': timestamp,
-            'original': original,
-            'translation': translation,
-            'source_lang': source_lang,
-            'target_lang': target_lang
-        }
+        self.translation_history.add(original, translation, source_lang, target_lang)
         
-        self.translation_history.append(entry)
+        # Update history list
+        if self.history_search_active():
+            self.search_history()
+        else:
+            self.history_view.scroll_to_end()
         
-        # Update history listbox
-        display_text = f"[{timestamp}] {source_lang} → {target_lang}: {original[:30]}..."
-        self.history_listbox.insert(tk.END, display_text)
-        self.history_listbox.see(tk.END)
+    def format_history_row(self, entry):
+        """Format a history record for the history list"""
+        moment = datetime.fromtimestamp(entry.timestamp)
+        if moment.date() == datetime.now().date():
+            timestamp = moment.strftime("%H:%M:%S")
+        else:
+            timestamp = moment.strftime("%Y-%m-%d %H:%M")
+        return f"[{timestamp}] {entry.source_lang} → {entry.target_lang}: {entry.original[:30]}..."
         
     def load_from_history(self, event):
         """Load translation from history"""
-        selection = self.history_listbox.curselection()
-        if selection:
-            index = selection[0]
-            entry = self.translation_history[index]
-            
+        entry = self.history_view.selected_row()
+        if entry:
             # Set languages
-            self.source_lang_var.set(entry['source_lang'])
-            self.target_lang_var.set(entry['target_lang'])
+            self.source_lang_var.set(entry.source_lang)
+            self.target_lang_var.set(entry.target_lang)
             
             # Set text
             self.input_text.delete(1.0, tk.END)
-            self.input_text.insert(1.0, entry['original'])
+            self.input_text.insert(1.0, entry.original)
             
             self.output_text.config(state='normal')
             self.output_text.delete(1.0, tk.END)
-            self.output_text.insert(1.0, entry['translation'])
+            self.output_text.insert(1.0, entry.translation)
             self.output_text.config(state='disabled')
             
     def clear_history(self):
         """Clear translation history"""
         self.translation_history.clear()
-        self.history_listbox.delete(0, tk.END)
+        self.search_history()
         self.status_var.set("History cleared")
         
+    def export_history(self):
+        """Stream the whole history to a JSONL, CSV or TMX file in the background"""
+        path = filedialog.asksaveasfilename(
+            defaultextension=".jsonl.gz",
+            initialfile=f"translation_history_{datetime.now().strftime('%Y%m%d')}.jsonl.gz",
+            filetypes=HISTORY_FILE_TYPES
+        )
+        if not path:
+            return
+        self.status_var.set("Exporting history...")
+        self.tasks.submit(
+            'history_transfer', lambda progress: export_history(self.translation_history, path, progress),
+            on_success=lambda count: self.status_var.set(f"Exported {count} records to {os.path.basename(path)}"),
+            on_error=lambda e: self.show_error(f"Export error: {e}"),
+            on_progress=lambda done, total: self.status_var.set(f"Exporting history... {done}/{total}")
+        )
+        
+    def import_history(self):
+        """Bulk-load a history export; its pairs also warm the translation cache and memory"""
+        path = filedialog.askopenfilename(filetypes=HISTORY_FILE_TYPES)
+        if not path:
+            return
+        self.status_var.set("Importing history...")
+        
+        def finished(counts):
+            self.search_history()
+            self.status_var.set(f"Imported {counts['added']} records ({counts['duplicates']} already present, "
+                                f"{counts['invalid']} invalid)")
+            
+        self.tasks.submit(
+            'history_transfer',
+            lambda progress: import_history(self.translation_history, path, cache=self.translation_cache,
+                                            memory=self.translation_memory, on_progress=progress),
+            on_success=finished,
+            on_error=lambda e: self.show_error(f"Import error: {e}"),
+            on_progress=lambda done, total: self.status_var.set(
+                f"Importing history... {done * 100 // max(total, 1)}%")
+        )
+        
+    def history_search_active(self):
+        """Return True if a query or language filter narrows the history list"""
+        return bool(self.history_search_var.get().strip()
+                    or self.history_source_filter.get() != 'Any'
+                    or self.history_target_filter.get() != 'Any')
+        
+    def schedule_history_search(self, *args):
+        """Run the history search shortly after the user stops typing"""
+        if self.history_search_job is not None:
+            self.root.after_cancel(self.history_search_job)
+        self.history_search_job = self.root.after(250, self.search_history)
+        
+    def search_history(self):
+        """Show the history entries matching the search box and filters"""
+        self.history_search_job = None
+        if not self.history_search_active():
+            self.history_view.set_source(self.translation_history.count, self.translation_history.page)
+            return
+            
+        source_filter = self.history_source_filter.get()
+        target_filter = self.history_target_filter.get()
+        try:
+            results = self.translation_history.search(
+                self.history_search_var.get(),
+                source_lang=None if source_filter == 'Any' else source_filter,
+                target_lang=None if target_filter == 'Any' else target_filter
+            )
+        except sqlite3.Error as e:
+            self.status_var.set(f"Search error: {e}")
+            return
+        self.history_view.set_source(results.count, results.page)
+        self.status_var.set(f"{results.count()} matching entries")
+        
     def show_error(self, message):
         """Show error message"""
         self.status_var.set("Error occurred")
@@ -616,6 +4660,11 @@ class LanguageTranslator:
                     settings = json.load(f)
                     self.source_lang_var.set(settings.get('source_lang', 'English'))
                     self.target_lang_var.set(settings.get('target_lang', 'Spanish'))
+                    self.energy_threshold = settings.get('energy_threshold')
+                    self.auto_detect_var.set(settings.get('auto_detect', False))
+                    self.type_translate_var.set(settings.get('translate_as_you_type', False))
+                    self.fanout_targets = settings.get('fanout_targets', [])
+                    self.speech_engine_var.set(settings.get('speech_engine', 'auto'))
         except Exception:
             pass
             
@@ -624,8 +4673,14 @@ class LanguageTranslator:
         try:
             settings = {
                 'source_lang': self.source_lang_var.get(),
-                'target_lang': self.target_lang_var.get()
+                'target_lang': self.target_lang_var.get(),
+                'auto_detect': self.auto_detect_var.get(),
+                'translate_as_you_type': self.type_translate_var.get(),
+                'fanout_targets': self.fanout_targets,
+                'speech_engine': self.speech_engine_var.get()
             }
+            if self.energy_threshold is not None:
+                settings['energy_threshold'] = self.energy_threshold
             with open('translator_settings.json', 'w') as f:
                 json.dump(settings, f)
         except Exception:
@@ -641,9 +4696,921 @@ class LanguageTranslator:
         self.save_settings()
         if self.is_recording:
             self.stop_recording()
+        if self.profiler.active:
+            self.profiler.stop()
+        self.tasks.shutdown()
+        self.translator.close()
+        if self.speech_worker:
+            self.speech_worker.stop()
+        if self.translation_cache:
+            self.translation_cache.close()
+        self.translation_history.close()
         self.root.destroy()
 
+class ServiceError(Exception):
+    """HTTP error returned by the translation service"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# Headless HTTP/JSON front end for the translator stack, built on asyncio streams
+class TranslationService:
+    REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               411: 'Length Required', 413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+               500: 'Internal Server Error', 502: 'Bad Gateway', 503: 'Service Unavailable'}
+    MAX_HEADERS = 100
+
+    def __init__(self, translator, host='127.0.0.1', port=8080, max_workers=8,
+                 keepalive_timeout=15.0, max_body=1 << 20, max_batch=1000):
+        self.translator = translator
+        self.host = host
+        self.port = port
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body = max_body
+        self.max_batch = max_batch
+        # Translation calls block, so they run in a thread pool next to the event loop
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='travelspeak-serve')
+        self.routes = {
+            '/translate': ('POST', self.handle_translate),
+            '/translate/batch': ('POST', self.handle_batch),
+            '/translate/multi': ('POST', self.handle_multi),
+            '/languages': ('GET', self.handle_languages),
+            '/health': ('GET', self.handle_health),
+            '/metrics': ('GET', self.handle_metrics),
+        }
+        self.codes = set(LANGUAGES.values())
+        self.server = None
+        self.loop = None
+        self.stopping = None
+        self.closing = False
+        self.connections = {}
+        self.requests = 0
+
+    async def start(self):
+        """Start listening; port 0 picks a free port, available as .port afterwards"""
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def run(self, grace=10.0):
+        """Serve until stop() is called, then shut down gracefully"""
+        if self.server is None:
+            await self.start()
+        await self.stopping.wait()
+        await self.shutdown(grace)
+
+    def stop(self):
+        """Ask the service to shut down; safe to call from any thread or a signal handler"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stopping.set)
+
+    async def shutdown(self, grace=10.0):
+        """Stop accepting, let in-flight requests finish for up to grace seconds, then close"""
+        self.closing = True
+        self.server.close()
+        # Idle keep-alive connections are closed now; busy ones close after their response
+        for writer, busy in list(self.connections.items()):
+            if not busy:
+                writer.close()
+        deadline = time.monotonic() + grace
+        while self.connections and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for writer in list(self.connections):
+            writer.close()
+        await self.server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def handle_connection(self, reader, writer):
+        self.connections[writer] = False
+        try:
+            while not self.closing:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), self.keepalive_timeout)
+                except ServiceError as e:
+                    await self.send(writer, e.status, {'error': str(e)}, keep_alive=False)
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                method, path, version, headers, body = request
+                self.connections[writer] = True
+                self.requests += 1
+                started = time.perf_counter()
+                status, payload = await self.dispatch(method, path, body)
+                route = path.rstrip('/') or '/'
+                METRICS.observe('travelspeak_service_seconds', time.perf_counter() - started,
+                                path=route if route in self.routes else 'other')
+                METRICS.inc('travelspeak_service_requests_total', status=status)
+                connection = headers.get('connection', '').lower()
+                keep_alive = (connection != 'close' and (version != 'HTTP/1.0' or connection == 'keep-alive')
+                              and not self.closing)
+                await self.send(writer, status, payload, keep_alive)
+                self.connections[writer] = False
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+
+    async def read_request(self, reader):
+        """Read one request; returns None when the client closed the connection"""
+        # readline raises ValueError once a line outgrows the stream's buffer limit
+        try:
+            request_line = await reader.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            raise ServiceError(400, "Request line too long")
+        if not request_line.strip():
+            return None
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise ServiceError(400, "Malformed request line")
+        method, target, version = parts
+        headers = {}
+        for count in itertools.count():
+            try:
+                line = await reader.readline()
+            except (ValueError, asyncio.LimitOverrunError):
+                raise ServiceError(431, "Request header line too long")
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if count >= self.MAX_HEADERS:
+                raise ServiceError(431, f"More than {self.MAX_HEADERS} request headers")
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'transfer-encoding' in headers:
+            raise ServiceError(411, "Chunked request bodies are not supported; send Content-Length")
+        try:
+            length = int(headers.get('content-length', 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            raise ServiceError(400, "Invalid Content-Length")
+        if length > self.max_body:
+            raise ServiceError(413, f"Request body over {self.max_body} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return method, target.split('?', 1)[0], version, headers, body
+
+    async def send(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {self.REASONS.get(status, 'Error')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def dispatch(self, method, path, body):
+        """Route a request and return (status, JSON payload)"""
+        route = self.routes.get(path.rstrip('/') or '/')
+        try:
+            if route is None:
+                raise ServiceError(404, f"No such endpoint: {path}")
+            allowed, handler = route
+            if method != allowed:
+                raise ServiceError(405, f"{path} only accepts {allowed}")
+            payload = None
+            if method == 'POST':
+                try:
+                    payload = json.loads(body or b'null')
+                except ValueError as e:
+                    raise ServiceError(400, f"Invalid JSON: {e}")
+                if not isinstance(payload, dict):
+                    raise ServiceError(400, "Request body must be a JSON object")
+            return 200, await self.loop.run_in_executor(self.executor, handler, payload)
+        except ServiceError as e:
+            return e.status, {'error': str(e)}
+        except TranslationError as e:
+            return 502, {'error': str(e)}
+        except RuntimeError as e:
+            # The executor refuses new work once shutdown has started
+            return 503, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': f"{type(e).__name__}: {e}"}
+
+    def language_pair(self, payload):
+        src = payload.get('src', 'auto')
+        dest = payload.get('dest')
+        if src != 'auto' and src not in self.codes:
+            raise ServiceError(400, f"Unknown source language: {src}")
+        if dest not in self.codes:
+            raise ServiceError(400, f"Unknown or missing target language: {dest}")
+        return src, dest
+
+    def handle_translate(self, payload):
+        text = payload.get('text')
+        if not isinstance(text, str):
+            raise ServiceError(400, "'text' must be a string")
+        src, dest = self.language_pair(payload)
+        result = translate_document(self.translator, text, src, dest)
+        return {'translation': result.text, 'backend': result.backend, 'src': src, 'dest': dest}
+
+    def handle_batch(self, payload):
+        texts = payload.get('texts')
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise ServiceError(400, "'texts' must be a list of strings")
+        if len(texts) > self.max_batch:
+            raise ServiceError(413, f"At most {self.max_batch} texts per batch")
+        src, dest = self.language_pair(payload)
+        translations, backend = self.translator.translate_batch(texts, src, dest, with_backend=True)
+        return {'translations': translations, 'backend': backend, 'src': src, 'dest': dest}
+
+    def handle_multi(self, payload):
+        text = payload.get('text')
+        dests = payload.get('dests')
+        if not isinstance(text, str):
+            raise ServiceError(400, "'text' must be a string")
+        if not isinstance(dests, list) or not dests:
+            raise ServiceError(400, "'dests' must be a non-empty list of language codes")
+        src = payload.get('src', 'auto')
+        for dest in dests:
+            self.language_pair({'src': src, 'dest': dest})
+        translations = {}
+        for dest, outcome in translate_many(self.translator, text, src, dests).items():
+            if isinstance(outcome, Exception):
+                translations[dest] = {'error': str(outcome)}
+            else:
+                translations[dest] = {'translation': outcome.text, 'backend': outcome.backend}
+        return {'translations': translations, 'src': src}
+
+    def handle_languages(self, payload):
+        return {'languages': LANGUAGES}
+
+    def handle_health(self, payload):
+        return {'status': 'ok', 'requests': self.requests, 'connections': len(self.connections),
+                'translator': self.translator.stats()}
+
+    def handle_metrics(self, payload):
+        return METRICS.snapshot()
+
+def detect_file_format(path):
+    """Guess the batch file format from its extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.csv':
+        return 'csv'
+    return 'text'
+
+def iter_chunks(iterable, size):
+    """Yield lists of up to size items from iterable"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_jsonl_records(input_file):
+    """Yield the JSON object on each non-blank line; raises ValueError naming the first bad line"""
+    for number, line in enumerate(input_file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {number}: invalid JSON: {e}") from None
+        if not isinstance(record, dict):
+            raise ValueError(f"line {number}: expected a JSON object, got {type(record).__name__}")
+        yield record
+
+def translate_file(translator, input_file, output_file, src, dest, file_format='text',
+                   field='text', batch_size=100, progress=None):
+    """Stream a text/JSONL/CSV file through translator.translate_batch, preserving order"""
+    count = 0
+    if file_format == 'text':
+        lines = (line.rstrip('\r\n') for line in input_file)
+        for chunk in iter_chunks(lines, batch_size):
+            for translated in translator.translate_batch(chunk, src=src, dest=dest):
+                output_file.write(translated + '\n')
+            count += len(chunk)
+            if progress:
+                progress(count)
+    elif file_format == 'jsonl':
+        for chunk in iter_chunks(iter_jsonl_records(input_file), batch_size):
+            texts = [str(record.get(field, '')) for record in chunk]
+            for record, translated in zip(chunk, translator.translate_batch(texts, src=src, dest=dest)):
+                record['translation'] = translated
+                output_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += len(chunk)
+            if progress:
+                progress(count)
+    elif file_format == 'csv':
+        reader = csv.DictReader(input_file)
+        if field not in (reader.fieldnames or []):
+            raise ValueError(f"CSV input has no '{field}' column")
+        writer = csv.DictWriter(output_file, fieldnames=reader.fieldnames + ['translation'])
+        writer.writeheader()
+        for chunk in iter_chunks(reader, batch_size):
+            texts = [row[field] or '' for row in chunk]
+            for row, translated in zip(chunk, translator.translate_batch(texts, src=src, dest=dest)):
+                row['translation'] = translated
+                writer.writerow(row)
+            count += len(chunk)
+            if progress:
+                progress(count)
+    else:
+        raise ValueError(f"Unknown file format: {file_format}")
+    return count
+
+def run_translate_file(args):
+    """Handle the translate-file command"""
+    stub = None
+    if args.stub:
+        stub = StubTranslationServer().start()
+
+    cache = None
+    if TRANSLATOR_AVAILABLE:
+        # Stub output must never end up in the persistent cache
+        cache = TranslationCache() if not (args.no_cache or stub) else None
+    else:
+        print("Deep Translator not available, using the offline fallback translator", file=sys.stderr)
+    # Batch output shouldn't silently degrade to the phrasebook unless asked to
+    translator = create_translator(cache=cache, engines=args.engine, stub_url=stub.url if stub else None,
+                                   rate=args.rate, fallback=args.offline_fallback,
+                                   memory=TranslationMemory(threshold=args.fuzzy) if args.fuzzy else None)
+
+    file_format = args.format or detect_file_format(args.input)
+    newline = '' if file_format == 'csv' else None
+    started = time.perf_counter()
+    output_file = None
+    try:
+        with open(args.input, 'r', encoding='utf-8', newline=newline) as input_file:
+            if args.output == '-':
+                output_file = sys.stdout
+            else:
+                output_file = open(args.output, 'w', encoding='utf-8', newline=newline)
+            count = translate_file(
+                translator, input_file, output_file, args.src, args.dest,
+                file_format, args.field, args.batch_size,
+                progress=lambda n: print(f"Translated {n} lines", file=sys.stderr)
+            )
+        elapsed = time.perf_counter() - started
+        print(f"Translated {count} lines in {elapsed:.2f}s", file=sys.stderr)
+        print(f"Backends: {json.dumps(translator.stats())}", file=sys.stderr)
+        for name, backend in translator.backends.items():
+            print(f"Scheduler ({name}): {json.dumps(backend.scheduler.stats())}", file=sys.stderr)
+    except TranslationError as e:
+        print(f"Translation error: {e}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"Invalid input in {args.input}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if output_file is not None and output_file is not sys.stdout:
+            output_file.close()
+        translator.close()
+        if cache:
+            cache.close()
+        if stub:
+            stub.stop()
+    return 0
+
+def run_fanout(args):
+    """Handle the fanout command"""
+    stub = None
+    if args.stub:
+        stub = StubTranslationServer().start()
+    cache = TranslationCache() if TRANSLATOR_AVAILABLE and not (args.no_cache or stub) else None
+    translator = create_translator(cache=cache, stub_url=stub.url if stub else None, rate=args.rate)
+    targets = [code.strip() for code in args.dest.split(',') if code.strip()]
+    started = time.perf_counter()
+    try:
+        results = translate_many(
+            translator, args.text, args.src, targets, max_workers=args.workers,
+            on_result=lambda dest, outcome, done, total: print(f"{dest}: done ({done}/{total})", file=sys.stderr)
+        )
+        if args.output:
+            export_translations(args.output, args.text, args.src, results)
+        else:
+            for dest, outcome in results.items():
+                print(f"{dest}\t{outcome if isinstance(outcome, Exception) else outcome.text}")
+    finally:
+        translator.close()
+        if cache:
+            cache.close()
+        if stub:
+            stub.stop()
+    failed = sum(isinstance(outcome, Exception) for outcome in results.values())
+    print(f"Translated into {len(results)} languages in {time.perf_counter() - started:.2f}s"
+          + (f", {failed} failed" if failed else ""), file=sys.stderr)
+    return 1 if failed else 0
+
+def run_serve(args):
+    """Handle the serve command"""
+    stub = None
+    if args.stub:
+        stub = StubTranslationServer().start()
+    # Stub output must never end up in the persistent cache
+    cache = TranslationCache() if TRANSLATOR_AVAILABLE and not (args.no_cache or stub) else None
+    translator = create_translator(cache=cache, engines=args.engine, stub_url=stub.url if stub else None,
+                                   rate=args.rate, fallback=not args.no_fallback,
+                                   memory=TranslationMemory(threshold=args.fuzzy) if args.fuzzy else None)
+    service = TranslationService(translator, host=args.host, port=args.port, max_workers=args.workers)
+
+    async def serve():
+        await service.start()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, service.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+        print(f"Serving on http://{service.host}:{service.port}", file=sys.stderr)
+        await service.run(grace=args.grace)
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        translator.close()
+        if cache:
+            cache.close()
+        if stub:
+            stub.stop()
+    print("Service stopped", file=sys.stderr)
+    return 0
+
+def run_transcribe(args):
+    """Handle the transcribe command"""
+    if not SPEECH_RECOGNITION_AVAILABLE:
+        print("Speech recognition not available. Install with: pip install speechrecognition", file=sys.stderr)
+        return 1
+
+    recognizer = sr.Recognizer()
+    engine = SpeechEngines(recognizer, args.models).select(args.lang, args.engine)
+    if engine is None:
+        print(f"No {args.engine} speech recognition engine has a model for '{args.lang}'", file=sys.stderr)
+        return 1
+    print(f"Recognizing with {engine.name}", file=sys.stderr)
+
+    if hasattr(engine, 'session'):
+        # Streaming engines find utterance boundaries themselves, so short reads lose nothing
+        source = AudioFileSource(args.input, recognizer, chunk_seconds=0.5)
+        started = time.perf_counter()
+        try:
+            count = stream_recognition(
+                engine.session(args.lang, source.sample_rate), source.read_raw, lambda: True,
+                on_partial=lambda text: print(f"... {text}", file=sys.stderr) if args.partial else None,
+                on_final=print
+            )
+        finally:
+            source.close()
+        print(f"Transcribed {count} utterances in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+        return 0
+
+    source = AudioFileSource(args.input, recognizer, chunk_seconds=args.chunk_seconds)
+    recognize = lambda audio: engine.recognize(audio, args.lang)
+    preprocessor = None
+    if NUMPY_AVAILABLE and not args.no_preprocess:
+        preprocessor = AudioPreprocessor(recognizer)
+        recognize = preprocessor.wrap(recognize)
+    pipeline = SpeechPipeline(source, recognize, on_result=print, workers=args.workers)
+    started = time.perf_counter()
+    pipeline.run(lambda: True)
+    elapsed = time.perf_counter() - started
+    print(f"Transcribed in {elapsed:.2f}s: {json.dumps(pipeline.stats())}", file=sys.stderr)
+    if preprocessor is not None:
+        print(f"Preprocessing: {json.dumps(preprocessor.stats())}", file=sys.stderr)
+    if pipeline.error is not None:
+        print(f"Speech recognition error: {pipeline.error}", file=sys.stderr)
+        return 1
+    return 0
+
+def run_export_history(args):
+    """Handle the export-history command"""
+    store = HistoryStore(args.history)
+    try:
+        count = export_history(store, args.output, on_progress=lambda done, total: print(
+            f"\rExported {done}/{total} records", end='', file=sys.stderr))
+    except (OSError, ValueError) as e:
+        print(f"\nExport error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    print(f"\rExported {count} records to {args.output}", file=sys.stderr)
+    return 0
+
+def run_import_history(args):
+    """Handle the import-history command"""
+    store = HistoryStore(args.history)
+    cache = None if args.no_cache else TranslationCache()
+    try:
+        counts = import_history(store, args.input, cache=cache, on_progress=lambda done, total: print(
+            f"\rImported {done * 100 // max(total, 1)}%", end='', file=sys.stderr))
+    except (OSError, ValueError, SyntaxError) as e:
+        # ElementTree reports malformed TMX as a SyntaxError subclass
+        print(f"\nImport error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+        if cache:
+            cache.close()
+    print(f"\rImported {counts['added']} records ({counts['duplicates']} already present, "
+          f"{counts['invalid']} invalid)", file=sys.stderr)
+    return 0
+
+def run_compile_phrasebook(args):
+    """Handle the compile-phrasebook command"""
+    count = compile_phrasebook(args.input, args.output)
+    print(f"Compiled {count} phrases into {args.output}", file=sys.stderr)
+    return 0
+
+def write_wav_fixture(path, seconds=20, rate=16000):
+    """Write a mono 16-bit WAV of alternating one-second tone bursts and silence"""
+    import wave
+    from array import array
+    samples = array('h')
+    for second in range(seconds):
+        if second % 2:
+            samples.frombytes(bytes(2 * rate))
+        else:
+            frequency = 220 * (1 + second % 3)
+            samples.extend(int(8000 * math.sin(2 * math.pi * frequency * n / rate)) for n in range(rate))
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return path
+
+def peak_memory_kb():
+    """Return the process's peak resident set size in KiB, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def benchmark_calls(fn, items, concurrency=1, trace_memory=False):
+    """Call fn(item) for every item and summarize latency, throughput, errors and memory"""
+    import tracemalloc
+
+    def timed(item):
+        started = time.perf_counter()
+        try:
+            fn(item)
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(timed, items))
+    else:
+        outcomes = [timed(item) for item in items]
+    elapsed = time.perf_counter() - started
+    traced_peak = None
+    if trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return benchmark_summary([latency for latency, _ in outcomes], sum(not ok for _, ok in outcomes),
+                             elapsed, traced_peak)
+
+def benchmark_summary(latencies, errors, elapsed, traced_peak=None):
+    """Build one scenario's result record; latencies are in seconds, reported in ms"""
+    ordered = sorted(latencies)
+    result = {
+        'count': len(ordered),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 4),
+        'throughput_per_s': round(len(ordered) / elapsed, 2) if elapsed else None,
+    }
+    for q in (50, 95, 99):
+        value = percentile(ordered, q)
+        result[f'p{q}_ms'] = round(value * 1000, 3) if value is not None else None
+    result['peak_rss_kb'] = peak_memory_kb()
+    if traced_peak is not None:
+        result['traced_peak_kb'] = traced_peak // 1024
+    return result
+
+def benchmark_recognition(stub, wav_paths, workers, chunk_seconds, trace_memory=False, preprocess=False):
+    """Run the speech pipeline over WAV fixtures with the stub as the recognizer
+
+    Raises RuntimeError if the pipeline captured less or more audio than the fixtures hold,
+    since timings over partial audio aren't comparable.
+    """
+    import tracemalloc
+    from urllib.request import Request, urlopen
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    request_bytes = 0
+    captured_frames = 0
+    expected_frames = 0
+
+    def recognize(audio):
+        nonlocal errors, request_bytes
+        started = time.perf_counter()
+        try:
+            data = audio.get_wav_data()
+            with lock:
+                request_bytes += len(data)
+            request = Request(stub.recognize_url, data=data, method='POST',
+                              headers={'Content-Type': 'audio/wav'})
+            with urlopen(request, timeout=10) as response:
+                return json.loads(response.read())['transcript']
+        except OSError:
+            with lock:
+                errors += 1
+            return None
+        finally:
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    recognizer = sr.Recognizer()
+    preprocessor = AudioPreprocessor(recognizer) if preprocess else None
+    handler = preprocessor.wrap(recognize) if preprocessor else recognize
+
+    def captured(audio):
+        nonlocal captured_frames
+        with lock:
+            captured_frames += len(audio.frame_data) // audio.sample_width
+        return handler(audio)
+
+    for path in wav_paths:
+        source = AudioFileSource(path, recognizer, chunk_seconds=chunk_seconds)
+        expected_frames += source.source.FRAME_COUNT
+        pipeline = SpeechPipeline(source, captured, on_result=lambda text: None, workers=workers)
+        pipeline.run(lambda: True)
+        if pipeline.error is not None:
+            raise pipeline.error
+    elapsed = time.perf_counter() - started
+    traced_peak = None
+    if trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if captured_frames != expected_frames:
+        raise RuntimeError(f"the speech pipeline captured {captured_frames} of {expected_frames} audio frames")
+    summary = benchmark_summary(latencies, errors, elapsed, traced_peak)
+    summary['request_bytes'] = request_bytes
+    if preprocessor is not None:
+        summary['preprocess'] = preprocessor.stats()
+    return summary
+
+BENCHMARK_SCENARIOS = ['translate', 'translate_batch', 'router', 'fallback', 'recognition', 'recognition_vad',
+                       'history_add', 'history_page', 'history_search']
+
+def run_benchmark(args):
+    """Handle the benchmark command"""
+    import tempfile
+    import platform
+    scenarios = args.scenarios.split(',') if args.scenarios else BENCHMARK_SCENARIOS
+    unknown = set(scenarios) - set(BENCHMARK_SCENARIOS)
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    if not TRANSLATOR_AVAILABLE:
+        scenarios = [name for name in scenarios if name not in ('translate', 'translate_batch', 'router')]
+        print("Deep Translator not available, skipping the translation scenarios", file=sys.stderr)
+    if not SPEECH_RECOGNITION_AVAILABLE and ('recognition' in scenarios or 'recognition_vad' in scenarios):
+        scenarios = [name for name in scenarios if not name.startswith('recognition')]
+        print("Speech recognition not available, skipping the recognition scenarios", file=sys.stderr)
+    elif not NUMPY_AVAILABLE and 'recognition_vad' in scenarios:
+        scenarios.remove('recognition_vad')
+        print("NumPy not available, skipping the recognition_vad scenario", file=sys.stderr)
+
+    random.seed(args.seed)
+    stub = StubTranslationServer(latency=args.latency, error_rate=args.error_rate, seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix='travelspeak-bench-')
+    texts = [f"Benchmark sentence number {i} for the stub backend." for i in range(args.requests)]
+    trace = args.trace_memory
+    results = OrderedDict()
+
+    def scheduler():
+        # Retries stay on, but with short pauses so injected errors don't dominate the timings
+        return RequestScheduler(rate=1e6, burst=1000000, base_delay=0.01, max_delay=0.1)
+
+    try:
+        for name in scenarios:
+            print(f"Running {name}...", file=sys.stderr)
+            if name == 'translate':
+                wrapper = DeepTranslatorWrapper(pool=TranslatorPool(base_url=stub.url), scheduler=scheduler())
+                results[name] = benchmark_calls(lambda text: wrapper.translate(text, 'en', 'es'), texts,
+                                                args.concurrency, trace)
+            elif name == 'translate_batch':
+                wrapper = DeepTranslatorWrapper(pool=TranslatorPool(base_url=stub.url), scheduler=scheduler())
+                batches = [texts[i:i + 50] for i in range(0, len(texts), 50)]
+                results[name] = benchmark_calls(lambda batch: wrapper.translate_batch(batch, 'en', 'fr'), batches,
+                                                args.concurrency, trace)
+            elif name == 'router':
+                router = TranslatorRouter(fallback=FallbackTranslator())
+                router.register('stub', DeepTranslatorWrapper(pool=TranslatorPool(base_url=stub.url),
+                                                              scheduler=scheduler()))
+                results[name] = benchmark_calls(lambda text: router.translate(text, 'en', 'de'), texts,
+                                                args.concurrency, trace)
+                results[name]['fallbacks'] = router.stats()['fallbacks']
+                router.close()
+            elif name == 'fallback':
+                fallback = FallbackTranslator()
+                phrases = [random.choice(["hello", "thank you", "Excuse me, where is the water?",
+                                          "please help", "good food"]) for _ in range(args.requests * 10)]
+                results[name] = benchmark_calls(lambda text: fallback.translate(text, 'en', 'es'), phrases,
+                                                1, trace)
+            elif name.startswith('recognition'):
+                fixture = os.path.join(workdir, 'fixture.wav')
+                wav_paths = args.wav or [fixture if os.path.exists(fixture) else write_wav_fixture(fixture)]
+                try:
+                    results[name] = benchmark_recognition(stub, wav_paths, args.concurrency, 1, trace,
+                                                          preprocess=name == 'recognition_vad')
+                except RuntimeError as e:
+                    print(f"Benchmark {name} failed: {e}", file=sys.stderr)
+                    return 1
+            elif name.startswith('history_'):
+                store = HistoryStore(os.path.join(workdir, 'history.db'))
+                if store.count() == 0:
+                    for i in range(args.history_rows):
+                        store.add(f"original text {i} {random.choice(texts)}", f"translated text {i}",
+                                  'English', random.choice(['Spanish', 'French', 'German']))
+                if name == 'history_add':
+                    results[name] = benchmark_calls(
+                        lambda i: store.add(f"added {i}", f"añadido {i}", 'English', 'Spanish'),
+                        range(args.requests), 1, trace)
+                elif name == 'history_page':
+                    offsets = [random.randrange(max(1, store.count() - 50)) for _ in range(args.requests)]
+                    results[name] = benchmark_calls(lambda offset: store.page(offset, 50), offsets, 1, trace)
+                else:
+                    queries = [f"number {random.randrange(args.requests)}" for _ in range(args.requests)]
+                    results[name] = benchmark_calls(lambda query: store.search(query).count(), queries, 1, trace)
+                store.close()
+    finally:
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'requests': args.requests, 'concurrency': args.concurrency, 'latency': args.latency,
+                   'error_rate': args.error_rate, 'seed': args.seed, 'history_rows': args.history_rows},
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+        for name, result in results.items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            changes = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_per_s'):
+                if before.get(key) and result.get(key) is not None:
+                    changes.append(f"{key} {(result[key] - before[key]) / before[key]:+.1%}")
+            print(f"{name}: {', '.join(changes)}", file=sys.stderr)
+    return 0
+
+def build_arg_parser():
+    """Build the command line parser; with no command the GUI is started"""
+    parser = argparse.ArgumentParser(description="Universal Language Translator")
+    parser.add_argument('--metrics-file', help="Periodically write latency histograms and counters here "
+                                               "(.prom/.txt for Prometheus text, otherwise JSON)")
+    parser.add_argument('--metrics-interval', type=float, default=30.0,
+                        help="Seconds between metrics dumps (default: 30)")
+    commands = parser.add_subparsers(dest='command')
+
+    batch = commands.add_parser('translate-file', help="Translate a text, JSONL or CSV file line by line")
+    batch.add_argument('input', help="Input file")
+    batch.add_argument('-o', '--output', default='-', help="Output file (default: stdout)")
+    batch.add_argument('--src', default='auto', help="Source language code (default: auto)")
+    batch.add_argument('--dest', required=True, help="Target language code")
+    batch.add_argument('--format', choices=['text', 'jsonl', 'csv'], help="Input format (default: from extension)")
+    batch.add_argument('--field', default='text', help="JSONL key or CSV column to translate (default: text)")
+    batch.add_argument('--batch-size', type=int, default=100, help="Lines per backend batch (default: 100)")
+    batch.add_argument('--rate', type=float, default=5.0, help="Max requests per second per backend (default: 5)")
+    batch.add_argument('--engine', action='append', choices=list(TRANSLATOR_ENGINES),
+                       help="Online backend to route between; repeatable (default: every configured engine)")
+    batch.add_argument('--offline-fallback', action='store_true',
+                       help="Use the offline phrasebook when every backend fails instead of stopping")
+    batch.add_argument('--no-cache', action='store_true', help="Bypass the translation cache")
+    batch.add_argument('--fuzzy', type=float, nargs='?', const=0.9, metavar='THRESHOLD',
+                       help="Reuse near-duplicate translations from this run at or above THRESHOLD similarity "
+                            "(default threshold: 0.9)")
+    batch.add_argument('--stub', action='store_true', help="Translate against a local stub server (offline testing)")
+    batch.set_defaults(handler=run_translate_file)
+
+    fanout = commands.add_parser('fanout', help="Translate one text into many languages concurrently")
+    fanout.add_argument('text', help="Text to translate")
+    fanout.add_argument('--src', default='auto', help="Source language code (default: auto)")
+    fanout.add_argument('--dest', required=True, help="Comma-separated target language codes, e.g. es,fr,de")
+    fanout.add_argument('-o', '--output', help="Write all translations to one .csv or .json file (default: stdout)")
+    fanout.add_argument('--workers', type=int, default=FANOUT_WORKERS,
+                        help=f"Languages translated at once (default: {FANOUT_WORKERS})")
+    fanout.add_argument('--rate', type=float, default=5.0, help="Max requests per second per backend (default: 5)")
+    fanout.add_argument('--no-cache', action='store_true', help="Bypass the translation cache")
+    fanout.add_argument('--stub', action='store_true', help="Translate against a local stub server (offline testing)")
+    fanout.set_defaults(handler=run_fanout)
+
+    serve = commands.add_parser('serve', help="Run a headless HTTP/JSON translation service")
+    serve.add_argument('--host', default='127.0.0.1', help="Address to bind (default: 127.0.0.1)")
+    serve.add_argument('--port', type=int, default=8080, help="Port to listen on (default: 8080)")
+    serve.add_argument('--workers', type=int, default=8, help="Concurrent translation threads (default: 8)")
+    serve.add_argument('--grace', type=float, default=10.0,
+                       help="Seconds in-flight requests get to finish on shutdown (default: 10)")
+    serve.add_argument('--rate', type=float, default=5.0, help="Max requests per second per backend (default: 5)")
+    serve.add_argument('--engine', action='append', choices=list(TRANSLATOR_ENGINES),
+                       help="Online backend to route between; repeatable (default: every configured engine)")
+    serve.add_argument('--no-fallback', action='store_true',
+                       help="Return an error instead of the offline phrasebook when every backend fails")
+    serve.add_argument('--no-cache', action='store_true', help="Bypass the translation cache")
+    serve.add_argument('--fuzzy', type=float, nargs='?', const=0.9, metavar='THRESHOLD',
+                       help="Reuse near-duplicate past translations at or above THRESHOLD similarity "
+                            "(default threshold: 0.9)")
+    serve.add_argument('--stub', action='store_true', help="Translate against a local stub server (load testing)")
+    serve.set_defaults(handler=run_serve)
+
+    transcribe = commands.add_parser('transcribe', help="Transcribe an audio file through the speech pipeline")
+    transcribe.add_argument('input', help="WAV, AIFF or FLAC file")
+    transcribe.add_argument('--lang', default='en', help="Recognition language code (default: en)")
+    transcribe.add_argument('--workers', type=int, default=2, help="Concurrent recognizer workers (default: 2)")
+    transcribe.add_argument('--chunk-seconds', type=float, default=5, help="Audio chunk length (default: 5)")
+    transcribe.add_argument('--engine', default='auto', choices=['auto', 'offline', 'google', 'vosk', 'sphinx'],
+                            help="Recognition engine; 'auto' prefers an installed offline model (default: auto)")
+    transcribe.add_argument('--models', default=SPEECH_MODEL_DIR,
+                            help=f"Directory holding offline speech models (default: {SPEECH_MODEL_DIR})")
+    transcribe.add_argument('--no-preprocess', action='store_true',
+                            help="Send phrases as captured instead of trimming silence and downsampling")
+    transcribe.add_argument('--partial', action='store_true',
+                            help="Print partial hypotheses to stderr while a streaming engine listens")
+    transcribe.set_defaults(handler=run_transcribe)
+
+    bench = commands.add_parser('benchmark', help="Benchmark translation, recognition and history against a local stub")
+    bench.add_argument('--scenarios', help=f"Comma-separated subset of: {', '.join(BENCHMARK_SCENARIOS)}")
+    bench.add_argument('--requests', type=int, default=200, help="Operations per scenario (default: 200)")
+    bench.add_argument('--concurrency', type=int, default=8, help="Concurrent callers / recognizer workers (default: 8)")
+    bench.add_argument('--latency', type=float, default=0.02, help="Stub response latency in seconds (default: 0.02)")
+    bench.add_argument('--error-rate', type=float, default=0.0, help="Fraction of stub responses that fail (default: 0)")
+    bench.add_argument('--seed', type=int, default=1, help="Random seed for data and error injection (default: 1)")
+    bench.add_argument('--history-rows', type=int, default=5000,
+                       help="Records preloaded for the history scenarios (default: 5000)")
+    bench.add_argument('--wav', action='append', help="WAV fixture for the recognition scenario; repeatable "
+                                                      "(default: a generated 20 s tone/silence file)")
+    bench.add_argument('--trace-memory', action='store_true',
+                       help="Also report tracemalloc peaks (slows the timed code down)")
+    bench.add_argument('-o', '--output', help="Write the JSON report here (default: stdout)")
+    bench.add_argument('--compare', metavar='BASELINE', help="Print changes against an earlier JSON report")
+    bench.set_defaults(handler=run_benchmark)
+
+    export = commands.add_parser('export-history', help="Export the translation history to JSONL, CSV or TMX")
+    export.add_argument('output', help="Output file: .jsonl, .csv or .tmx, optionally with .gz or .zst")
+    export.add_argument('--history', default=HISTORY_FILE, help=f"History database (default: {HISTORY_FILE})")
+    export.set_defaults(handler=run_export_history)
+
+    restore = commands.add_parser('import-history',
+                                  help="Import a history export, warming the translation cache on the way")
+    restore.add_argument('input', help="JSONL, CSV or TMX file, optionally with .gz or .zst")
+    restore.add_argument('--history', default=HISTORY_FILE, help=f"History database (default: {HISTORY_FILE})")
+    restore.add_argument('--no-cache', action='store_true', help="Don't add the imported pairs to the translation cache")
+    restore.set_defaults(handler=run_import_history)
+
+    phrasebook = commands.add_parser('compile-phrasebook', help="Compile a CSV/JSON phrase list for offline use")
+    phrasebook.add_argument('input', help="CSV with one column per language code, or JSON list of objects")
+    phrasebook.add_argument('-o', '--output', default=PHRASEBOOK_FILE,
+                            help=f"Output phrasebook (default: {PHRASEBOOK_FILE})")
+    phrasebook.set_defaults(handler=run_compile_phrasebook)
+    return parser
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    dumper = MetricsDumper(args.metrics_file, args.metrics_interval).start() if args.metrics_file else None
+    try:
+        if args.command:
+            return args.handler(args)
+
+        if not TKINTER_AVAILABLE:
+            print("The GUI needs tkinter; use a command such as 'serve' on headless systems", file=sys.stderr)
+            return 1
+        app = LanguageTranslator()
+        app.run()
+        return 0
+    finally:
+        if dumper:
+            dumper.stop()
+
 # Create and run the application
 if __name__ == "__main__":
-    app = LanguageTranslator()
-    app.run()
\ No newline at end of file
+    sys.exit(main())